@@ -0,0 +1,57 @@
+"""
+Mede chamadas de função por segundo no fib recursivo.
+
+Uso: python benchmarks/calls.py [ENGINE ...]
+"""
+
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lox.lox import ENGINES, Lox  # noqa: E402
+
+N = 18
+REPEAT = 10
+
+
+def fib(n: int) -> int:
+    x, y = 0, 1
+    for _ in range(n):
+        x, y = y, x + y
+    return x
+
+
+# fib(n) faz 2 * fib(n + 1) - 1 chamadas
+CALLS = 2 * fib(N + 1) - 1
+
+SOURCE = f"""
+fun fib(n) {{
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}}
+print fib({N});
+"""
+
+
+def calls_per_second(engine: str) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        lox = Lox(engine=engine)
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            lox.run(SOURCE)
+            best = min(best, time.perf_counter() - start)
+    return CALLS / best
+
+
+def main():
+    for engine in sys.argv[1:] or sorted(ENGINES):
+        print(f"{engine:>8}: {calls_per_second(engine):>10,.0f} chamadas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Mede a memória mantida por chamada de função ativa.
+
+Uso: python benchmarks/memory.py [ENGINE ...]
+
+Uma função recursiva desce DEPTH níveis e tira snapshots do
+tracemalloc na metade e no fim da descida: a diferença entre eles corresponde
+às alocações mantidas vivas por DEPTH / 2 chamadas ativas.
+"""
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lox.lox import Lox  # noqa: E402
+from lox.runtime import NativeFunction  # noqa: E402
+
+DEPTH = 100
+
+RECURSION = f"""
+fun f(n, a, b) {{
+    var x = n;
+    if (n == {DEPTH // 2} or n == 0) probe();
+    if (n > 0) f(n - 1, a, b);
+}}
+f({DEPTH}, 1, 2);
+"""
+
+
+def statistics(snapshot: tracemalloc.Snapshot) -> tuple[int, int]:
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    stats = snapshot.statistics("filename")
+    return sum(s.count for s in stats), sum(s.size for s in stats)
+
+
+def per_call(engine: str) -> tuple[float, float]:
+    lox = Lox(engine)
+    result = []
+
+    def probe():
+        result.append(tracemalloc.take_snapshot())
+
+    lox.ctx.define("probe", NativeFunction(probe, 0))
+    tracemalloc.start()
+    lox.run(RECURSION)
+    tracemalloc.stop()
+
+    half, end = map(statistics, result)
+    calls = DEPTH // 2
+    return (end[0] - half[0]) / calls, (end[1] - half[1]) / calls
+
+
+def main():
+    engines = sys.argv[1:] or ["tree"]
+    for engine in engines:
+        blocks, size = per_call(engine)
+        print(f"{engine}: {blocks:.1f} blocos/chamada, {size:.0f} bytes/chamada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Mede o custo de imprimir N linhas com cada destino de saída.
+
+Uso: python benchmarks/output.py [ENGINE ...]
+
+As linhas são escritas em os.devnull. "print" reproduz o comportamento
+anterior aos Outputs, com uma chamada à função print do Python por linha.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lox.lox import Lox  # noqa: E402
+from lox.output import CallbackOutput, ListOutput, Output, StreamOutput  # noqa: E402
+
+N = 1_000_000
+
+SOURCE = f"""
+for (var i = 0; i < {N}; i = i + 1) print i;
+"""
+
+
+class PrintOutput(Output):
+    def __init__(self, stream):
+        self.stream = stream
+
+    def print(self, value):
+        print(value, file=self.stream)
+
+
+def outputs(devnull):
+    return {
+        "print": PrintOutput(devnull),
+        "stream (1 linha)": StreamOutput(devnull, batch=1),
+        "stream (1024 linhas)": StreamOutput(devnull, batch=1024),
+        "lista": ListOutput(),
+        "callback (1024 linhas)": CallbackOutput(
+            lambda lines: devnull.write("\n".join(lines) + "\n"), batch=1024
+        ),
+    }
+
+
+def main():
+    for engine in sys.argv[1:] or ["closure", "vm"]:
+        print(f"{engine}: {N:,} linhas")
+        with open(os.devnull, "w") as devnull:
+            for name, output in outputs(devnull).items():
+                lox = Lox(engine, output=output)
+                start = time.perf_counter()
+                lox.run(SOURCE)
+                elapsed = time.perf_counter() - start
+                print(f"  {name:>22}: {elapsed:6.2f}s {N / elapsed:>12,.0f} linhas/s")
+
+
+if __name__ == "__main__":
+    main()
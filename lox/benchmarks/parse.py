@@ -0,0 +1,62 @@
+"""
+Mede a vazão (MB/s) dos frontends do parser.
+
+Uso: python benchmarks/parse.py [FRONTEND ...]
+
+O código de entrada é um programa repetido até ter cerca de 1 MB.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lox.parser import parse  # noqa: E402
+
+REPEAT = 5
+
+PROGRAM = """
+// fibonacci iterativo e recursivo
+fun fib(n) {
+    var x = 0;
+    var y = 1;
+    for (var i = 0; i < n; i = i + 1) {
+        var aux = x;
+        x = y;
+        y = aux + y;
+    }
+    return y;
+}
+
+fun fib_rec(n) {
+    if (n < 2) return n;
+    else return fib_rec(n - 1) + fib_rec(n - 2);
+}
+
+var msg = "resultado";
+while (!(fib(10) >= 100 and msg == nil) or false) {
+    print msg + ": " + fib(20) * 2.5 - -1 / fib_rec(5);
+}
+"""
+
+SOURCE = PROGRAM * (1_000_000 // len(PROGRAM))
+SIZE = len(SOURCE.encode())
+
+
+def throughput(frontend: str) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        parse(SOURCE, frontend=frontend)
+        best = min(best, time.perf_counter() - start)
+    return SIZE / best / 1e6
+
+
+def main():
+    for frontend in sys.argv[1:] or ["lark", "native"]:
+        print(f"{frontend:>8}: {throughput(frontend):6.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Mede o tempo de `python -c "import lox.lox"` com e sem o cache do parser.
+
+Uso: python benchmarks/startup.py [REPETIÇÕES]
+
+"frio" importa com um diretório de cache vazio, obrigando a construção das
+tabelas LALR, e "quente" importa com o cache já preenchido.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def import_time(env: dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import lox.lox"], cwd=ROOT, env=env, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    cold, warm = [], []
+
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = {**os.environ, "LOX_CACHE_DIR": cache_dir, "LOX_PARSER_CACHE": "1"}
+            cold.append(import_time(env))
+            warm.append(import_time(env))
+
+    env = {**os.environ, "LOX_PARSER_CACHE": "0"}
+    disabled = [import_time(env) for _ in range(repeat)]
+
+    for name, times in [("sem cache", disabled), ("frio", cold), ("quente", warm)]:
+        print(f"{name:>10}: {min(times) * 1000:7.1f} ms (melhor de {repeat})")
+
+
+if __name__ == "__main__":
+    main()
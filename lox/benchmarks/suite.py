@@ -0,0 +1,176 @@
+"""
+Suíte de benchmarks do interpretador.
+
+Uso:
+    python benchmarks/suite.py run [-o resultado.json] [--engine ENGINE ...]
+                                   [--warmup N] [--trials N] [WORKLOAD ...]
+    python benchmarks/suite.py compare BASE.json NOVO.json [--threshold 0.1]
+
+`run` executa cada programa de benchmarks/workloads medindo separadamente
+as três etapas de Lox.run:
+
+* parse: código fonte -> AST;
+* transform: otimização, resolução e compilação para a engine;
+* execute: execução do código compilado em um ambiente novo.
+
+Cada medida é repetida `--trials` vezes após `--warmup` execuções
+descartadas. `compare` compara o menor tempo de cada etapa entre dois
+arquivos e termina com código 1 se alguma ficou mais lenta que o limite.
+"""
+
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lox.lox import ENGINES, Lox  # noqa: E402
+from lox.optimizer import optimize  # noqa: E402
+from lox.parser import parse  # noqa: E402
+from lox.resolver import resolve  # noqa: E402
+
+WORKLOADS = Path(__file__).parent / "workloads"
+STAGES = ["parse", "transform", "execute"]
+
+
+def measure(src: str, engine: str) -> dict[str, float]:
+    """
+    Executa o programa uma vez, retornando o tempo de cada etapa.
+    """
+    compile, execute = ENGINES[engine]
+    times = {}
+
+    start = time.perf_counter()
+    ast = parse(src)
+    times["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    code = compile(resolve(optimize(ast)))
+    times["transform"] = time.perf_counter() - start
+
+    ctx = Lox(engine).ctx
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        execute(code, ctx)
+        times["execute"] = time.perf_counter() - start
+    return times
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def benchmark(path: Path, engine: str, warmup: int, trials: int) -> dict:
+    src = path.read_text()
+    try:
+        for _ in range(warmup):
+            measure(src, engine)
+        samples = [measure(src, engine) for _ in range(trials)]
+    except Exception as error:
+        message = str(error).strip().splitlines()[0]
+        return {"error": f"{type(error).__name__}: {message}"}
+    return {stage: summarize([s[stage] for s in samples]) for stage in STAGES}
+
+
+def run(args: argparse.Namespace):
+    paths = sorted(WORKLOADS.glob("*.lox"))
+    if args.workloads:
+        paths = [p for p in paths if p.stem in args.workloads]
+
+    results = {}
+    for engine in args.engine or sorted(ENGINES):
+        for path in paths:
+            name = f"{engine}/{path.stem}"
+            result = results[name] = benchmark(path, engine, args.warmup, args.trials)
+            if "error" in result:
+                print(f"{name:>20}: {result['error']}", file=sys.stderr)
+            else:
+                times = "  ".join(
+                    f"{stage} {result[stage]['min'] * 1000:8.2f} ms" for stage in STAGES
+                )
+                print(f"{name:>20}: {times}", file=sys.stderr)
+
+    data = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "warmup": args.warmup,
+            "trials": args.trials,
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(data, indent=2))
+    else:
+        print(json.dumps(data, indent=2))
+
+
+def compare(args: argparse.Namespace) -> int:
+    base = json.loads(Path(args.base).read_text())["results"]
+    new = json.loads(Path(args.new).read_text())["results"]
+    regressions = 0
+
+    for name in sorted(base.keys() & new.keys()):
+        if "error" in base[name] or "error" in new[name]:
+            continue
+        for stage in STAGES:
+            before = base[name][stage][args.stat]
+            after = new[name][stage][args.stat]
+            change = after / before - 1 if before else 0.0
+            flag = ""
+            if change > args.threshold:
+                flag = "  REGRESSÃO"
+                regressions += 1
+            elif change < -args.threshold:
+                flag = "  melhora"
+            print(
+                f"{name:>20} {stage:>9}: {before * 1000:8.2f} ms -> "
+                f"{after * 1000:8.2f} ms ({change:+7.1%}){flag}"
+            )
+
+    for name in sorted(base.keys() ^ new.keys()):
+        print(f"{name:>20}: presente em apenas um dos arquivos")
+
+    print(f"\n{regressions} regressões acima de {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="suite.py")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="executa os benchmarks")
+    run_parser.add_argument("workloads", nargs="*", metavar="WORKLOAD")
+    run_parser.add_argument("-o", "--output", metavar="ARQUIVO")
+    run_parser.add_argument("--engine", action="append", choices=sorted(ENGINES))
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument("--trials", type=int, default=5)
+
+    compare_parser = commands.add_parser("compare", help="compara dois resultados")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    compare_parser.add_argument("--stat", choices=["min", "median", "mean"], default="min")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        return compare(args)
+    run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
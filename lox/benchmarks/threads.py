@@ -0,0 +1,60 @@
+"""
+Mede a vazão de instâncias de Lox executando em paralelo em threads.
+
+Uso: python benchmarks/threads.py [ENGINE ...]
+
+Cada tarefa cria uma instância de Lox e executa um programa com laços e
+chamadas de função. Com o GIL, a vazão não cresce com o número de threads;
+em uma build sem GIL (python3.13t ou posterior) deve crescer até o número de
+núcleos disponíveis.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lox.lox import Lox  # noqa: E402
+from lox.output import ListOutput  # noqa: E402
+
+TASKS = 32
+THREADS = [1, 2, 4, 8]
+
+SOURCE = """
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+var total = 0;
+for (var i = 0; i < 20000; i = i + 1) total = total + i;
+print fib(16) + total;
+"""
+
+
+def task(engine: str):
+    output = ListOutput()
+    Lox(engine, output=output).run(SOURCE)
+    return output.lines
+
+
+def main():
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'ativo' if gil else 'desativado'}, {os.cpu_count()} CPUs")
+    for engine in sys.argv[1:] or ["closure", "vm"]:
+        print(f"{engine}: {TASKS} programas")
+        base = None
+        for threads in THREADS:
+            with ThreadPoolExecutor(threads) as executor:
+                start = time.perf_counter()
+                list(executor.map(task, [engine] * TASKS))
+                elapsed = time.perf_counter() - start
+            rate = TASKS / elapsed
+            base = base or rate
+            print(f"  {threads} threads: {rate:7.1f} programas/s  ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,33 @@
 import abc
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
+from .operators import BinaryOp, binary_op
 from .token import Token
 
 if TYPE_CHECKING:
-    from .runtime import LoxClass, LoxFunction, LoxInstance, NativeFunction
+    from .callsite import CallSite
+    from .env import Scope
+    from .runtime import (
+        LoxArray,
+        LoxClass,
+        LoxFunction,
+        LoxInstance,
+        LoxRope,
+        NativeFunction,
+    )
 
 type Value = (
-    str | float | bool | None | LoxFunction | NativeFunction | LoxClass | LoxInstance
+    str
+    | float
+    | bool
+    | None
+    | LoxFunction
+    | NativeFunction
+    | LoxClass
+    | LoxInstance
+    | LoxArray
+    | LoxRope
 )
 
 
@@ -32,6 +51,10 @@ class Literal(Expr):
 class Identifier(Expr):
     name: str
 
+    # Endereço léxico preenchido pelo resolvedor (depth=-1 para globais)
+    depth: int = field(default=-1, compare=False, repr=False)
+    slot: int = field(default=-1, compare=False, repr=False)
+
 
 @dataclass
 class Binary(Expr):
@@ -39,6 +62,12 @@ class Binary(Expr):
     operator: Token
     right: Expr
 
+    # Implementação do operador, escolhida uma vez na construção do nó
+    apply: BinaryOp = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        self.apply = binary_op(self.operator)
+
 
 @dataclass
 class Unary(Expr):
@@ -56,12 +85,40 @@ class Assign(Expr):
     name: str
     right: Expr
 
+    # Endereço léxico preenchido pelo resolvedor (depth=-1 para globais)
+    depth: int = field(default=-1, compare=False, repr=False)
+    slot: int = field(default=-1, compare=False, repr=False)
+
+
+@dataclass
+class Index(Expr):
+    value: Expr
+    index: Expr
+
+
+@dataclass
+class SetIndex(Expr):
+    value: Expr
+    index: Expr
+    right: Expr
+
+
+@dataclass
+class Slice(Expr):
+    value: Expr
+    start: Expr | None
+    end: Expr | None
+
 
 @dataclass
 class Call(Expr):
     callee: Expr
     args: list[Expr]
 
+    # Cache da função chamada quando callee é uma variável global,
+    # preenchido pelo resolvedor
+    site: "CallSite | None" = field(default=None, compare=False, repr=False)
+
 
 @dataclass
 class LogicOr(Expr):
@@ -80,6 +137,10 @@ class Stmt:
     Classe base abstrata de todos comandos Lox
     """
 
+    # Linha do comando no código fonte. Não é um campo dos dataclasses: o
+    # parser só a preenche quando solicitado (ex.: pelo profiler)
+    line: int = 0
+
 
 @dataclass
 class Program(Stmt):
@@ -101,11 +162,18 @@ class Var(Stmt):
     name: str
     right: Expr
 
+    # Posição no escopo local (-1 para globais)
+    slot: int = field(default=-1, compare=False, repr=False)
+
 
 @dataclass
 class Block(Stmt):
     body: list[Stmt]
 
+    # Variáveis declaradas no bloco, preenchido pelo resolvedor (None se o
+    # bloco não declara nenhuma variável)
+    scope: "Scope | None" = field(default=None, compare=False, repr=False)
+
 
 @dataclass
 class If(Stmt):
@@ -126,11 +194,20 @@ class Function(Stmt):
     params: list[str]
     body: list[Stmt]
 
+    # Posição do nome no escopo local (-1 para globais) e escopo do corpo,
+    # preenchidos pelo resolvedor
+    slot: int = field(default=-1, compare=False, repr=False)
+    scope: "Scope | None" = field(default=None, compare=False, repr=False)
+
 
 @dataclass
 class Return(Stmt):
     value: Expr | None
 
+    # Verdadeiro para `return f(...)` dentro de uma função, preenchido pelo
+    # resolvedor: a chamada pode ser feita sem aumentar a pilha
+    tail: bool = field(default=False, compare=False, repr=False)
+
 
 @dataclass
 class Class(Stmt):
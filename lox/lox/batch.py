@@ -0,0 +1,289 @@
+"""
+Execução de muitos programas Lox independentes em paralelo.
+
+Cada programa roda em um processo de um ProcessPoolExecutor, com uma
+instância nova de Lox cuja saída é escrita em lotes em um StringIO próprio
+(sem trocar o sys.stdout). Os processos carregam a gramática uma única vez,
+ao iniciar, e podem limitar o tempo de CPU e a memória de cada programa.
+
+Os resultados são produzidos à medida que os programas terminam, como
+dicionários prontos para serem gravados em JSON lines:
+
+    {"path": "a.lox", "ok": true, "output": "1.0\\n", "error": null, "time": 0.01}
+
+Se um processo morre no meio de um programa (por um sinal, por exemplo), o
+pool inteiro fica inutilizável e todos os programas em andamento falham com
+BrokenProcessPool. Esses programas são executados de novo, um de cada vez,
+para que apenas o responsável seja marcado como falha, e os demais seguem em
+um pool novo.
+"""
+
+import argparse
+import io
+import itertools
+import json
+import math
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows: os limites não são aplicados
+    resource = None  # type: ignore
+
+type Result = dict[str, Any]
+
+
+class LimitExceeded(BaseException):
+    """
+    Um programa excedeu o tempo de CPU permitido.
+
+    Deriva de BaseException para não ser capturada por `except Exception` no
+    meio do interpretador.
+    """
+
+
+def find_programs(paths: Iterable[str | Path]) -> list[Path]:
+    """
+    Arquivos .lox dos diretórios dados (recursivamente) e arquivos avulsos.
+    """
+    programs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            programs.extend(sorted(path.rglob("*.lox")))
+        else:
+            programs.append(path)
+    return programs
+
+
+def run_batch(
+    paths: Iterable[str | Path],
+    jobs: int | None = None,
+    engine: str | None = None,
+    cpu_time: float | None = None,
+    memory: int | None = None,
+) -> Iterator[Result]:
+    """
+    Executa os programas em `jobs` processos e produz os resultados na ordem
+    em que terminam.
+
+    cpu_time é o limite de tempo de CPU de cada programa, em segundos (com
+    resolução de um segundo), e memory o limite de memória, em bytes, que um
+    programa pode alocar além da usada pelo processo antes de executá-lo.
+    """
+    programs: Iterator[Path] = iter(find_programs(paths))
+    jobs = jobs or os.cpu_count() or 1
+    args = (engine, cpu_time, memory)
+    while True:
+        broken = False
+        suspects: list[str] = []
+        with ProcessPoolExecutor(jobs, initializer=init_worker) as executor:
+            pending: dict[Future[Result], str] = {}
+            while True:
+                # Mantém poucos programas na fila, para não ler a lista
+                # inteira. Depois de uma falha do pool, só espera os que
+                # já foram enviados
+                for path in () if broken else programs:
+                    try:
+                        future = executor.submit(run_program, str(path), *args)
+                    except BrokenProcessPool:
+                        programs = itertools.chain([path], programs)
+                        broken = True
+                        break
+                    pending[future] = str(path)
+                    if len(pending) >= 2 * jobs:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        suspects.append(path)
+                        continue
+                    yield result
+
+        if not broken:
+            return
+        # Os demais programas seguem em um pool novo
+        yield from run_isolated(suspects, *args)
+
+
+def run_isolated(
+    paths: list[str],
+    engine: str | None,
+    cpu_time: float | None,
+    memory: int | None,
+) -> Iterator[Result]:
+    """
+    Executa cada programa sozinho em um processo, de modo que uma nova
+    falha do pool identifica o programa que a causou.
+    """
+    executor = None
+    try:
+        for path in paths:
+            if executor is None:
+                executor = ProcessPoolExecutor(1, initializer=init_worker)
+            start = time.perf_counter()
+            try:
+                result = executor.submit(run_program, path, engine, cpu_time, memory).result()
+            except BrokenProcessPool as e:
+                result = {
+                    "path": path,
+                    "ok": False,
+                    "output": "",
+                    "error": f"{e.__class__.__name__}: {e}",
+                    "time": round(time.perf_counter() - start, 6),
+                }
+                executor.shutdown()
+                executor = None
+            yield result
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def init_worker():
+    from . import parser  # noqa: F401 (carrega a gramática)
+
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, cpu_exceeded)
+
+
+def cpu_exceeded(signum, frame):
+    raise LimitExceeded("tempo de CPU excedido")
+
+
+def run_program(
+    path: str,
+    engine: str | None = None,
+    cpu_time: float | None = None,
+    memory: int | None = None,
+) -> Result:
+    """
+    Executa um programa e retorna o resultado com a saída capturada.
+    """
+    from .lox import Lox
+    from .output import StreamOutput
+
+    stdout = io.StringIO()
+    error = None
+    start = time.perf_counter()
+    try:
+        with open(path) as f:
+            src = f.read()
+        with limits(cpu_time, memory):
+            # A saída só é lida no fim: pode ser escrita em lotes
+            Lox(engine, output=StreamOutput(stdout, batch=1024)).run(src)
+    except (Exception, LimitExceeded) as e:
+        error = f"{e.__class__.__name__}: {e}" if str(e) else e.__class__.__name__
+    return {
+        "path": path,
+        "ok": error is None,
+        "output": stdout.getvalue(),
+        "error": error,
+        "time": round(time.perf_counter() - start, 6),
+    }
+
+
+class limits:
+    """
+    Aplica os limites de CPU e memória durante o bloco with.
+
+    O limite de CPU (RLIMIT_CPU) vale para o processo inteiro, então é
+    definido como o tempo já consumido mais o permitido ao programa. O de
+    memória (RLIMIT_AS) é o espaço de endereçamento atual mais o permitido.
+    """
+
+    def __init__(self, cpu_time: float | None, memory: int | None):
+        self.cpu_time = cpu_time
+        self.memory = memory
+        self.saved: list[tuple[int, tuple[int, int]]] = []
+
+    def __enter__(self):
+        if resource is None:
+            return self
+        if self.cpu_time is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            used = usage.ru_utime + usage.ru_stime
+            self.set(resource.RLIMIT_CPU, math.ceil(used + self.cpu_time))
+        if self.memory is not None and (size := address_space()) is not None:
+            self.set(resource.RLIMIT_AS, size + self.memory)
+        return self
+
+    def __exit__(self, *exc):
+        while self.saved:
+            which, limit = self.saved.pop()
+            resource.setrlimit(which, limit)
+
+    def set(self, which: int, soft: int):
+        limit = resource.getrlimit(which)
+        hard = limit[1]
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(which, (soft, hard))
+        self.saved.append((which, limit))
+
+
+def address_space() -> int | None:
+    """
+    Tamanho do espaço de endereçamento do processo, em bytes (apenas Linux).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def main(argv: list[str] | None = None) -> int:
+    from .lox import ENGINES
+
+    parser = argparse.ArgumentParser(prog="pylox batch")
+    parser.add_argument("paths", nargs="+", metavar="DIRETÓRIO OU ARQUIVO")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="número de processos (padrão: número de CPUs)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=sorted(ENGINES),
+        default=None,
+        help="mecanismo de execução",
+    )
+    parser.add_argument(
+        "--cpu-time",
+        type=float,
+        default=None,
+        metavar="SEGUNDOS",
+        help="limite de tempo de CPU de cada programa",
+    )
+    parser.add_argument(
+        "--memory",
+        type=int,
+        default=None,
+        metavar="MB",
+        help="limite de memória de cada programa",
+    )
+    args = parser.parse_args(argv)
+
+    memory = args.memory * 2**20 if args.memory is not None else None
+    failures = 0
+    for result in run_batch(args.paths, args.jobs, args.engine, args.cpu_time, memory):
+        failures += not result["ok"]
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+    return 1 if failures else 0
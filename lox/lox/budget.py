@@ -0,0 +1,96 @@
+"""
+Limites de execução: número máximo de passos, prazo, cancelamento e
+profundidade de chamadas.
+
+Os mecanismos de execução chamam Budget.tick() a cada volta de um laço e a
+cada chamada de função Lox. tick() apenas decrementa um contador; o limite de
+passos, o relógio e os pedidos de cancelamento só são consultados quando o
+contador chega a zero, no máximo a cada CHECK_INTERVAL passos.
+
+cancel() pode ser chamado de outra thread: ele zera o contador, e a execução
+é interrompida com LoxTimeout no próximo passo.
+
+max_depth é o número máximo de chamadas aninhadas das engines stack e vm;
+None usa lox.trampoline.MAX_DEPTH. As demais engines usam a pilha do Python e
+são limitadas por sys.getrecursionlimit().
+"""
+
+import time
+
+CHECK_INTERVAL = 1024
+
+
+class LoxTimeout(Exception):
+    """
+    A execução excedeu o limite de passos ou o prazo, ou foi cancelada.
+    """
+
+
+class Budget:
+    __slots__ = (
+        "max_steps",
+        "timeout",
+        "max_depth",
+        "steps",
+        "interval",
+        "countdown",
+        "deadline",
+        "cancelled",
+    )
+
+    def __init__(
+        self,
+        max_steps: int | None = None,
+        timeout: float | None = None,
+        max_depth: int | None = None,
+    ):
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.max_depth = max_depth
+        self.cancelled = False
+        self.start()
+
+    def __repr__(self):
+        return f"Budget(max_steps={self.max_steps}, timeout={self.timeout}, steps={self.used})"
+
+    @property
+    def used(self) -> int:
+        """
+        Passos executados desde start().
+        """
+        return self.steps + self.interval - max(self.countdown, 0)
+
+    def start(self):
+        """
+        Zera a contagem de passos e inicia o prazo.
+        """
+        self.steps = 0
+        self.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        self.interval = self.countdown = self.next_interval()
+
+    def cancel(self):
+        self.cancelled = True
+        self.countdown = 0
+
+    def tick(self):
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.check()
+
+    def check(self):
+        self.steps += self.interval - max(self.countdown, 0)
+        self.interval = self.countdown = 0
+        if self.cancelled:
+            self.cancelled = False
+            raise LoxTimeout("execução cancelada.")
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise LoxTimeout(f"limite de {self.max_steps} passos excedido.")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise LoxTimeout(f"tempo limite de {self.timeout} segundos excedido.")
+        self.interval = self.countdown = self.next_interval()
+
+    def next_interval(self) -> int:
+        # Chega a zero exatamente no primeiro passo além do limite
+        if self.max_steps is None:
+            return CHECK_INTERVAL
+        return max(1, min(CHECK_INTERVAL, self.max_steps - self.steps + 1))
@@ -0,0 +1,444 @@
+"""
+Compilador de AST para bytecode.
+
+Cada função (e o programa principal) vira um objeto Code com uma sequência de
+instruções compactas. A instrução na posição i tem o código de operação em
+`ops[i]` (um byte) e o seu argumento em `args[i]` (inteiro de 16 bits). Valores
+que não cabem no argumento (números, strings, nomes, escopos, funções) ficam
+no pool de constantes do Code e são referenciados pelo seu índice.
+"""
+
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum, auto
+from functools import singledispatch
+
+from .ast import (
+    Array,
+    Assign,
+    Binary,
+    Block,
+    Call,
+    Expr,
+    ExprStmt,
+    Function,
+    Grouping,
+    Identifier,
+    If,
+    Index,
+    Literal,
+    LogicAnd,
+    LogicOr,
+    Print,
+    Program,
+    Return,
+    SetIndex,
+    Slice,
+    Stmt,
+    Unary,
+    Var,
+    While,
+)
+from .interpreter import truthy
+from .token import TokenType
+
+MAX_ARG = 0xFFFF
+
+
+class Op(IntEnum):
+    # Pilha
+    CONST = auto()
+    POP = auto()
+
+    # Variáveis
+    LOAD_LOCAL = auto()
+    STORE_LOCAL = auto()
+    DEFINE_LOCAL = auto()
+    LOAD_DEREF = auto()
+    STORE_DEREF = auto()
+    LOAD_GLOBAL = auto()
+    STORE_GLOBAL = auto()
+    DEFINE_GLOBAL = auto()
+    LOAD_CALLEE = auto()
+
+    # Operadores
+    ADD = auto()
+    SUB = auto()
+    MUL = auto()
+    DIV = auto()
+    EQ = auto()
+    NE = auto()
+    GT = auto()
+    GE = auto()
+    LT = auto()
+    LE = auto()
+    NEGATE = auto()
+    NOT = auto()
+
+    # Arrays
+    BUILD_ARRAY = auto()
+    GET_INDEX = auto()
+    SET_INDEX = auto()
+    SLICE = auto()
+
+    # Controle de fluxo
+    JUMP = auto()
+    JUMP_IF_FALSE = auto()
+    JUMP_IF_FALSE_OR_POP = auto()
+    JUMP_IF_TRUE_OR_POP = auto()
+    ENTER_SCOPE = auto()
+    EXIT_SCOPE = auto()
+    CALL = auto()
+    CALL_GLOBAL = auto()
+    TAIL_CALL = auto()
+    RETURN = auto()
+    FUNCTION = auto()
+    PRINT = auto()
+
+
+BINARY_OPS = {
+    TokenType.PLUS: Op.ADD,
+    TokenType.MINUS: Op.SUB,
+    TokenType.STAR: Op.MUL,
+    TokenType.SLASH: Op.DIV,
+    TokenType.EQUAL_EQUAL: Op.EQ,
+    TokenType.BANG_EQUAL: Op.NE,
+    TokenType.GREATER: Op.GT,
+    TokenType.GREATER_EQUAL: Op.GE,
+    TokenType.LESS: Op.LT,
+    TokenType.LESS_EQUAL: Op.LE,
+}
+
+
+@dataclass
+class Code:
+    name: str
+    ops: bytes
+    args: array
+    constants: list
+
+    def __len__(self):
+        return len(self.ops)
+
+    def dis(self) -> str:
+        """
+        Representação legível das instruções, útil para depuração.
+        """
+        lines = []
+        for i, (op, arg) in enumerate(zip(self.ops, self.args)):
+            line = f"{i:>4} {Op(op).name:<14} {arg}"
+            if Op(op) in CONST_OPS:
+                line += f" ({self.constants[arg]!r})"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+CONST_OPS = {
+    Op.CONST,
+    Op.LOAD_DEREF,
+    Op.STORE_DEREF,
+    Op.LOAD_GLOBAL,
+    Op.STORE_GLOBAL,
+    Op.DEFINE_GLOBAL,
+    Op.LOAD_CALLEE,
+    Op.CALL_GLOBAL,
+    Op.ENTER_SCOPE,
+    Op.FUNCTION,
+}
+
+
+@dataclass
+class Builder:
+    """
+    Acumula as instruções de um Code em construção.
+    """
+
+    name: str
+    ops: bytearray = field(default_factory=bytearray)
+    args: array = field(default_factory=lambda: array("H"))
+    constants: list = field(default_factory=list)
+    index: dict = field(default_factory=dict)
+
+    # No programa principal, `return` interrompe a execução com LoxReturn
+    toplevel: bool = False
+
+    def emit(self, op: Op, arg: int = 0) -> int:
+        if arg > MAX_ARG:
+            raise RuntimeError(f"{self.name}: programa grande demais.")
+        self.ops.append(op)
+        self.args.append(arg)
+        return len(self.ops) - 1
+
+    def constant(self, value) -> int:
+        # Valores imutáveis repetidos compartilham a mesma constante. O tipo
+        # faz parte da chave para não confundir 1.0 com True.
+        key = (type(value), value)
+        try:
+            hash(key)
+        except TypeError:
+            key = id(value)
+        try:
+            return self.index[key]
+        except KeyError:
+            self.constants.append(value)
+            self.index[key] = len(self.constants) - 1
+            return self.index[key]
+
+    def patch(self, instr: int):
+        """
+        Faz o salto na posição instr apontar para a próxima instrução.
+        """
+        target = len(self.ops)
+        if target > MAX_ARG:
+            raise RuntimeError(f"{self.name}: programa grande demais.")
+        self.args[instr] = target
+
+    def build(self) -> Code:
+        return Code(self.name, bytes(self.ops), self.args, self.constants)
+
+
+def compile(program: Program) -> Code:
+    """
+    Compila um programa já resolvido.
+    """
+    builder = Builder("<program>", toplevel=True)
+    for stmt in program.body:
+        compile_stmt(stmt, builder)
+    builder.emit(Op.CONST, builder.constant(None))
+    builder.emit(Op.RETURN)
+    return builder.build()
+
+
+def compile_function(function: Function) -> Code:
+    builder = Builder(function.name)
+    for stmt in function.body:
+        compile_stmt(stmt, builder)
+    builder.emit(Op.CONST, builder.constant(None))
+    builder.emit(Op.RETURN)
+    return builder.build()
+
+
+@singledispatch
+def compile_expr(expr: Expr, builder: Builder):
+    raise TypeError(f"[bytecode] tipo não suportado: {type(expr)}")
+
+
+@singledispatch
+def compile_stmt(stmt: Stmt, builder: Builder):
+    raise TypeError(f"[bytecode] tipo não suportado: {type(stmt)}")
+
+
+#
+# Expressões
+#
+@compile_expr.register
+def _(expr: Literal, builder: Builder):
+    builder.emit(Op.CONST, builder.constant(expr.value))
+
+
+@compile_expr.register
+def _(expr: Grouping, builder: Builder):
+    compile_expr(expr.expression, builder)
+
+
+@compile_expr.register
+def _(expr: Unary, builder: Builder):
+    compile_expr(expr.right, builder)
+    match expr.operator.type:
+        case TokenType.MINUS:
+            builder.emit(Op.NEGATE)
+        case TokenType.BANG:
+            builder.emit(Op.NOT)
+        case token:
+            raise RuntimeError(f"operação unária inválida {token}")
+
+
+@compile_expr.register
+def _(expr: Binary, builder: Builder):
+    compile_expr(expr.left, builder)
+    compile_expr(expr.right, builder)
+    try:
+        builder.emit(BINARY_OPS[expr.operator.type])
+    except KeyError:
+        raise RuntimeError(f"operação binaria inválida {expr.operator.type}")
+
+
+@compile_expr.register
+def _(expr: LogicAnd, builder: Builder):
+    # Se o lado esquerdo for falso, ele é o resultado e o direito é pulado
+    compile_expr(expr.left, builder)
+    jump = builder.emit(Op.JUMP_IF_FALSE_OR_POP)
+    compile_expr(expr.right, builder)
+    builder.patch(jump)
+
+
+@compile_expr.register
+def _(expr: LogicOr, builder: Builder):
+    compile_expr(expr.left, builder)
+    jump = builder.emit(Op.JUMP_IF_TRUE_OR_POP)
+    compile_expr(expr.right, builder)
+    builder.patch(jump)
+
+
+@compile_expr.register
+def _(expr: Identifier, builder: Builder):
+    if expr.depth < 0:
+        builder.emit(Op.LOAD_GLOBAL, builder.constant(expr.name))
+    elif expr.depth == 0:
+        builder.emit(Op.LOAD_LOCAL, expr.slot)
+    else:
+        builder.emit(Op.LOAD_DEREF, builder.constant((expr.depth, expr.slot)))
+
+
+@compile_expr.register
+def _(expr: Assign, builder: Builder):
+    compile_expr(expr.right, builder)
+    if expr.depth < 0:
+        builder.emit(Op.STORE_GLOBAL, builder.constant(expr.name))
+    elif expr.depth == 0:
+        builder.emit(Op.STORE_LOCAL, expr.slot)
+    else:
+        builder.emit(Op.STORE_DEREF, builder.constant((expr.depth, expr.slot)))
+
+
+@compile_expr.register
+def _(expr: Array, builder: Builder):
+    for item in expr.value:
+        compile_expr(item, builder)
+    builder.emit(Op.BUILD_ARRAY, len(expr.value))
+
+
+@compile_expr.register
+def _(expr: Index, builder: Builder):
+    compile_expr(expr.value, builder)
+    compile_expr(expr.index, builder)
+    builder.emit(Op.GET_INDEX)
+
+
+@compile_expr.register
+def _(expr: SetIndex, builder: Builder):
+    compile_expr(expr.value, builder)
+    compile_expr(expr.index, builder)
+    compile_expr(expr.right, builder)
+    builder.emit(Op.SET_INDEX)
+
+
+@compile_expr.register
+def _(expr: Slice, builder: Builder):
+    compile_expr(expr.value, builder)
+    for bound in (expr.start, expr.end):
+        if bound is None:
+            builder.emit(Op.CONST, builder.constant(None))
+        else:
+            compile_expr(bound, builder)
+    builder.emit(Op.SLICE)
+
+
+@compile_expr.register
+def _(expr: Call, builder: Builder):
+    if expr.site is None:
+        compile_expr(expr.callee, builder)
+        for arg in expr.args:
+            compile_expr(arg, builder)
+        builder.emit(Op.CALL, len(expr.args))
+        return
+
+    # Função global: busca e verificação ficam no cache da chamada
+    site = builder.constant(expr.site)
+    builder.emit(Op.LOAD_CALLEE, site)
+    for arg in expr.args:
+        compile_expr(arg, builder)
+    builder.emit(Op.CALL_GLOBAL, site)
+
+
+#
+# Comandos
+#
+@compile_stmt.register
+def _(cmd: Print, builder: Builder):
+    compile_expr(cmd.right, builder)
+    builder.emit(Op.PRINT)
+
+
+@compile_stmt.register
+def _(cmd: ExprStmt, builder: Builder):
+    compile_expr(cmd.expr, builder)
+    builder.emit(Op.POP)
+
+
+@compile_stmt.register
+def _(cmd: Var, builder: Builder):
+    compile_expr(cmd.right, builder)
+    define(cmd.slot, cmd.name, builder)
+
+
+@compile_stmt.register
+def _(cmd: Block, builder: Builder):
+    if cmd.scope is not None:
+        builder.emit(Op.ENTER_SCOPE, builder.constant(cmd.scope))
+    for stmt in cmd.body:
+        compile_stmt(stmt, builder)
+    if cmd.scope is not None:
+        builder.emit(Op.EXIT_SCOPE)
+
+
+@compile_stmt.register
+def _(cmd: If, builder: Builder):
+    compile_expr(cmd.cond, builder)
+    jump_else = builder.emit(Op.JUMP_IF_FALSE)
+    compile_stmt(cmd.then_body, builder)
+    jump_end = builder.emit(Op.JUMP)
+    builder.patch(jump_else)
+    compile_stmt(cmd.else_body, builder)
+    builder.patch(jump_end)
+
+
+@compile_stmt.register
+def _(cmd: While, builder: Builder):
+    start = len(builder.ops)
+
+    # Condição constante, como em for (;;): o laço não tem teste
+    if isinstance(cmd.cond, Literal) and truthy(cmd.cond.value):
+        compile_stmt(cmd.body, builder)
+        builder.emit(Op.JUMP, start)
+        return
+
+    compile_expr(cmd.cond, builder)
+    jump_end = builder.emit(Op.JUMP_IF_FALSE)
+    compile_stmt(cmd.body, builder)
+    builder.emit(Op.JUMP, start)
+    builder.patch(jump_end)
+
+
+@compile_stmt.register
+def _(cmd: Function, builder: Builder):
+    code = compile_function(cmd)
+    builder.emit(Op.FUNCTION, builder.constant((cmd, code)))
+    define(cmd.slot, cmd.name, builder)
+
+
+@compile_stmt.register
+def _(cmd: Return, builder: Builder):
+    if cmd.tail:
+        # Chamadas de funções da VM substituem a função atual; as demais
+        # deixam o resultado na pilha para o RETURN seguinte
+        call: Call = cmd.value  # type: ignore
+        if call.site is None:
+            compile_expr(call.callee, builder)
+        else:
+            builder.emit(Op.LOAD_CALLEE, builder.constant(call.site))
+        for arg in call.args:
+            compile_expr(arg, builder)
+        builder.emit(Op.TAIL_CALL, len(call.args))
+    elif cmd.value is None:
+        builder.emit(Op.CONST, builder.constant(None))
+    else:
+        compile_expr(cmd.value, builder)
+    builder.emit(Op.RETURN, builder.toplevel)
+
+
+def define(slot: int, name: str, builder: Builder):
+    if slot < 0:
+        builder.emit(Op.DEFINE_GLOBAL, builder.constant(name))
+    else:
+        builder.emit(Op.DEFINE_LOCAL, slot)
@@ -0,0 +1,73 @@
+"""
+Cache LRU de programas já analisados, usado por Lox.run.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any
+
+
+def digest(src: str) -> bytes:
+    """
+    Chave do cache para um código fonte.
+    """
+    return hashlib.blake2b(src.encode(), digest_size=16).digest()
+
+
+class ProgramCache:
+    """
+    Guarda os últimos `maxsize` programas compilados, indexados pelo digest
+    do código fonte. maxsize=0 desativa o cache.
+
+    Os programas guardados são reaproveitados pelas execuções seguintes da
+    mesma instância de Lox. A AST não muda depois do resolvedor: o estado de
+    execução (caches de chamadas e Frames livres) fica no Env global de cada
+    instância, de modo que um programa compilado pode ser executado por várias
+    instâncias ao mesmo tempo.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 0:
+            raise ValueError(f"tamanho de cache inválido: {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[bytes, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return (
+            f"ProgramCache(maxsize={self.maxsize}, size={len(self)}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+    def get(self, key: bytes) -> Any | None:
+        """
+        Retorna o programa associado a key ou None, contabilizando acertos
+        e falhas.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: bytes, value: Any):
+        """
+        Insere um programa, descartando o usado há mais tempo se necessário.
+        """
+        if self.maxsize == 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
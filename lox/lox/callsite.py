@@ -0,0 +1,129 @@
+"""
+Caches de chamadas a funções globais (inline caches).
+
+O resolvedor associa um CallSite a cada chamada `f(...)` em que `f` é uma
+variável global. O CallSite só descreve a chamada (nome e número de
+argumentos) e não muda depois da resolução, de modo que a AST pode ser
+reaproveitada pelo cache de programas e executada em várias threads.
+
+O estado do cache fica em um CallCache, criado na primeira execução da
+chamada e guardado na tabela `calls` do Env global de cada instância de Lox.
+O CallCache guarda a função encontrada na última busca e só volta a
+procurá-la no Env global quando a versão do Env muda, o que acontece sempre
+que uma função global é redefinida. Também guarda a última função que passou
+na verificação de aridade, que não precisa ser repetida enquanto a mesma
+função for chamada no mesmo ponto do programa.
+
+cache_info() soma os acertos e falhas de todos os CallCaches existentes. O
+registro de CallCaches é compartilhado por todas as instâncias de Lox e
+protegido por uma trava, já que elas podem executar em várias threads ao
+mesmo tempo.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, NamedTuple
+from weakref import WeakSet
+
+from .runtime import LoxCallable
+
+if TYPE_CHECKING:
+    from .ast import Value
+    from .env import Env
+
+_caches: WeakSet[CallCache] = WeakSet()
+_lock = threading.Lock()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    sites: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CallSite:
+    __slots__ = ("name", "nargs")
+
+    def __init__(self, name: str, nargs: int):
+        self.name = name
+        self.nargs = nargs
+
+    def __repr__(self):
+        return f"CallSite({self.name!r}, {self.nargs})"
+
+
+class CallCache:
+    __slots__ = ("site", "version", "value", "checked", "hits", "misses", "__weakref__")
+
+    def __init__(self, site: CallSite):
+        self.site = site
+        self.version = -1
+        self.value: Value = None
+        self.checked: Value = None  # última função com a aridade verificada
+        self.hits = 0
+        self.misses = 0
+        with _lock:
+            _caches.add(self)
+
+    def __repr__(self):
+        return f"CallCache({self.site.name!r}, hits={self.hits}, misses={self.misses})"
+
+    def lookup(self, globals: Env) -> Value:
+        """
+        Retorna o valor atual da variável global chamada.
+        """
+        if self.version == globals.version:
+            self.hits += 1
+            return self.value
+
+        self.misses += 1
+        name = self.site.name
+        try:
+            value = globals[name]
+        except KeyError:
+            raise RuntimeError(f"variável não existe: {name}")
+
+        # Só funções ficam no cache: a versão do Env muda apenas quando uma
+        # variável que guarda uma função é alterada
+        if isinstance(value, LoxCallable):
+            self.version = globals.version
+            self.value = value
+        return value
+
+
+def call_cache(globals: Env, site: CallSite) -> CallCache:
+    """
+    Cache da chamada na instância de Lox dona do Env global.
+    """
+    calls = globals.calls
+    try:
+        return calls[site]  # type: ignore
+    except KeyError:
+        cache = calls[site] = CallCache(site)  # type: ignore
+        return cache
+
+
+def cache_info() -> CacheInfo:
+    """
+    Total de acertos e falhas dos caches de chamadas existentes.
+    """
+    with _lock:
+        caches = list(_caches)
+    return CacheInfo(
+        sum(cache.hits for cache in caches),
+        sum(cache.misses for cache in caches),
+        len(caches),
+    )
+
+
+def reset_stats():
+    with _lock:
+        caches = list(_caches)
+    for cache in caches:
+        cache.hits = cache.misses = 0
@@ -0,0 +1,610 @@
+"""
+Backend de execução por compilação para closures.
+
+Em vez de percorrer a árvore com `singledispatch` a cada execução, cada nó da
+AST é convertido uma única vez em uma função Python pré-montada. Executar o
+programa se resume a chamadas diretas entre essas funções.
+"""
+
+from dataclasses import dataclass
+from functools import singledispatch
+from typing import Callable
+
+from .ast import (
+    Array,
+    Assign,
+    Binary,
+    Block,
+    Call,
+    Expr,
+    ExprStmt,
+    Function,
+    Grouping,
+    Identifier,
+    If,
+    Index,
+    Literal,
+    LogicAnd,
+    LogicOr,
+    Print,
+    Program,
+    Return,
+    SetIndex,
+    Slice,
+    Stmt,
+    Unary,
+    Value,
+    Var,
+    While,
+)
+from .callsite import call_cache
+from .env import UNSET, Env, Frame
+from .interpreter import (
+    Completion,
+    LoxReturn,
+    TailCall,
+    check_call,
+    define,
+    truthy,
+)
+from . import operators
+from .runtime import LoxArray, LoxCallable, LoxFunction, get_index, get_slice, set_index
+from .token import TokenType
+
+type ExprCode = Callable[[Env], Value]
+type StmtCode = Callable[[Env], Completion | None]
+
+
+def run(program: Stmt, ctx: Env):
+    """
+    Compila e executa um programa no contexto dado.
+    """
+    execute(compile(program), ctx)
+
+
+def compile(program: Program) -> StmtCode:
+    """
+    Compila um programa para uma closure que pode ser executada várias vezes.
+    """
+    return compile_stmt(program)
+
+
+def execute(code: StmtCode, ctx: Env):
+    """
+    Executa um programa compilado no contexto dado.
+    """
+    code(ctx)
+
+
+@dataclass(repr=False)
+class CompiledFunction(LoxFunction):
+    body_code: StmtCode
+
+    def call(self, ctx: Env, argvalues: list[Value]):
+        function = self
+        tick = self.closure.globals.budget.tick
+        while True:
+            tick()
+
+            # Abre um novo escopo de variáveis
+            scope = function.ast.scope
+            ctx = scope.acquire(function.closure)
+
+            # Insere os argumentos no escopo atual
+            for name, value in zip(function.ast.params, argvalues):
+                ctx.define(name, value)
+
+            # Excuta o corpo da função
+            try:
+                completion = function.body_code(ctx)
+            finally:
+                scope.release(ctx)
+            if completion is None:
+                return None
+
+            # `return g(...)`: executa g no lugar da função atual
+            if type(completion) is not TailCall:
+                return completion.value
+            function, argvalues = completion.function, completion.args
+
+
+@singledispatch
+def compile_expr(expr: Expr) -> ExprCode:
+    raise TypeError(f"[compile_expr] tipo não suportado: {type(expr)}")
+
+
+@singledispatch
+def compile_stmt(stmt: Stmt) -> StmtCode:
+    raise TypeError(f"[compile_stmt] tipo não suportado: {type(stmt)}")
+
+
+def compile_body(body: list[Stmt]) -> StmtCode:
+    codes = [compile_stmt(stmt) for stmt in body]
+
+    if len(codes) == 1:
+        return codes[0]
+
+    def run_body(ctx: Env):
+        for code in codes:
+            if (completion := code(ctx)) is not None:
+                return completion
+
+    return run_body
+
+
+#
+# Expressões
+#
+@compile_expr.register
+def _(expr: Literal):
+    value = expr.value
+    return lambda ctx: value
+
+
+@compile_expr.register
+def _(expr: Grouping):
+    return compile_expr(expr.expression)
+
+
+@compile_expr.register
+def _(expr: Unary):
+    right = compile_expr(expr.right)
+
+    match expr.operator.type:
+        case TokenType.MINUS:
+
+            def negate(ctx: Env):
+                value = right(ctx)
+                if isinstance(value, float) or type(value) is int:
+                    return -value
+                raise RuntimeError(f"operação inválida: -{value}")
+
+            return negate
+        case TokenType.BANG:
+            return lambda ctx: not truthy(right(ctx))
+        case token:
+            raise RuntimeError(f"operação unária inválida {token}")
+
+
+@compile_expr.register
+def _(expr: Binary):
+    left = compile_expr(expr.left)
+    right = compile_expr(expr.right)
+    op = expr.operator
+
+    match op.type:
+        # Operações matemáticas
+        case TokenType.PLUS:
+
+            def add(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is float and type(y) is float:
+                    return x + y
+                return operators.add(x, y, op)
+
+            return add
+        case TokenType.MINUS:
+
+            def sub(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is not float or type(y) is not float:
+                    return operators.sub(x, y, op)
+                return x - y
+
+            return sub
+        case TokenType.STAR:
+
+            def mul(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is not float or type(y) is not float:
+                    return operators.mul(x, y, op)
+                return x * y
+
+            return mul
+        case TokenType.SLASH:
+
+            def div(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is not float or type(y) is not float:
+                    return operators.div(x, y, op)
+                return x / y
+
+            return div
+
+        # Comparações
+        case TokenType.EQUAL_EQUAL:
+
+            def eq(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is not type(y):
+                    return operators.eq(x, y)
+                return x == y
+
+            return eq
+        case TokenType.BANG_EQUAL:
+
+            def ne(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is not type(y):
+                    return operators.ne(x, y)
+                return x != y
+
+            return ne
+        case TokenType.GREATER_EQUAL:
+
+            def ge(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is not float or type(y) is not float:
+                    return operators.ge(x, y, op)
+                return x >= y
+
+            return ge
+        case TokenType.GREATER:
+
+            def gt(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is not float or type(y) is not float:
+                    return operators.gt(x, y, op)
+                return x > y
+
+            return gt
+        case TokenType.LESS:
+
+            def lt(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is not float or type(y) is not float:
+                    return operators.lt(x, y, op)
+                return x < y
+
+            return lt
+        case TokenType.LESS_EQUAL:
+
+            def le(ctx: Env):
+                x = left(ctx)
+                y = right(ctx)
+                if type(x) is not float or type(y) is not float:
+                    return operators.le(x, y, op)
+                return x <= y
+
+            return le
+
+        case token:
+            raise RuntimeError(f"operação binaria inválida {token}")
+
+
+@compile_expr.register
+def _(expr: LogicAnd):
+    left = compile_expr(expr.left)
+    right = compile_expr(expr.right)
+
+    def logic_and(ctx: Env):
+        x = left(ctx)
+        if x is False or x is None:
+            return x
+        return right(ctx)
+
+    return logic_and
+
+
+@compile_expr.register
+def _(expr: LogicOr):
+    left = compile_expr(expr.left)
+    right = compile_expr(expr.right)
+
+    def logic_or(ctx: Env):
+        x = left(ctx)
+        if x is False or x is None:
+            return right(ctx)
+        return x
+
+    return logic_or
+
+
+@compile_expr.register
+def _(expr: Identifier):
+    name = expr.name
+    depth = expr.depth
+    slot = expr.slot
+
+    if depth < 0:
+
+        def load_global(ctx: Env):
+            try:
+                return ctx.globals[name]
+            except KeyError:
+                raise RuntimeError(f"variável não existe: {name}")
+
+        return load_global
+
+    if depth == 0:
+
+        def load_local(ctx: Frame):
+            value = ctx.slots[slot]
+            if value is UNSET:
+                try:
+                    return ctx.parent[name]
+                except KeyError:
+                    raise RuntimeError(f"variável não existe: {name}")
+            return value
+
+        return load_local
+
+    def load(ctx: Frame):
+        try:
+            return ctx.load(depth, slot, name)
+        except KeyError:
+            raise RuntimeError(f"variável não existe: {name}")
+
+    return load
+
+
+@compile_expr.register
+def _(expr: Assign):
+    name = expr.name
+    depth = expr.depth
+    slot = expr.slot
+    right = compile_expr(expr.right)
+
+    if depth < 0:
+
+        def store_global(ctx: Env):
+            value = right(ctx)
+            ctx.globals[name] = value
+            return value
+
+        return store_global
+
+    def store(ctx: Frame):
+        value = right(ctx)
+        ctx.store(depth, slot, name, value)
+        return value
+
+    return store
+
+
+@compile_expr.register
+def _(expr: Array):
+    items = [compile_expr(item) for item in expr.value]
+    return lambda ctx: LoxArray([item(ctx) for item in items])
+
+
+@compile_expr.register
+def _(expr: Index):
+    value = compile_expr(expr.value)
+    index = compile_expr(expr.index)
+
+    def get(ctx: Env):
+        array = value(ctx)
+        return get_index(array, index(ctx))
+
+    return get
+
+
+@compile_expr.register
+def _(expr: SetIndex):
+    value = compile_expr(expr.value)
+    index = compile_expr(expr.index)
+    right = compile_expr(expr.right)
+
+    def set(ctx: Env):
+        array = value(ctx)
+        position = index(ctx)
+        return set_index(array, position, right(ctx))
+
+    return set
+
+
+@compile_expr.register
+def _(expr: Slice):
+    value = compile_expr(expr.value)
+    start = compile_expr(expr.start) if expr.start is not None else None
+    end = compile_expr(expr.end) if expr.end is not None else None
+
+    def slice_(ctx: Env):
+        array = value(ctx)
+        return get_slice(
+            array,
+            None if start is None else start(ctx),
+            None if end is None else end(ctx),
+        )
+
+    return slice_
+
+
+@compile_expr.register
+def _(expr: Call):
+    args = [compile_expr(arg) for arg in expr.args]
+    site = expr.site
+
+    if site is not None:
+        # Função global: busca e verificação ficam no cache da chamada
+        def call_global(ctx: Env):
+            globals = ctx.globals
+            cache = globals.calls.get(site) or call_cache(globals, site)  # type: ignore
+            function = cache.lookup(globals)
+            argvalues = [arg(ctx) for arg in args]
+            if function is not cache.checked:
+                check_call(function, argvalues)
+                cache.checked = function
+            return function.call(ctx, argvalues)
+
+        return call_global
+
+    callee = compile_expr(expr.callee)
+
+    def call(ctx: Env):
+        function = callee(ctx)
+        argvalues = [arg(ctx) for arg in args]
+        if not isinstance(function, LoxCallable):
+            raise RuntimeError(f"{function} não é uma função.")
+        if len(argvalues) != function.n_args():
+            raise RuntimeError(f"{function}: número errado de argumentos.")
+        return function.call(ctx, argvalues)
+
+    return call
+
+
+#
+# Comandos
+#
+@compile_stmt.register
+def _(cmd: Program):
+    body = compile_body(cmd.body)
+
+    def program(ctx: Env):
+        if (completion := body(ctx)) is not None:
+            raise LoxReturn(completion.value)
+
+    return program
+
+
+@compile_stmt.register
+def _(cmd: Print):
+    right = compile_expr(cmd.right)
+    return lambda ctx: ctx.globals.output.print(right(ctx))
+
+
+@compile_stmt.register
+def _(cmd: ExprStmt):
+    expr = compile_expr(cmd.expr)
+
+    def expr_stmt(ctx: Env):
+        expr(ctx)
+
+    return expr_stmt
+
+
+@compile_stmt.register
+def _(cmd: Var):
+    name = cmd.name
+    slot = cmd.slot
+    right = compile_expr(cmd.right)
+    if slot < 0:
+        return lambda ctx: ctx.define(name, right(ctx))
+    return lambda ctx: ctx.define_slot(slot, name, right(ctx))
+
+
+@compile_stmt.register
+def _(cmd: Block):
+    body = compile_body(cmd.body)
+    scope = cmd.scope
+
+    if scope is None:
+        return body
+
+    if scope.captures:
+        return lambda ctx: body(Frame(ctx, scope))
+
+    def block(ctx: Env):
+        child_ctx = scope.acquire(ctx)
+        try:
+            return body(child_ctx)
+        finally:
+            scope.release(child_ctx)
+
+    return block
+
+
+@compile_stmt.register
+def _(cmd: If):
+    cond = compile_expr(cmd.cond)
+    then_body = compile_stmt(cmd.then_body)
+    else_body = compile_stmt(cmd.else_body)
+
+    def if_(ctx: Env):
+        if truthy(cond(ctx)):
+            return then_body(ctx)
+        else:
+            return else_body(ctx)
+
+    return if_
+
+
+@compile_stmt.register
+def _(cmd: While):
+    cond = compile_expr(cmd.cond)
+    body = compile_stmt(cmd.body)
+
+    if isinstance(cmd.cond, Literal) and truthy(cmd.cond.value):
+
+        def loop(ctx: Env):
+            tick = ctx.globals.budget.tick
+            while True:
+                if (completion := body(ctx)) is not None:
+                    return completion
+                tick()
+
+        return loop
+
+    def while_(ctx: Env):
+        tick = ctx.globals.budget.tick
+        while truthy(cond(ctx)):
+            if (completion := body(ctx)) is not None:
+                return completion
+            tick()
+
+    return while_
+
+
+@compile_stmt.register
+def _(cmd: Function):
+    body_code = compile_body(cmd.body)
+
+    def function(ctx: Env):
+        define(ctx, cmd.slot, cmd.name, CompiledFunction(cmd, ctx, body_code))
+
+    return function
+
+
+@compile_stmt.register
+def _(cmd: Return):
+    if cmd.value is None:
+
+        def return_nil(ctx: Env):
+            return Completion(None)
+
+        return return_nil
+
+    if cmd.tail:
+        return compile_tail_call(cmd.value)  # type: ignore
+
+    value = compile_expr(cmd.value)
+
+    def return_(ctx: Env):
+        return Completion(value(ctx))
+
+    return return_
+
+
+def compile_tail_call(expr: Call) -> StmtCode:
+    args = [compile_expr(arg) for arg in expr.args]
+    site = expr.site
+    callee = None if site is not None else compile_expr(expr.callee)
+
+    def tail_call(ctx: Env):
+        if site is None:
+            function = callee(ctx)  # type: ignore
+            argvalues = [arg(ctx) for arg in args]
+            check_call(function, argvalues)
+        else:
+            globals = ctx.globals
+            cache = globals.calls.get(site) or call_cache(globals, site)  # type: ignore
+            function = cache.lookup(globals)
+            argvalues = [arg(ctx) for arg in args]
+            if function is not cache.checked:
+                check_call(function, argvalues)
+                cache.checked = function
+        if type(function) is CompiledFunction:
+            return TailCall(function, argvalues)
+        return Completion(function.call(ctx, argvalues))
+
+    return tail_call
@@ -0,0 +1,328 @@
+"""
+Parser descendente recursivo escrito à mão.
+
+Reconhece a mesma linguagem de grammar.lark e produz exatamente a mesma AST
+que LoxTransformer, sem passar pela árvore intermediária do Lark. Classes,
+"this", "super" e acesso a atributos ainda não são suportados e geram
+LoxSyntaxError.
+"""
+
+from .ast import Assign, Binary, Call, Expr, ExprStmt, Identifier, Literal, LogicAnd, LogicOr, Unary
+from .ast import Array, Index, SetIndex, Slice
+from .ast import Block, Function, If, Print, Program, Return, Stmt, Var, While
+from .scanner import LoxSyntaxError, tokenize
+from .token import Token, TokenType as T
+
+EQUALITY = {T.BANG_EQUAL, T.EQUAL_EQUAL}
+COMPARISON = {T.GREATER, T.GREATER_EQUAL, T.LESS, T.LESS_EQUAL}
+TERM = {T.MINUS, T.PLUS}
+FACTOR = {T.SLASH, T.STAR}
+UNARY = {T.BANG, T.MINUS}
+
+LITERALS = {T.TRUE: True, T.FALSE: False, T.NIL: None}
+
+
+def parse(src: str, lines: bool = False, first_line: int = 1) -> Program:
+    """
+    Converte o código fonte em um Program.
+
+    Com lines=True, cada comando recebe a linha em que começa no atributo
+    `line`. first_line é o número da primeira linha de src.
+    """
+    return Parser(tokenize(src, first_line), lines).program()
+
+
+class Parser:
+    def __init__(self, tokens: list[Token], lines: bool = False):
+        self.tokens = tokens
+        self.types = [token.type for token in tokens]
+        self.pos = 0
+        self.lines = lines
+
+        # Posição logo após o último `[...]` de acesso a índice, usada para
+        # validar alvos de atribuição como a[i] = x
+        self.index_end = -1
+
+    #
+    # Auxiliares
+    #
+    def advance(self) -> Token:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def match(self, type: T) -> bool:
+        if self.types[self.pos] is type:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, type: T, what: str) -> Token:
+        if self.types[self.pos] is not type:
+            raise self.error(what)
+        return self.advance()
+
+    def error(self, what: str) -> LoxSyntaxError:
+        token = self.tokens[self.pos]
+        if token.type is T.EOF:
+            found = "fim do arquivo"
+        elif token.type is T.UNTERMINATED_STRING:
+            found = "string não terminada"
+        else:
+            found = repr(token.lexeme)
+        return LoxSyntaxError(f"linha {token.line}: esperado {what}, encontrado {found}")
+
+    def mark[S: Stmt](self, stmt: S, line: int) -> S:
+        if self.lines:
+            stmt.line = line
+        return stmt
+
+    def unsupported(self, what: str) -> LoxSyntaxError:
+        token = self.tokens[self.pos]
+        return LoxSyntaxError(f"linha {token.line}: {what} ainda não são suportados")
+
+    #
+    # Stmt
+    #
+    def program(self) -> Program:
+        body = []
+        while self.types[self.pos] is not T.EOF:
+            body.append(self.declaration())
+        return Program(body)
+
+    def declaration(self) -> Stmt:
+        type = self.types[self.pos]
+        if type is T.VAR:
+            line = self.advance().line
+            return self.mark(self.var_decl(), line)
+        if type is T.FUN:
+            line = self.advance().line
+            return self.mark(self.function(), line)
+        if type is T.CLASS:
+            raise self.unsupported("classes")
+        return self.statement()
+
+    def var_decl(self) -> Var:
+        name = self.expect(T.IDENTIFIER, "nome da variável").lexeme
+        initializer = self.expression() if self.match(T.EQUAL) else Literal(None)
+        self.expect(T.SEMICOLON, "';'")
+        return Var(name, initializer)
+
+    def function(self) -> Function:
+        name = self.expect(T.IDENTIFIER, "nome da função").lexeme
+        self.expect(T.LEFT_PAREN, "'('")
+        params = []
+        if self.types[self.pos] is not T.RIGHT_PAREN:
+            params.append(self.expect(T.IDENTIFIER, "nome do parâmetro").lexeme)
+            while self.match(T.COMMA):
+                params.append(self.expect(T.IDENTIFIER, "nome do parâmetro").lexeme)
+        self.expect(T.RIGHT_PAREN, "')'")
+        self.expect(T.LEFT_BRACE, "'{'")
+        return Function(name, params, self.block_body())
+
+    def statement(self) -> Stmt:
+        if self.lines:
+            line = self.tokens[self.pos].line
+            return self.mark(self.simple_statement(), line)
+        return self.simple_statement()
+
+    def simple_statement(self) -> Stmt:
+        type = self.types[self.pos]
+        if type is T.PRINT:
+            self.pos += 1
+            expr = self.expression()
+            self.expect(T.SEMICOLON, "';'")
+            return Print(expr)
+        if type is T.LEFT_BRACE:
+            self.pos += 1
+            return Block(self.block_body())
+        if type is T.IF:
+            return self.if_stmt()
+        if type is T.WHILE:
+            self.pos += 1
+            self.expect(T.LEFT_PAREN, "'('")
+            cond = self.expression()
+            self.expect(T.RIGHT_PAREN, "')'")
+            return While(cond, self.statement())
+        if type is T.FOR:
+            return self.for_stmt()
+        if type is T.RETURN:
+            self.pos += 1
+            value = None if self.types[self.pos] is T.SEMICOLON else self.expression()
+            self.expect(T.SEMICOLON, "';'")
+            return Return(value)
+        return self.expr_stmt()
+
+    def expr_stmt(self) -> ExprStmt:
+        expr = self.expression()
+        self.expect(T.SEMICOLON, "';'")
+        return ExprStmt(expr)
+
+    def block_body(self) -> list[Stmt]:
+        body = []
+        while not self.match(T.RIGHT_BRACE):
+            if self.types[self.pos] is T.EOF:
+                raise self.error("'}'")
+            body.append(self.declaration())
+        return body
+
+    def if_stmt(self) -> If:
+        self.pos += 1
+        self.expect(T.LEFT_PAREN, "'('")
+        cond = self.expression()
+        self.expect(T.RIGHT_PAREN, "')'")
+        then = self.statement()
+        else_ = self.statement() if self.match(T.ELSE) else Block([])  # lox: else {}
+        return If(cond, then, else_)
+
+    def for_stmt(self) -> Stmt:
+        line = self.advance().line
+        self.expect(T.LEFT_PAREN, "'('")
+
+        if self.match(T.SEMICOLON):
+            init = None
+        elif self.match(T.VAR):
+            init = self.mark(self.var_decl(), line)
+        else:
+            init = self.mark(self.expr_stmt(), line)
+
+        cond = None if self.types[self.pos] is T.SEMICOLON else self.expression()
+        self.expect(T.SEMICOLON, "';'")
+        incr = None if self.types[self.pos] is T.RIGHT_PAREN else self.expression()
+        self.expect(T.RIGHT_PAREN, "')'")
+
+        # Mesma expansão de LoxTransformer.for_stmt
+        body = self.statement()
+        if incr is not None:
+            body = Block([body, self.mark(ExprStmt(incr), line)])
+        body = self.mark(While(cond or Literal(True), body), line)
+        if init is not None:
+            body = Block([init, body])
+        return body
+
+    #
+    # Expr
+    #
+    def expression(self) -> Expr:
+        start = self.pos
+        expr = self.logic_or()
+
+        if self.types[self.pos] is T.EQUAL:
+            # O alvo da atribuição deve ser um único identificador ou um
+            # acesso a índice, sem parênteses em volta, como na gramática
+            if type(expr) is Index and self.index_end == self.pos:
+                self.pos += 1
+                return SetIndex(expr.value, expr.index, self.expression())
+            if self.pos != start + 1 or self.types[start] is not T.IDENTIFIER:
+                raise self.error("';'")
+            self.pos += 1
+            return Assign(expr.name, self.expression())
+        return expr
+
+    def logic_or(self) -> Expr:
+        expr = self.logic_and()
+        while self.match(T.OR):
+            expr = LogicOr(expr, self.logic_and())
+        return expr
+
+    def logic_and(self) -> Expr:
+        expr = self.equality()
+        while self.match(T.AND):
+            expr = LogicAnd(expr, self.equality())
+        return expr
+
+    def equality(self) -> Expr:
+        expr = self.comparison()
+        while self.types[self.pos] in EQUALITY:
+            op = self.advance()
+            expr = Binary(expr, op, self.comparison())
+        return expr
+
+    def comparison(self) -> Expr:
+        expr = self.term()
+        while self.types[self.pos] in COMPARISON:
+            op = self.advance()
+            expr = Binary(expr, op, self.term())
+        return expr
+
+    def term(self) -> Expr:
+        expr = self.factor()
+        while self.types[self.pos] in TERM:
+            op = self.advance()
+            expr = Binary(expr, op, self.factor())
+        return expr
+
+    def factor(self) -> Expr:
+        expr = self.unary()
+        while self.types[self.pos] in FACTOR:
+            op = self.advance()
+            expr = Binary(expr, op, self.unary())
+        return expr
+
+    def unary(self) -> Expr:
+        if self.types[self.pos] in UNARY:
+            op = self.advance()
+            return Unary(op, self.unary())
+        return self.call()
+
+    def call(self) -> Expr:
+        expr = self.primary()
+        while True:
+            if self.match(T.LEFT_PAREN):
+                args = []
+                if self.types[self.pos] is not T.RIGHT_PAREN:
+                    args.append(self.expression())
+                    while self.match(T.COMMA):
+                        args.append(self.expression())
+                self.expect(T.RIGHT_PAREN, "')'")
+                expr = Call(expr, args)
+            elif self.match(T.LEFT_BRACKET):
+                expr = self.index(expr)
+            elif self.types[self.pos] is T.DOT:
+                raise self.unsupported("atributos")
+            else:
+                return expr
+
+    def index(self, value: Expr) -> Expr:
+        start = None
+        if self.types[self.pos] is not T.COLON:
+            start = self.expression()
+            if self.match(T.RIGHT_BRACKET):
+                self.index_end = self.pos
+                return Index(value, start)
+        self.expect(T.COLON, "':' ou ']'")
+        end = None
+        if self.types[self.pos] is not T.RIGHT_BRACKET:
+            end = self.expression()
+        self.expect(T.RIGHT_BRACKET, "']'")
+        return Slice(value, start, end)
+
+    def primary(self) -> Expr:
+        token = self.tokens[self.pos]
+        type = token.type
+        if type is T.NUMBER or type is T.STRING or type is T.DATE:
+            self.pos += 1
+            return Literal(token.literal)
+        if type is T.IDENTIFIER:
+            self.pos += 1
+            return Identifier(token.lexeme)
+        if type in LITERALS:
+            self.pos += 1
+            return Literal(LITERALS[type])
+        if type is T.LEFT_PAREN:
+            self.pos += 1
+            expr = self.expression()
+            self.expect(T.RIGHT_PAREN, "')'")
+            return expr
+        if type is T.LEFT_BRACKET:
+            self.pos += 1
+            items = []
+            if self.types[self.pos] is not T.RIGHT_BRACKET:
+                items.append(self.expression())
+                while self.match(T.COMMA):
+                    items.append(self.expression())
+            self.expect(T.RIGHT_BRACKET, "']'")
+            return Array(items)
+        if type is T.THIS or type is T.SUPER:
+            raise self.unsupported("'this' e 'super'")
+        raise self.error("expressão")
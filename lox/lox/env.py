@@ -1,15 +1,62 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from reprlib import recursive_repr
+from typing import TYPE_CHECKING
 
 from .ast import Value
+from .runtime import LoxCallable
 
+if TYPE_CHECKING:
+    from .budget import Budget
+    from .callsite import CallCache, CallSite
+    from .output import Output
+    from .profiler import Profiler
 
-@dataclass
+
+class Unset:
+    """
+    Marca uma posição de um Frame cuja variável ainda não foi declarada.
+    """
+
+    def __repr__(self):
+        return "UNSET"
+
+
+UNSET = Unset()
+
+
+@dataclass(slots=True)
 class Env:
     parent: Env | None = None
     values: dict[str, Value] = field(default_factory=dict)
 
+    # Muda quando uma função é substituída ou um nome é definido, invalidando
+    # os caches de chamadas (lox.callsite)
+    version: int = field(default=0, compare=False, repr=False)
+
+    # Destino dos comandos print (lox.output); só o Env global de uma
+    # instância de Lox tem um
+    output: Output | None = field(default=None, compare=False, repr=False)
+
+    # Limites de passos e de tempo da execução (lox.budget); só o Env global
+    # de uma instância de Lox tem um
+    budget: Budget | None = field(default=None, compare=False, repr=False)
+
+    # Profiler da instância de Lox (lox.profiler), que mede as chamadas
+    # feitas pela engine tree; só o Env global pode ter um
+    profiler: Profiler | None = field(default=None, compare=False, repr=False)
+
+    # Estado de execução da instância, fora da AST compilada: os caches de
+    # cada chamada a uma função global (lox.callsite) e os Frames livres de
+    # cada Scope. Só o Env global de uma instância de Lox tem essas tabelas
+    calls: dict[CallSite, CallCache] | None = field(default=None, compare=False, repr=False)
+    free: dict[Scope, list[Frame]] | None = field(default=None, compare=False, repr=False)
+
+    @property
+    def globals(self) -> Env:
+        return self
+
     def __getitem__(self, key: str) -> Value:
         try:
             return self.values[key]
@@ -19,10 +66,16 @@ class Env:
             return self.parent[key]
 
     def __setitem__(self, key: str, value: Value):
-        if key in self.values:
-            self.values[key] = value
+        values = self.values
+        if key in values:
+            if isinstance(values[key], LoxCallable):
+                self.version += 1
+            values[key] = value
         elif self.parent is not None:
+            # Variável de um escopo externo (no Env global, uma função
+            # nativa): os caches de chamadas só consultam a versão deste Env
             self.parent[key] = value
+            self.version += 1
         else:
             raise KeyError(key)
 
@@ -30,6 +83,135 @@ class Env:
         if key in self.values:
             raise RuntimeError(f"redefinindo variável {key}.")
         self.values[key] = value
+        self.version += 1
 
     def new_scope(self):
-        return Env(self)
\ No newline at end of file
+        return Env(self)
+
+
+@dataclass(eq=False)
+class Scope:
+    """
+    Descrição estática de um escopo local calculada pelo resolvedor.
+
+    Cada nome declarado no escopo recebe uma posição fixa (slot) no Frame
+    correspondente. O Scope não muda depois da resolução: os Frames livres
+    ficam na tabela `free` do Env global de cada instância de Lox.
+    """
+
+    names: list[str] = field(default_factory=list)
+    index: dict[str, int] = field(default_factory=dict)
+
+    # Verdadeiro se alguma função declarada dentro do escopo pode capturá-lo
+    captures: bool = False
+
+    # Verdadeiro para o escopo do corpo de uma função
+    function: bool = False
+
+    # Valores iniciais das posições
+    blank: tuple[Value, ...] = field(default=(), repr=False)
+
+    def declare(self, name: str) -> int:
+        try:
+            return self.index[name]
+        except KeyError:
+            slot = self.index[name] = len(self.names)
+            self.names.append(name)
+            self.blank = (UNSET,) * len(self.names)
+            return slot
+
+    def acquire(self, parent: Frame | Env) -> Frame:
+        """
+        Retorna um Frame para uma nova ativação do escopo.
+
+        Escopos que não são capturados por closures reaproveitam os Frames
+        de ativações já encerradas, devolvidos por release().
+        """
+        if self.captures:
+            return Frame(parent, self)
+        globals = parent.globals
+        try:
+            frame = globals.free[self].pop()  # type: ignore
+        except (KeyError, IndexError):
+            return Frame(parent, self)
+        frame.parent = parent
+        frame.globals = globals
+        return frame
+
+    def release(self, frame: Frame):
+        if not self.captures:
+            frame.slots[:] = self.blank
+            frame.parent = None  # type: ignore
+            free = frame.globals.free
+            try:
+                free[self].append(frame)  # type: ignore
+            except KeyError:
+                free[self] = [frame]  # type: ignore
+
+
+class Frame:
+    """
+    Escopo local com variáveis armazenadas em posições fixas.
+
+    Acessos resolvidos usam o par (depth, slot) calculado pelo resolvedor.
+    Uma posição UNSET indica que a variável ainda não foi declarada neste
+    escopo: nesse caso a busca continua pelo nome nos escopos externos, do
+    mesmo modo que o Env.
+    """
+
+    __slots__ = ("parent", "scope", "slots", "globals")
+
+    def __init__(self, parent: Frame | Env, scope: Scope):
+        self.parent = parent
+        self.scope = scope
+        self.slots: list[Value] = list(scope.blank)
+        self.globals: Env = parent.globals
+
+    @recursive_repr()
+    def __repr__(self):
+        values = {name: self.slots[i] for name, i in self.scope.index.items()}
+        return f"Frame(parent={self.parent!r}, values={values!r})"
+
+    def ancestor(self, depth: int) -> Frame:
+        frame = self
+        for _ in range(depth):
+            frame = frame.parent  # type: ignore
+        return frame
+
+    def load(self, depth: int, slot: int, key: str) -> Value:
+        frame = self.ancestor(depth)
+        value = frame.slots[slot]
+        if value is UNSET:
+            return frame.parent[key]
+        return value
+
+    def store(self, depth: int, slot: int, key: str, value: Value):
+        frame = self.ancestor(depth)
+        if frame.slots[slot] is UNSET:
+            frame.parent[key] = value
+        else:
+            frame.slots[slot] = value
+
+    def define_slot(self, slot: int, key: str, value: Value):
+        if self.slots[slot] is not UNSET:
+            raise RuntimeError(f"redefinindo variável {key}.")
+        self.slots[slot] = value
+
+    def __getitem__(self, key: str) -> Value:
+        slot = self.scope.index.get(key)
+        if slot is None or self.slots[slot] is UNSET:
+            return self.parent[key]
+        return self.slots[slot]
+
+    def __setitem__(self, key: str, value: Value):
+        slot = self.scope.index.get(key)
+        if slot is None or self.slots[slot] is UNSET:
+            self.parent[key] = value
+        else:
+            self.slots[slot] = value
+
+    def define(self, key: str, value: Value):
+        slot = self.scope.index.get(key)
+        if slot is None:
+            raise RuntimeError(f"variável {key} não pertence ao escopo.")
+        self.define_slot(slot, key, value)
@@ -1,6 +1,7 @@
 from functools import singledispatch
 
 from .ast import (
+    Array,
     Assign,
     Binary,
     Block,
@@ -11,21 +12,25 @@ from .ast import (
     Grouping,
     Identifier,
     If,
+    Index,
     Literal,
     LogicAnd,
     LogicOr,
     Print,
     Program,
     Return,
+    SetIndex,
+    Slice,
     Stmt,
     Unary,
     Value,
     Var,
     While,
 )
+from .callsite import call_cache
 from .env import Env
-from .runtime import LoxCallable, LoxFunction
-from .token import Token, TokenType
+from .runtime import LoxArray, LoxCallable, LoxFunction, get_index, get_slice, set_index
+from .token import TokenType
 
 
 class LoxReturn(Exception):
@@ -33,13 +38,45 @@ class LoxReturn(Exception):
         self.value = value
 
 
+class Completion:
+    """
+    Resultado de um comando `return`.
+
+    Comandos retornam None quando terminam normalmente e uma Completion quando
+    um `return` interrompe a função atual. Blocos e laços repassam a Completion
+    adiante até LoxFunction.call, sem lançar exceções.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Value):
+        self.value = value
+
+
+class TailCall(Completion):
+    """
+    Chamada em posição de cauda (`return f(...)`).
+
+    Em vez de chamar f e aumentar a pilha do Python, o comando return devolve
+    a chamada pendente e LoxFunction.call a executa no seu próprio laço,
+    reaproveitando o Frame liberado pela função atual.
+    """
+
+    __slots__ = ("function", "args")
+
+    def __init__(self, function: LoxFunction, args: list[Value]):
+        self.value = None
+        self.function = function
+        self.args = args
+
+
 @singledispatch
 def eval(expr: Expr, ctx: Env) -> Value:
     raise TypeError(f"[eval] tipo não suportado: {type(expr)}")
 
 
 @singledispatch
-def exec(expr: Stmt, ctx: Env) -> Value:
+def exec(expr: Stmt, ctx: Env) -> Completion | None:
     raise TypeError(f"[exec] tipo não suportado: {type(expr)}")
 
 
@@ -58,7 +95,7 @@ def _(expr: Unary, ctx: Env):
     right = eval(expr.right, ctx)
     match expr.operator.type:
         case TokenType.MINUS:
-            if isinstance(right, float):
+            if isinstance(right, float) or type(right) is int:
                 return -right
             raise RuntimeError(f"operação inválida: -{right}")
         case TokenType.BANG:
@@ -71,78 +108,33 @@ def _(expr: Unary, ctx: Env):
 def _(expr: Binary, ctx: Env):
     left = eval(expr.left, ctx)
     right = eval(expr.right, ctx)
-
-    match expr.operator.type:
-        # Operações matemáticas
-        case TokenType.PLUS:
-            if isinstance(left, float) and isinstance(right, float):
-                return left + right
-            elif isinstance(left, str) and isinstance(right, str):
-                return left + right
-            raise RuntimeError(f"operação inválida: {left} + {right}")
-        case TokenType.MINUS:
-            assure_floats(left, right, expr.operator)
-            return left - right  # type: ignore
-        case TokenType.STAR:
-            assure_floats(left, right, expr.operator)
-            return left * right  # type: ignore
-        case TokenType.SLASH:
-            assure_floats(left, right, expr.operator)
-            return left / right  # type: ignore
-
-        # Comparações
-        case TokenType.EQUAL_EQUAL:
-            if type(left) != type(right):  # noqa
-                return False
-            return left == right
-        case TokenType.BANG_EQUAL:
-            if type(left) != type(right):  # noqa
-                return True
-            return left != right
-        case TokenType.GREATER_EQUAL:
-            assure_floats(left, right, expr.operator)
-            return left >= right  # type: ignore
-        case TokenType.GREATER:
-            assure_floats(left, right, expr.operator)
-            return left > right  # type: ignore
-        case TokenType.LESS:
-            assure_floats(left, right, expr.operator)
-            return left < right  # type: ignore
-        case TokenType.LESS_EQUAL:
-            assure_floats(left, right, expr.operator)
-            return left <= right  # type: ignore
-
-        case token:
-            raise RuntimeError(f"operação binaria inválida {token}")
-
-
-def assure_floats(x, y, op: Token):
-    if not isinstance(x, float) and not isinstance(y, float):
-        raise RuntimeError(f"operação inválida: {op.lexeme}")
+    return expr.apply(left, right, expr.operator)
 
 
 @eval.register
 def _(expr: LogicAnd, ctx: Env):
+    # O lado direito só é avaliado se o esquerdo for verdadeiro
     left = eval(expr.left, ctx)
-    right = eval(expr.right, ctx)
     if not truthy(left):
         return left
-    return right
+    return eval(expr.right, ctx)
 
 
 @eval.register
 def _(expr: LogicOr, ctx: Env):
+    # O lado direito só é avaliado se o esquerdo for falso
     left = eval(expr.left, ctx)
-    right = eval(expr.right, ctx)
     if truthy(left):
         return left
-    return right
+    return eval(expr.right, ctx)
 
 
 @eval.register
 def _(expr: Identifier, ctx: Env):
     try:
-        return ctx[expr.name]
+        if expr.depth < 0:
+            return ctx.globals[expr.name]
+        return ctx.load(expr.depth, expr.slot, expr.name)
     except KeyError:
         raise RuntimeError(f"variável não existe: {expr.name}")
 
@@ -150,19 +142,75 @@ def _(expr: Identifier, ctx: Env):
 @eval.register
 def _(expr: Assign, ctx: Env) -> Value:
     value = eval(expr.right, ctx)
-    ctx[expr.name] = value
+    if expr.depth < 0:
+        ctx.globals[expr.name] = value
+    else:
+        ctx.store(expr.depth, expr.slot, expr.name, value)
     return value
 
 
+@eval.register
+def _(expr: Array, ctx: Env) -> Value:
+    return LoxArray([eval(item, ctx) for item in expr.value])
+
+
+@eval.register
+def _(expr: Index, ctx: Env) -> Value:
+    value = eval(expr.value, ctx)
+    return get_index(value, eval(expr.index, ctx))
+
+
+@eval.register
+def _(expr: SetIndex, ctx: Env) -> Value:
+    value = eval(expr.value, ctx)
+    index = eval(expr.index, ctx)
+    return set_index(value, index, eval(expr.right, ctx))
+
+
+@eval.register
+def _(expr: Slice, ctx: Env) -> Value:
+    value = eval(expr.value, ctx)
+    start = None if expr.start is None else eval(expr.start, ctx)
+    end = None if expr.end is None else eval(expr.end, ctx)
+    return get_slice(value, start, end)
+
+
 @eval.register
 def _(expr: Call, ctx: Env) -> Value:
-    callee = eval(expr.callee, ctx)
+    callee, args = prepare_call(expr, ctx)
+    profiler = ctx.globals.profiler
+    if profiler is not None:
+        return profiler.call(callee, ctx, args)
+    return callee.call(ctx, args)
+
+
+def prepare_call(expr: Call, ctx: Env) -> tuple[LoxCallable, list[Value]]:
+    """
+    Avalia a função e os argumentos de uma chamada e verifica a aridade.
+    """
+    site = expr.site
+    if site is None:
+        callee = eval(expr.callee, ctx)
+        args = [eval(arg, ctx) for arg in expr.args]
+        check_call(callee, args)
+        return callee, args  # type: ignore
+
+    # Função global: busca e verificação ficam no cache da chamada
+    globals = ctx.globals
+    cache = globals.calls.get(site) or call_cache(globals, site)  # type: ignore
+    callee = cache.lookup(globals)
     args = [eval(arg, ctx) for arg in expr.args]
+    if callee is not cache.checked:
+        check_call(callee, args)
+        cache.checked = callee
+    return callee, args  # type: ignore
+
+
+def check_call(callee: Value, args: list[Value]):
     if not isinstance(callee, LoxCallable):
         raise RuntimeError(f"{callee} não é uma função.")
     if len(args) != callee.n_args():
         raise RuntimeError(f"{callee}: número errado de argumentos.")
-    return callee.call(ctx, args)
 
 
 #
@@ -171,12 +219,13 @@ def _(expr: Call, ctx: Env) -> Value:
 @exec.register
 def _(cmd: Program, ctx: Env):
     for stmt in cmd.body:
-        exec(stmt, ctx)
+        if (completion := exec(stmt, ctx)) is not None:
+            raise LoxReturn(completion.value)
 
 
 @exec.register
 def _(cmd: Print, ctx: Env):
-    print(eval(cmd.right, ctx))
+    ctx.globals.output.print(eval(cmd.right, ctx))
 
 
 @exec.register
@@ -187,43 +236,80 @@ def _(cmd: ExprStmt, ctx: Env):
 @exec.register
 def _(cmd: Var, ctx: Env):
     value = eval(cmd.right, ctx)
-    ctx.define(cmd.name, value)
+    define(ctx, cmd.slot, cmd.name, value)
 
 
 @exec.register
 def _(cmd: Block, ctx: Env):
-    child_ctx = Env(ctx)
-    for stmt in cmd.body:
-        exec(stmt, child_ctx)
+    scope = cmd.scope
+    if scope is None:
+        return exec_body(cmd.body, ctx)
+
+    child_ctx = scope.acquire(ctx)
+    try:
+        return exec_body(cmd.body, child_ctx)
+    finally:
+        scope.release(child_ctx)
 
 
 @exec.register
 def _(cmd: If, ctx: Env):
     if truthy(eval(cmd.cond, ctx)):
-        exec(cmd.then_body, ctx)
+        return exec(cmd.then_body, ctx)
     else:
-        exec(cmd.else_body, ctx)
+        return exec(cmd.else_body, ctx)
 
 
 @exec.register
 def _(cmd: While, ctx: Env):
+    tick = ctx.globals.budget.tick
+
+    # Condição constante, como em for (;;): não precisa ser avaliada
+    if isinstance(cmd.cond, Literal) and truthy(cmd.cond.value):
+        while True:
+            if (completion := exec(cmd.body, ctx)) is not None:
+                return completion
+            tick()
+
     while truthy(eval(cmd.cond, ctx)):
-        exec(cmd.body, ctx)
+        if (completion := exec(cmd.body, ctx)) is not None:
+            return completion
+        tick()
 
 
 @exec.register
 def _(cmd: Function, ctx: Env):
     function = LoxFunction(cmd, ctx)
-    ctx.define(cmd.name, function)
+    define(ctx, cmd.slot, cmd.name, function)
 
 
 @exec.register
 def _(cmd: Return, ctx: Env):
+    if cmd.tail:
+        callee, args = prepare_call(cmd.value, ctx)  # type: ignore
+        if type(callee) is LoxFunction:
+            return TailCall(callee, args)
+        return Completion(callee.call(ctx, args))
+
     if cmd.value is not None:
         value = eval(cmd.value, ctx)
     else:
         value = None
-    raise LoxReturn(value)
+    return Completion(value)
+
+
+def exec_body(body: list[Stmt], ctx: Env) -> Completion | None:
+    for stmt in body:
+        if (completion := exec(stmt, ctx)) is not None:
+            return completion
+    return None
+
+
+def define(ctx: Env, slot: int, name: str, value: Value):
+    if slot < 0:
+        ctx.define(name, value)
+    else:
+        ctx.define_slot(slot, name, value)
 
 
 def truthy(obj) -> bool:
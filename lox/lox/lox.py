@@ -1,9 +1,20 @@
+import argparse
+import asyncio
 import os
 import sys
-import time
-from typing import TYPE_CHECKING
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Iterable, NamedTuple, TextIO
 
+from . import bytecode, closures, trampoline, vm
+from .budget import Budget
+from .ast import Program
+from .cache import ProgramCache, digest
 from .env import Env
+from .optimizer import optimize
+from .output import Output, StreamOutput
+from .profiler import SORT_KEYS, Profiler
+from .resolver import resolve
+from .scanner import declarations
 
 try:
     assert os.environ.get("ANSWER_KEY", "").lower() == "1"
@@ -22,25 +33,87 @@ else:
     from .parser import parse
 
 
-def main():
-    if len(sys.argv) == 1:
-        return repl()
-    elif len(sys.argv) == 2:
-        return run_file(sys.argv[1])
-    else:
-        exit("Uso: pylox [ NOME DO ARQUIVO ]")
+DEFAULT_ENGINE = os.environ.get("LOX_ENGINE", "tree")
+DEFAULT_CACHE_SIZE = int(os.environ.get("LOX_CACHE_SIZE", "128"))
+DEFAULT_OPTIMIZE = os.environ.get("LOX_OPTIMIZE", "1") == "1"
+DEFAULT_OUTPUT_BATCH = int(os.environ.get("LOX_OUTPUT_BATCH", "1"))
+DEFAULT_YIELD_EVERY = int(os.environ.get("LOX_YIELD_EVERY", "4096"))
 
+# Número de entradas a partir do qual Lox.trim descarta as tabelas de estado
+# de execução do Env global
+MAX_STATE = 4096
 
-def run_file(path: str):
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["batch"]:
+        from . import batch
+
+        return batch.main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="pylox")
+    parser.add_argument("path", nargs="?", metavar="NOME DO ARQUIVO")
+    parser.add_argument(
+        "--engine",
+        choices=sorted(ENGINES),
+        default=DEFAULT_ENGINE,
+        help="mecanismo de execução (padrão: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="mede chamadas de função e linhas executadas (apenas engine tree)",
+    )
+    parser.add_argument(
+        "--profile-sort",
+        choices=sorted(SORT_KEYS),
+        default="cumtime",
+        help="ordenação do relatório do profiler (padrão: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="ARQUIVO",
+        help="salva as estatísticas do profiler em JSON",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="lê e executa o arquivo uma declaração de cada vez",
+    )
+    args = parser.parse_args(argv)
+
+    if args.profile and args.engine != "tree":
+        parser.error("--profile só é suportado com --engine=tree")
+    if args.path is None:
+        return repl(args.engine)
+    if not args.profile:
+        return run_file(args.path, args.engine, stream=args.stream)
+
+    profiler = Profiler()
+    try:
+        run_file(args.path, args.engine, profiler, args.stream)
+    finally:
+        profiler.print_stats(args.profile_sort)
+        if args.profile_json:
+            profiler.dump(args.profile_json)
+
+
+def run_file(
+    path: str,
+    engine: str | None = None,
+    profiler: Profiler | None = None,
+    stream: bool = False,
+):
+    lox = Lox(engine, profiler=profiler)
     with open(path) as f:
+        if stream:
+            return lox.run_stream(f)
         source = f.read()
-
-    lox = Lox()
     lox.run(source)
 
 
-def repl():
-    lox = Lox()
+def repl(engine: str | None = None):
+    lox = Lox(engine)
 
     while True:
         try:
@@ -56,16 +129,193 @@ def repl():
 
 
 class Lox:
-    def __init__(self):
-        from lox.runtime import NativeFunction
+    """
+    Interpretador com variáveis globais, saída e limites próprios.
 
-        self.ctx = Env()
-        self.ctx.define("clock", NativeFunction(time.time, 0))
+    Instâncias diferentes podem executar ao mesmo tempo em threads
+    diferentes sem compartilhar estado. Execuções na mesma instância são
+    serializadas.
+    """
+
+    def __init__(
+        self,
+        engine: str | None = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        optimize: bool = DEFAULT_OPTIMIZE,
+        profiler: Profiler | None = None,
+        stdout: TextIO | None = None,
+        output: Output | None = None,
+        max_steps: int | None = None,
+        timeout: float | None = None,
+        max_depth: int | None = None,
+    ):
+        from lox.runtime import NATIVES
+
+        engine = engine or DEFAULT_ENGINE
+        if engine not in ENGINES:
+            raise ValueError(f"engine inválida: {engine!r}")
+        if profiler is not None and engine != "tree":
+            raise ValueError("o profiler só é suportado pela engine tree")
+        if max_depth is not None and engine not in ("stack", "vm"):
+            raise ValueError("max_depth só é suportado pelas engines stack e vm")
+        self.engine = engine
+        self.optimize = optimize
+        self.profiler = profiler
+        self.cache = ProgramCache(cache_size)
+        self.budget = Budget(max_steps, timeout, max_depth)
+        if output is None:
+            output = StreamOutput(stdout, DEFAULT_OUTPUT_BATCH)
+        self.output = output
+        # As funções nativas ficam em um escopo acima das variáveis globais,
+        # de modo que um programa pode declarar uma global com o mesmo nome
+        builtins = Env(values=dict(NATIVES))
+        self.ctx = Env(
+            builtins,
+            output=output,
+            budget=self.budget,
+            profiler=profiler,
+            calls={},
+            free={},
+        )
+        self.lock = threading.RLock()
 
     def run(self, src: str):
-        ast = parse(src)
-        exec(ast, self.ctx)
+        with self.lock:
+            code = self.load(src)
+            self.budget.start()
+            self.execute(code)
+
+    def load(self, src: str) -> Any:
+        """
+        Código compilado de src, do cache de programas quando possível.
+        """
+        key = digest(src)
+        code = self.cache.get(key)
+        if code is None:
+            code = self.compile(src)
+            self.cache.put(key, code)
+        return code
+
+    def run_stream(self, lines: Iterable[str]):
+        """
+        Executa o código à medida que ele é lido.
+
+        Cada declaração de nível superior é analisada, compilada e executada
+        antes de a próxima ser lida, de modo que a memória usada cresce com a
+        maior declaração e não com o tamanho do arquivo. Erros de sintaxe só
+        são encontrados quando a leitura chega à declaração que os contém,
+        depois de as anteriores terem executado. As declarações não passam
+        pelo cache de programas.
+        """
+        with self.lock:
+            self.budget.start()
+            for line, src in declarations(lines):
+                self.execute(self.compile(src, line))
+
+    def cancel(self):
+        """
+        Interrompe com LoxTimeout a execução em andamento (ou a próxima).
+
+        Pode ser chamado de outra thread.
+        """
+        self.budget.cancel()
+
+    def compile(self, src: str, first_line: int = 1) -> Any:
+        # O profiler precisa da linha de cada comando
+        if self.profiler or first_line != 1:
+            ast = parse(src, lines=self.profiler is not None, first_line=first_line)
+        else:
+            ast = parse(src)
+        if self.optimize:
+            ast = optimize(ast)
+        return ENGINES[self.engine].compile(resolve(ast))
+
+    def execute(self, code: Any):
+        engine = ENGINES[self.engine]
+        try:
+            if self.profiler is None:
+                engine.execute(code, self.ctx)
+            else:
+                self.profiler.execute(code, self.ctx)
+        finally:
+            self.output.flush()
+            self.trim()
+
+    def trim(self):
+        """
+        Descarta os caches de chamadas e os Frames livres guardados no Env
+        global quando as tabelas passam de MAX_STATE entradas, o que acontece
+        depois de muitos programas diferentes (no REPL, por exemplo). Elas são
+        apenas caches e voltam a ser preenchidas nas próximas execuções.
+        """
+        ctx = self.ctx
+        if len(ctx.calls) > MAX_STATE or len(ctx.free) > MAX_STATE:  # type: ignore
+            ctx.calls.clear()  # type: ignore
+            ctx.free.clear()  # type: ignore
+
+
+class AsyncLox(Lox):
+    """
+    Interpretador para programas executados em um laço de eventos asyncio.
+
+    Usa sempre a engine stack. run() é uma corrotina que devolve o controle
+    ao laço a cada `yield_every` passos do interpretador, de modo que vários
+    programas (e outras tarefas) se alternam no mesmo laço. Quando uma função
+    nativa retorna um awaitable, como uma corrotina, o programa é suspenso até
+    o resultado ficar pronto e o resultado é usado como valor da chamada.
+    """
+
+    def __init__(self, yield_every: int = DEFAULT_YIELD_EVERY, **kwargs):
+        engine = kwargs.pop("engine", None) or "stack"
+        if engine != "stack":
+            raise ValueError("AsyncLox só é suportado pela engine stack")
+        if yield_every < 1:
+            raise ValueError(f"yield_every inválido: {yield_every!r}")
+        super().__init__("stack", **kwargs)
+        self.yield_every = yield_every
+        self.lock = asyncio.Lock()
+
+    async def run(self, src: str):
+        async with self.lock:
+            code = self.load(src)
+            self.budget.start()
+            await self.execute(code)
+
+    async def run_stream(self, lines: Iterable[str]):
+        """
+        Equivalente a Lox.run_stream, cedendo o laço como run().
+        """
+        async with self.lock:
+            self.budget.start()
+            for line, src in declarations(lines):
+                await self.execute(self.compile(src, line))
+
+    async def execute(self, code: Any):
+        try:
+            await trampoline.execute_async(code, self.ctx, self.yield_every)
+        finally:
+            self.output.flush()
+            self.trim()
+
+
+class Engine(NamedTuple):
+    """
+    Mecanismo de execução: compile transforma a AST resolvida em código
+    executável (guardado no cache de Lox) e execute roda esse código.
+    """
+
+    compile: Callable[[Program], Any]
+    execute: Callable[[Any, Env], None]
+
+
+# Mecanismos de execução disponíveis para Lox.run
+ENGINES = {
+    "tree": Engine(lambda program: program, exec),
+    "closure": Engine(closures.compile, closures.execute),
+    "vm": Engine(bytecode.compile, vm.execute),
+    "stack": Engine(trampoline.compile, trampoline.execute),
+}
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Implementação dos operadores binários.
+
+Cada nó Binary guarda a função do seu operador, escolhida uma única vez na
+construção da AST. As operações entre dois números testam primeiro o caso
+float/float e só recorrem às verificações completas, que produzem as
+mensagens de erro, quando os operandos têm outros tipos.
+
+Concatenações que produzem strings longas retornam uma LoxRope. Os caminhos
+lentos convertem ropes em str antes de operar, de modo que comparações e
+mensagens de erro são as mesmas de uma str.
+
+Datas são subtraídas e comparadas pelo número ordinal. A diferença entre duas
+datas é um int (dias), tratado como número pelos demais operadores.
+"""
+
+from typing import Callable
+
+from .runtime import LoxDate, LoxRope, flat
+from .token import Token, TokenType
+
+type BinaryOp = Callable[[object, object, Token], object]
+
+# Tamanho a partir do qual a concatenação de duas str produz uma rope
+ROPE_THRESHOLD = 256
+
+
+def is_number(x) -> bool:
+    # bool é subclasse de int, mas não é número em Lox
+    return type(x) is float or type(x) is int
+
+
+def assure_floats(x, y, op: Token):
+    if not is_number(x) and not is_number(y):
+        raise RuntimeError(f"operação inválida: {op.lexeme}")
+
+
+# Operações matemáticas
+def add(x, y, op: Token | None = None):
+    if type(x) is float and type(y) is float:
+        return x + y
+    if type(x) is LoxRope and (type(y) is str or type(y) is LoxRope):
+        return x.concat(str(y))
+    x, y = flat(x), flat(y)
+    if is_number(x) and is_number(y):
+        return x + y
+    elif isinstance(x, str) and isinstance(y, str):
+        return concat(x, y)
+    elif type(x) is LoxDate and is_number(y):
+        return x.shift(y)
+    elif is_number(x) and type(y) is LoxDate:
+        return y.shift(x)
+    raise RuntimeError(f"operação inválida: {x} + {y}")
+
+
+def concat(x: str, y: str) -> str | LoxRope:
+    if len(x) + len(y) < ROPE_THRESHOLD:
+        return x + y
+    return LoxRope([x, y])
+
+
+def sub(x, y, op: Token):
+    if type(x) is not float or type(y) is not float:
+        if type(x) is LoxDate:
+            if type(y) is LoxDate:
+                return x.ordinal - y.ordinal
+            if is_number(y):
+                return x.shift(-y)
+        x, y = flat(x), flat(y)
+        assure_floats(x, y, op)
+    return x - y
+
+
+def mul(x, y, op: Token):
+    if type(x) is not float or type(y) is not float:
+        x, y = flat(x), flat(y)
+        assure_floats(x, y, op)
+    return x * y
+
+
+def div(x, y, op: Token):
+    if type(x) is not float or type(y) is not float:
+        x, y = flat(x), flat(y)
+        assure_floats(x, y, op)
+    return x / y
+
+
+# Comparações
+def eq(x, y, op: Token | None = None):
+    if type(x) is type(y):
+        return x == y
+    x, y = flat(x), flat(y)
+    if type(x) is type(y):
+        return x == y
+    return is_number(x) and is_number(y) and x == y
+
+
+def ne(x, y, op: Token | None = None):
+    return not eq(x, y, op)
+
+
+def ge(x, y, op: Token):
+    if type(x) is not float or type(y) is not float:
+        if type(x) is LoxDate and type(y) is LoxDate:
+            return x.ordinal >= y.ordinal
+        x, y = flat(x), flat(y)
+        assure_floats(x, y, op)
+    return x >= y
+
+
+def gt(x, y, op: Token):
+    if type(x) is not float or type(y) is not float:
+        if type(x) is LoxDate and type(y) is LoxDate:
+            return x.ordinal > y.ordinal
+        x, y = flat(x), flat(y)
+        assure_floats(x, y, op)
+    return x > y
+
+
+def le(x, y, op: Token):
+    if type(x) is not float or type(y) is not float:
+        if type(x) is LoxDate and type(y) is LoxDate:
+            return x.ordinal <= y.ordinal
+        x, y = flat(x), flat(y)
+        assure_floats(x, y, op)
+    return x <= y
+
+
+def lt(x, y, op: Token):
+    if type(x) is not float or type(y) is not float:
+        if type(x) is LoxDate and type(y) is LoxDate:
+            return x.ordinal < y.ordinal
+        x, y = flat(x), flat(y)
+        assure_floats(x, y, op)
+    return x < y
+
+
+def invalid(x, y, op: Token):
+    raise RuntimeError(f"operação binaria inválida {op.type}")
+
+
+BINARY_OPS: dict[TokenType, BinaryOp] = {
+    TokenType.PLUS: add,
+    TokenType.MINUS: sub,
+    TokenType.STAR: mul,
+    TokenType.SLASH: div,
+    TokenType.EQUAL_EQUAL: eq,
+    TokenType.BANG_EQUAL: ne,
+    TokenType.GREATER_EQUAL: ge,
+    TokenType.GREATER: gt,
+    TokenType.LESS_EQUAL: le,
+    TokenType.LESS: lt,
+}
+
+
+def binary_op(op: Token) -> BinaryOp:
+    """
+    Função que implementa o operador dado.
+    """
+    return BINARY_OPS.get(op.type, invalid)
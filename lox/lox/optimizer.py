@@ -0,0 +1,249 @@
+"""
+Otimizações sobre a AST, aplicadas antes do resolvedor.
+
+* Dobra de constantes: operações cujos operandos são literais são calculadas
+  uma única vez, usando o próprio interpretador. Se a operação falhar (ex.:
+  "a" - 1), o nó é mantido e o erro continua acontecendo na execução, no
+  mesmo ponto do programa.
+* Ramos mortos: If e While com condição constante perdem o ramo que nunca
+  executa.
+* Blocos que não declaram variáveis são achatados no corpo que os contém.
+
+Os nós originais não são modificados; as funções retornam nós novos sempre
+que algo muda.
+"""
+
+from functools import singledispatch
+
+from .ast import (
+    Array,
+    Assign,
+    Binary,
+    Block,
+    Call,
+    Expr,
+    ExprStmt,
+    Function,
+    Grouping,
+    Identifier,
+    If,
+    Index,
+    Literal,
+    LogicAnd,
+    LogicOr,
+    Print,
+    Program,
+    Return,
+    SetIndex,
+    Slice,
+    Stmt,
+    Unary,
+    Var,
+    While,
+)
+from .env import Env
+from .interpreter import eval, truthy
+from .runtime import flat
+
+
+def optimize(program: Program) -> Program:
+    """
+    Retorna uma versão otimizada do programa.
+    """
+    return Program(optimize_body(program.body))
+
+
+def fold(expr: Expr) -> Expr:
+    """
+    Avalia uma expressão cujos operandos são literais, ou a retorna intacta
+    se a avaliação falhar.
+    """
+    try:
+        # Literais guardam str: uma rope seria compartilhada entre execuções
+        return Literal(flat(eval(expr, Env())))
+    except Exception:
+        return expr
+
+
+def is_constant(*exprs: Expr) -> bool:
+    return all(isinstance(expr, Literal) for expr in exprs)
+
+
+#
+# Expressões
+#
+@singledispatch
+def optimize_expr(expr: Expr) -> Expr:
+    raise TypeError(f"[optimize] tipo não suportado: {type(expr)}")
+
+
+@optimize_expr.register(Literal)
+@optimize_expr.register(Identifier)
+def _(expr: Expr) -> Expr:
+    return expr
+
+
+@optimize_expr.register
+def _(expr: Grouping) -> Expr:
+    return optimize_expr(expr.expression)
+
+
+@optimize_expr.register
+def _(expr: Unary) -> Expr:
+    expr = Unary(expr.operator, optimize_expr(expr.right))
+    return fold(expr) if is_constant(expr.right) else expr
+
+
+@optimize_expr.register(Binary)
+@optimize_expr.register(LogicAnd)
+@optimize_expr.register(LogicOr)
+def _(expr: Binary | LogicAnd | LogicOr) -> Expr:
+    # Cadeias como a + b + c + ... são percorridas pelo lado esquerdo sem
+    # recursão, para suportar expressões muito longas
+    spine = []
+    while isinstance(expr, (Binary, LogicAnd, LogicOr)):
+        spine.append(expr)
+        expr = expr.left
+
+    left = optimize_expr(expr)
+    for node in reversed(spine):
+        right = optimize_expr(node.right)
+        if isinstance(node, Binary):
+            new = Binary(left, node.operator, right)
+            left = fold(new) if is_constant(left, right) else new
+        elif isinstance(left, Literal):
+            # Com o lado esquerdo constante, o resultado é ele mesmo (se
+            # decidir a operação) ou o lado direito
+            decides = truthy(left.value) == isinstance(node, LogicOr)
+            left = left if decides else right
+        else:
+            left = type(node)(left, right)
+    return left
+
+
+@optimize_expr.register
+def _(expr: Assign) -> Expr:
+    return Assign(expr.name, optimize_expr(expr.right))
+
+
+@optimize_expr.register
+def _(expr: Call) -> Expr:
+    return Call(optimize_expr(expr.callee), [optimize_expr(arg) for arg in expr.args])
+
+
+@optimize_expr.register
+def _(expr: Array) -> Expr:
+    return Array([optimize_expr(item) for item in expr.value])
+
+
+@optimize_expr.register
+def _(expr: Index) -> Expr:
+    return Index(optimize_expr(expr.value), optimize_expr(expr.index))
+
+
+@optimize_expr.register
+def _(expr: SetIndex) -> Expr:
+    return SetIndex(
+        optimize_expr(expr.value), optimize_expr(expr.index), optimize_expr(expr.right)
+    )
+
+
+@optimize_expr.register
+def _(expr: Slice) -> Expr:
+    start = expr.start and optimize_expr(expr.start)
+    end = expr.end and optimize_expr(expr.end)
+    return Slice(optimize_expr(expr.value), start, end)
+
+
+#
+# Comandos
+#
+def optimize_body(body: list[Stmt]) -> list[Stmt]:
+    """
+    Otimiza uma lista de comandos, incorporando blocos que não declaram
+    variáveis e descartando comandos vazios.
+    """
+    result = []
+    for stmt in body:
+        stmt = optimize_stmt(stmt)
+        if isinstance(stmt, Block) and not declares(stmt.body):
+            result.extend(stmt.body)
+        else:
+            result.append(stmt)
+    return result
+
+
+def declares(body: list[Stmt]) -> bool:
+    return any(isinstance(stmt, (Var, Function)) for stmt in body)
+
+
+def unwrap(stmt: Stmt) -> Stmt:
+    """
+    Remove o bloco em volta de um único comando que não declara variáveis.
+    """
+    if isinstance(stmt, Block) and len(stmt.body) == 1 and not declares(stmt.body):
+        return stmt.body[0]
+    return stmt
+
+
+def optimize_stmt(stmt: Stmt) -> Stmt:
+    """
+    Otimiza um comando, preservando a linha anotada pelo parser.
+    """
+    result = rewrite_stmt(stmt)
+    if stmt.line and not result.line:
+        result.line = stmt.line
+    return result
+
+
+@singledispatch
+def rewrite_stmt(stmt: Stmt) -> Stmt:
+    raise TypeError(f"[optimize] tipo não suportado: {type(stmt)}")
+
+
+@rewrite_stmt.register
+def _(stmt: Print) -> Stmt:
+    return Print(optimize_expr(stmt.right))
+
+
+@rewrite_stmt.register
+def _(stmt: ExprStmt) -> Stmt:
+    return ExprStmt(optimize_expr(stmt.expr))
+
+
+@rewrite_stmt.register
+def _(stmt: Var) -> Stmt:
+    return Var(stmt.name, optimize_expr(stmt.right))
+
+
+@rewrite_stmt.register
+def _(stmt: Return) -> Stmt:
+    return Return(None if stmt.value is None else optimize_expr(stmt.value))
+
+
+@rewrite_stmt.register
+def _(stmt: Block) -> Stmt:
+    return Block(optimize_body(stmt.body))
+
+
+@rewrite_stmt.register
+def _(stmt: If) -> Stmt:
+    cond = optimize_expr(stmt.cond)
+    then_body = unwrap(optimize_stmt(stmt.then_body))
+    else_body = unwrap(optimize_stmt(stmt.else_body))
+    if isinstance(cond, Literal):
+        return then_body if truthy(cond.value) else else_body
+    return If(cond, then_body, else_body)
+
+
+@rewrite_stmt.register
+def _(stmt: While) -> Stmt:
+    cond = optimize_expr(stmt.cond)
+    if isinstance(cond, Literal) and not truthy(cond.value):
+        return Block([])
+    return While(cond, unwrap(optimize_stmt(stmt.body)))
+
+
+@rewrite_stmt.register
+def _(stmt: Function) -> Stmt:
+    return Function(stmt.name, stmt.params, optimize_body(stmt.body))
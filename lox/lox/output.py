@@ -0,0 +1,93 @@
+"""
+Destinos da saída dos comandos print.
+
+Cada instância de Lox escreve em um Output, guardado no Env global. Os
+mecanismos de execução chamam output.print(valor) e Lox chama output.flush()
+ao fim de cada execução, inclusive quando ela termina com erro, de modo que
+os Outputs podem acumular linhas e escrevê-las em lotes.
+"""
+
+from __future__ import annotations
+
+import abc
+import sys
+from typing import TYPE_CHECKING, Callable, TextIO
+
+if TYPE_CHECKING:
+    from .ast import Value
+
+
+class Output(abc.ABC):
+    @abc.abstractmethod
+    def print(self, value: Value):
+        """
+        Escreve o valor seguido de uma quebra de linha.
+        """
+
+    def flush(self):
+        """
+        Entrega as linhas acumuladas.
+        """
+
+
+class StreamOutput(Output):
+    """
+    Escreve em um arquivo de texto, em lotes de até `batch` linhas.
+
+    Com stream=None, escreve no sys.stdout do momento de cada lote, o que
+    mantém compatível o uso de contextlib.redirect_stdout.
+    """
+
+    def __init__(self, stream: TextIO | None = None, batch: int = 1):
+        self.stream = stream
+        self.batch = batch
+        self.lines: list[str] = []
+
+    def print(self, value: Value):
+        lines = self.lines
+        lines.append(str(value))
+        if len(lines) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            stream = sys.stdout if self.stream is None else self.stream
+            stream.write("\n".join(self.lines) + "\n")
+            self.lines.clear()
+
+
+class ListOutput(Output):
+    """
+    Guarda cada linha impressa na lista `lines`.
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def print(self, value: Value):
+        self.lines.append(str(value))
+
+    def getvalue(self) -> str:
+        return "".join(line + "\n" for line in self.lines)
+
+
+class CallbackOutput(Output):
+    """
+    Entrega as linhas impressas a callback, em listas de até `batch` linhas.
+    """
+
+    def __init__(self, callback: Callable[[list[str]], object], batch: int = 1):
+        self.callback = callback
+        self.batch = batch
+        self.lines: list[str] = []
+
+    def print(self, value: Value):
+        lines = self.lines
+        lines.append(str(value))
+        if len(lines) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            lines, self.lines = self.lines, []
+            self.callback(lines)
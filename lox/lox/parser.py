@@ -1,21 +1,97 @@
 from pathlib import Path
+import hashlib
 import os
+import sys
+import tempfile
 import lark
+from . import descent
+from .runtime import LoxDate
 from .token import Token, TokenType
 from .ast import Assign, Binary, Expr, ExprStmt, Identifier, Literal, LogicAnd, LogicOr, Return, Unary, Call
+from .ast import Array, Index, SetIndex, Slice
 from .ast import Block, If, Print, Stmt, Program, Var, Function,  While
 
 BASE = Path(__file__).parent / "grammar.lark"
 SOURCE = BASE.read_text()
-GRAMMAR = lark.Lark(SOURCE, parser="lalr", start=["program", "expression"])
+OPTIONS = {"parser": "lalr", "start": ["program", "expression"]}
 
 type Input = str
 
 DEBUG_PARSER = os.environ.get("DEBUG_PARSER", "0") == "1"
+PARSER_CACHE = os.environ.get("LOX_PARSER_CACHE", "1") == "1"
+DEFAULT_FRONTEND = os.environ.get("LOX_FRONTEND", "lark")
+CACHE_DIR = Path(
+    os.environ.get("LOX_CACHE_DIR")
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "pylox"
+)
+
+
+def load_grammar(
+    source: str = SOURCE, cache_dir: Path | None = CACHE_DIR
+) -> lark.Lark:
+    """
+    Constrói o parser LALR da gramática.
+
+    As tabelas do parser são salvas em cache_dir em um arquivo cujo nome
+    depende do conteúdo da gramática e das versões do Lark e do Python.
+    Qualquer alteração na gramática gera um novo arquivo, de modo que um cache
+    desatualizado nunca é usado. Passe cache_dir=None para não usar cache.
+
+    O cache é um pickle e carregá-lo pode executar código arbitrário: cache_dir
+    deve ser gravável apenas pelo próprio usuário. Arquivos de outro dono ou
+    que outros usuários podem alterar são ignorados e reconstruídos.
+
+    O cache=... do próprio Lark não é usado porque grava o arquivo
+    diretamente (outro processo pode ler um cache pela metade) e falha quando
+    o diretório não pode ser escrito.
+    """
+    if cache_dir is None:
+        return lark.Lark(source, **OPTIONS)
+
+    key = f"{source}\0{OPTIONS}\0{lark.__version__}\0{sys.version_info[:2]}"
+    digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+    path = cache_dir / f"grammar-{digest}.lark.pickle"
+
+    try:
+        if trusted(path):
+            with path.open("rb") as f:
+                return lark.Lark.load(f)
+    except Exception:
+        pass  # Cache ausente ou corrompido: reconstrói e sobrescreve
+
+    grammar = lark.Lark(source, **OPTIONS)
+
+    # Grava em um arquivo temporário e renomeia, para que outros processos
+    # nunca leiam um cache escrito pela metade
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=cache_dir, delete=False) as f:
+            try:
+                grammar.save(f)
+            except Exception:
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, path)
+    except OSError:
+        pass  # Sem permissão de escrita: segue sem cache
+    return grammar
+
+
+def trusted(path: Path) -> bool:
+    """
+    Verdadeiro se o arquivo pertence ao usuário atual e só ele pode alterá-lo.
+    """
+    info = path.stat()
+    if not hasattr(os, "getuid"):  # Windows: não há dono POSIX
+        return True
+    return info.st_uid == os.getuid() and not info.st_mode & 0o022
+
+
+GRAMMAR = load_grammar(cache_dir=CACHE_DIR if PARSER_CACHE else None)
 
 
 @lark.v_args(inline=True)
-class LoxTransformer(lark.Transformer):
+class LoxTransformer(lark.visitors.Transformer_NonRecursive):
     #
     # Terminais
     #
@@ -25,6 +101,9 @@ class LoxTransformer(lark.Transformer):
     def NUMBER(self, token: lark.Token):
         return Literal(float(token))
 
+    def DATE(self, token: lark.Token):
+        return Literal(LoxDate.parse(token))
+
     def LITERAL(self, token: lark.Token):
         if token == "true":
             return Literal(True)
@@ -61,6 +140,22 @@ class LoxTransformer(lark.Transformer):
     def arguments(self, children: list[Expr]):
         return children
 
+    @lark.v_args(inline=False)
+    def array(self, children: list[Expr]):
+        return Array(children)
+
+    def index(self, value: Expr, index: Expr):
+        return Index(value, index)
+
+    def set_index(self, value: Expr, index: Expr, right: Expr):
+        return SetIndex(value, index, right)
+
+    def slice(self, value: Expr, start: Expr | None, end: Expr | None):
+        return Slice(value, start, end)
+
+    def slice_bound(self, bound: Expr | None = None):
+        return bound
+
     #
     # Stmt
     #
@@ -91,17 +186,15 @@ class LoxTransformer(lark.Transformer):
     def while_stmt(self, cond: Expr, body: Stmt):
         return While(cond, body)
 
-    def for_stmt(self, init: Expr | Var | None, cond: Expr | None, incr: Expr | None, body: Stmt):
+    def for_stmt(self, init: ExprStmt | Var | None, cond: Expr | None, incr: Expr | None, body: Stmt):
         if incr is not None:
             body = Block([body, ExprStmt(incr)])
         body = While(cond or Literal(True), body)
-        if isinstance(init, Var):
+        if init is not None:
             body = Block([init, body])
-        elif init:
-            body = Block([ExprStmt(init), body])
         return body
 
-    def for_init(self, init: Expr | Var | None = None):
+    def for_init(self, init: ExprStmt | Var | None = None):
         return init
 
     def for_condition(self, cond: Expr | None = None):
@@ -121,10 +214,35 @@ class LoxTransformer(lark.Transformer):
         return [identifier.name for identifier in children]
 
 
-def parse(src: str, debug: bool = DEBUG_PARSER) -> Stmt:
-    tree = GRAMMAR.parse(src, start="program")
-    transformer = LoxTransformer()
-    ast = transformer.transform(tree)
+def parse(
+    src: str,
+    debug: bool = DEBUG_PARSER,
+    frontend: str = DEFAULT_FRONTEND,
+    lines: bool = False,
+    first_line: int = 1,
+) -> Stmt:
+    """
+    Converte o código fonte em AST.
+
+    frontend escolhe entre o parser LALR do Lark ("lark") e o scanner e
+    parser descendente escritos à mão ("native"). Os dois produzem a mesma
+    AST; o nativo não constrói a árvore intermediária do Lark e é mais rápido.
+
+    lines=True anota a linha de cada comando em Stmt.line e usa sempre o
+    frontend nativo, assim como first_line, o número da primeira linha de src
+    quando ele é um trecho de um arquivo maior.
+    """
+    if lines or first_line != 1:
+        frontend = "native"
+
+    if frontend == "lark":
+        tree = GRAMMAR.parse(src, start="program")
+        transformer = LoxTransformer()
+        ast = transformer.transform(tree)
+    elif frontend == "native":
+        ast = descent.parse(src, lines, first_line)
+    else:
+        raise ValueError(f"frontend inválido: {frontend!r}")
     if debug:
         print("-" * 40)
         if hasattr(ast, "pretty"):
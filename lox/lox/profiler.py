@@ -0,0 +1,245 @@
+"""
+Profiler de programas Lox executados pelo interpretador de árvore.
+
+O profiler é ativado por instância: Lox(profiler=...) guarda o profiler no
+Env global e executa o programa com o exec deste módulo, que conta as linhas
+executadas e repassa cada comando ao interpreter.exec. A avaliação de uma
+chamada consulta o profiler do Env global e, quando há um, a chamada é
+medida por Profiler.call, que executa o corpo das funções Lox também pelo
+exec deste módulo. Nada é substituído nas classes compartilhadas nem no
+interpreter.exec: as demais instâncias, em qualquer thread, não são afetadas
+e pagam apenas o teste de que não têm profiler em cada chamada.
+
+Durante o profiling as chamadas em cauda (`return f(...)`) não são
+otimizadas: cada uma é medida como uma chamada de f, ao custo de usar a
+pilha do Python como uma chamada comum.
+
+Um Profiler acumula as medições de todas as execuções em que é usado, mas
+deve ser usado por uma execução de cada vez.
+"""
+
+import json
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from functools import singledispatch
+from typing import TextIO
+
+from . import interpreter
+from .ast import Block, If, Program, Return, Stmt, Value, While
+from .env import Env, Frame
+from .interpreter import Completion, LoxReturn, eval, prepare_call, truthy
+from .runtime import LoxCallable, LoxFunction, NativeFunction
+
+# Critérios de ordenação, como em `python -m cProfile -s`
+SORT_KEYS = {
+    "calls": lambda stats: -stats.calls,
+    "tottime": lambda stats: -stats.tottime,
+    "cumtime": lambda stats: -stats.cumtime,
+    "name": lambda stats: stats.name,
+    "line": lambda stats: stats.line,
+}
+
+
+@dataclass
+class FunctionStats:
+    name: str
+    line: int
+    calls: int = 0
+    tottime: float = 0.0  # tempo gasto no corpo da própria função
+    cumtime: float = 0.0  # tempo incluindo as funções chamadas
+    active: int = field(default=0, repr=False)  # chamadas em andamento
+
+
+#
+# Execução instrumentada
+#
+@singledispatch
+def exec(cmd: Stmt, ctx: Env | Frame) -> Completion | None:
+    # Comandos sem outros comandos dentro: só conta a linha
+    ctx.globals.profiler.lines[cmd.line] += 1  # type: ignore
+    return interpreter.exec(cmd, ctx)
+
+
+def exec_body(body: list[Stmt], ctx: Env | Frame) -> Completion | None:
+    for stmt in body:
+        if (completion := exec(stmt, ctx)) is not None:
+            return completion
+    return None
+
+
+@exec.register
+def _(cmd: Program, ctx: Env):
+    for stmt in cmd.body:
+        if (completion := exec(stmt, ctx)) is not None:
+            raise LoxReturn(completion.value)
+
+
+@exec.register
+def _(cmd: Block, ctx: Env | Frame):
+    scope = cmd.scope
+    if scope is None:
+        return exec_body(cmd.body, ctx)
+
+    child_ctx = scope.acquire(ctx)
+    try:
+        return exec_body(cmd.body, child_ctx)
+    finally:
+        scope.release(child_ctx)
+
+
+@exec.register
+def _(cmd: If, ctx: Env | Frame):
+    ctx.globals.profiler.lines[cmd.line] += 1  # type: ignore
+    if truthy(eval(cmd.cond, ctx)):
+        return exec(cmd.then_body, ctx)
+    else:
+        return exec(cmd.else_body, ctx)
+
+
+@exec.register
+def _(cmd: While, ctx: Env | Frame):
+    ctx.globals.profiler.lines[cmd.line] += 1  # type: ignore
+    tick = ctx.globals.budget.tick  # type: ignore
+    while truthy(eval(cmd.cond, ctx)):
+        if (completion := exec(cmd.body, ctx)) is not None:
+            return completion
+        tick()
+
+
+@exec.register
+def _(cmd: Return, ctx: Env | Frame):
+    profiler = ctx.globals.profiler
+    profiler.lines[cmd.line] += 1  # type: ignore
+    if not cmd.tail:
+        return interpreter.exec(cmd, ctx)
+
+    # Chamada em cauda: executada aqui para ser medida como as demais
+    callee, args = prepare_call(cmd.value, ctx)  # type: ignore
+    return Completion(profiler.call(callee, ctx, args))  # type: ignore
+
+
+def call_function(function: LoxFunction, args: list[Value]) -> Value:
+    """
+    Executa o corpo de uma função Lox pelo exec instrumentado.
+    """
+    function.closure.globals.budget.tick()  # type: ignore
+    scope = function.ast.scope
+    ctx = scope.acquire(function.closure)  # type: ignore
+    for name, value in zip(function.ast.params, args):
+        ctx.define(name, value)
+    try:
+        completion = exec_body(function.ast.body, ctx)
+    finally:
+        scope.release(ctx)  # type: ignore
+    return None if completion is None else completion.value
+
+
+@dataclass
+class Profiler:
+    functions: dict[tuple[str, int], FunctionStats] = field(default_factory=dict)
+    lines: Counter[int] = field(default_factory=Counter)
+    total_time: float = 0.0
+
+    # Tempo gasto nas funções chamadas por cada chamada em andamento
+    _children: list[float] = field(default_factory=list, repr=False)
+
+    def execute(self, program: Program, ctx: Env):
+        """
+        Executa o programa no Env global de uma instância com este profiler.
+        """
+        start = time.perf_counter()
+        try:
+            exec(program, ctx)
+        finally:
+            self.total_time += time.perf_counter() - start
+
+    def call(self, fn: LoxCallable, ctx: Env | Frame, args: list[Value]) -> Value:
+        """
+        Executa e mede uma chamada.
+        """
+        children = self._children
+        stats = self._stats(fn)
+        stats.calls += 1
+        stats.active += 1
+        children.append(0.0)
+        start = time.perf_counter()
+        try:
+            if type(fn) is LoxFunction:
+                return call_function(fn, args)
+            return fn.call(ctx, args)  # type: ignore
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.tottime += elapsed - children.pop()
+            stats.active -= 1
+
+            # Em chamadas recursivas, só a mais externa conta no tempo
+            # acumulado, como no cProfile
+            if not stats.active:
+                stats.cumtime += elapsed
+            if children:
+                children[-1] += elapsed
+
+    def _stats(self, fn: LoxCallable) -> FunctionStats:
+        if isinstance(fn, LoxFunction):
+            key = (fn.ast.name, fn.ast.line)
+        elif isinstance(fn, NativeFunction):
+            key = (f"<{fn.python_callable.__name__}>", 0)
+        else:
+            key = (type(fn).__name__, 0)
+
+        try:
+            return self.functions[key]
+        except KeyError:
+            stats = self.functions[key] = FunctionStats(*key)
+            return stats
+
+    #
+    # Relatórios
+    #
+    def stats(self, sort: str = "cumtime") -> list[FunctionStats]:
+        """
+        Estatísticas por função, ordenadas pelo critério dado.
+        """
+        return sorted(self.functions.values(), key=SORT_KEYS[sort])
+
+    def print_stats(self, sort: str = "cumtime", file: TextIO | None = None):
+        """
+        Imprime um relatório no formato do cProfile.
+        """
+        file = file or sys.stderr
+        calls = sum(stats.calls for stats in self.functions.values())
+        print(f"\n{calls:>9} chamadas em {self.total_time:.3f} segundos\n", file=file)
+        print(f"   Ordenado por: {sort}\n", file=file)
+        print("   ncalls  tottime  percall  cumtime  percall linha(função)", file=file)
+        for stats in self.stats(sort):
+            tot_per = stats.tottime / stats.calls
+            cum_per = stats.cumtime / stats.calls
+            print(
+                f"{stats.calls:>9} {stats.tottime:8.3f} {tot_per:8.3f} "
+                f"{stats.cumtime:8.3f} {cum_per:8.3f} {stats.line}({stats.name})",
+                file=file,
+            )
+
+        print("\n    linha  execuções", file=file)
+        for line, hits in sorted(self.lines.items()):
+            if line:
+                print(f"{line:>9} {hits:>10}", file=file)
+
+    def to_dict(self) -> dict:
+        return {
+            "total_time": self.total_time,
+            "functions": [
+                {k: v for k, v in asdict(stats).items() if k != "active"}
+                for stats in self.stats()
+            ],
+            "lines": {str(line): hits for line, hits in sorted(self.lines.items()) if line},
+        }
+
+    def dump(self, path: str):
+        """
+        Salva as estatísticas em JSON.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,252 @@
+"""
+Resolvedor de variáveis.
+
+Percorre a AST uma única vez antes da execução e associa a cada acesso a uma
+variável local o seu endereço léxico: a profundidade (depth) do escopo em
+relação ao escopo atual e a posição (slot) da variável dentro dele. Nomes que
+não pertencem a nenhum escopo local são tratados como globais (depth=-1).
+
+As declarações de cada escopo são içadas, ou seja, uma variável recebe a sua
+posição mesmo em trechos que executam antes da sua declaração. O Frame trata
+posições ainda não declaradas buscando o nome nos escopos externos, o que
+preserva a semântica dinâmica do Env.
+
+Blocos que não declaram nada não criam escopo, e escopos que não podem ser
+capturados por closures são marcados para reaproveitar seus Frames. Chamadas
+a funções globais recebem um CallSite, que identifica o cache da função
+chamada em cada instância de Lox (lox.callsite).
+"""
+
+from functools import singledispatch
+
+from .ast import (
+    Array,
+    Assign,
+    Binary,
+    Block,
+    Call,
+    Expr,
+    ExprStmt,
+    Function,
+    Grouping,
+    Identifier,
+    If,
+    Index,
+    Literal,
+    LogicAnd,
+    LogicOr,
+    Print,
+    Program,
+    Return,
+    SetIndex,
+    Slice,
+    Stmt,
+    Unary,
+    Var,
+    While,
+)
+from .callsite import CallSite
+from .env import Scope
+
+type Scopes = list[Scope]
+
+
+def resolve[T: Stmt](program: T) -> T:
+    """
+    Preenche os endereços léxicos da AST e a retorna.
+    """
+    resolve_stmt(program, [])
+    return program
+
+
+def address(name: str, scopes: Scopes) -> tuple[int, int]:
+    for depth, scope in enumerate(reversed(scopes)):
+        slot = scope.index.get(name)
+        if slot is not None:
+            return depth, slot
+    return -1, -1
+
+
+def declare_body(scope: Scope, body: list[Stmt]) -> Scope:
+    for stmt in body:
+        if isinstance(stmt, (Var, Function)):
+            scope.declare(stmt.name)
+    return scope
+
+
+def local_slot(name: str, scopes: Scopes) -> int:
+    return scopes[-1].index[name] if scopes else -1
+
+
+@singledispatch
+def resolve_expr(expr: Expr, scopes: Scopes):
+    raise TypeError(f"[resolve] tipo não suportado: {type(expr)}")
+
+
+@singledispatch
+def resolve_stmt(stmt: Stmt, scopes: Scopes):
+    raise TypeError(f"[resolve] tipo não suportado: {type(stmt)}")
+
+
+#
+# Expressões
+#
+@resolve_expr.register
+def _(expr: Literal, scopes: Scopes):
+    pass
+
+
+@resolve_expr.register
+def _(expr: Array, scopes: Scopes):
+    for item in expr.value:
+        resolve_expr(item, scopes)
+
+
+@resolve_expr.register
+def _(expr: Index, scopes: Scopes):
+    resolve_expr(expr.value, scopes)
+    resolve_expr(expr.index, scopes)
+
+
+@resolve_expr.register
+def _(expr: SetIndex, scopes: Scopes):
+    resolve_expr(expr.value, scopes)
+    resolve_expr(expr.index, scopes)
+    resolve_expr(expr.right, scopes)
+
+
+@resolve_expr.register
+def _(expr: Slice, scopes: Scopes):
+    resolve_expr(expr.value, scopes)
+    for bound in (expr.start, expr.end):
+        if bound is not None:
+            resolve_expr(bound, scopes)
+
+
+@resolve_expr.register
+def _(expr: Grouping, scopes: Scopes):
+    resolve_expr(expr.expression, scopes)
+
+
+@resolve_expr.register
+def _(expr: Unary, scopes: Scopes):
+    resolve_expr(expr.right, scopes)
+
+
+@resolve_expr.register(Binary)
+@resolve_expr.register(LogicAnd)
+@resolve_expr.register(LogicOr)
+def _(expr: Binary | LogicAnd | LogicOr, scopes: Scopes):
+    # Percorre cadeias como a + b + c + ... pelo lado esquerdo sem recursão,
+    # para suportar expressões muito longas
+    rights = []
+    while isinstance(expr, (Binary, LogicAnd, LogicOr)):
+        rights.append(expr.right)
+        expr = expr.left
+    resolve_expr(expr, scopes)
+    for right in reversed(rights):
+        resolve_expr(right, scopes)
+
+
+@resolve_expr.register
+def _(expr: Identifier, scopes: Scopes):
+    expr.depth, expr.slot = address(expr.name, scopes)
+
+
+@resolve_expr.register
+def _(expr: Assign, scopes: Scopes):
+    resolve_expr(expr.right, scopes)
+    expr.depth, expr.slot = address(expr.name, scopes)
+
+
+@resolve_expr.register
+def _(expr: Call, scopes: Scopes):
+    resolve_expr(expr.callee, scopes)
+    for arg in expr.args:
+        resolve_expr(arg, scopes)
+
+    callee = expr.callee
+    if isinstance(callee, Identifier) and callee.depth < 0:
+        expr.site = CallSite(callee.name, len(expr.args))
+
+
+#
+# Comandos
+#
+@resolve_stmt.register
+def _(cmd: Program, scopes: Scopes):
+    for stmt in cmd.body:
+        resolve_stmt(stmt, scopes)
+
+
+@resolve_stmt.register
+def _(cmd: Print, scopes: Scopes):
+    resolve_expr(cmd.right, scopes)
+
+
+@resolve_stmt.register
+def _(cmd: ExprStmt, scopes: Scopes):
+    resolve_expr(cmd.expr, scopes)
+
+
+@resolve_stmt.register
+def _(cmd: Var, scopes: Scopes):
+    resolve_expr(cmd.right, scopes)
+    cmd.slot = local_slot(cmd.name, scopes)
+
+
+@resolve_stmt.register
+def _(cmd: Block, scopes: Scopes):
+    scope = declare_body(Scope(), cmd.body)
+
+    # Blocos sem declarações executam diretamente no escopo atual
+    if not scope.names:
+        cmd.scope = None
+        for stmt in cmd.body:
+            resolve_stmt(stmt, scopes)
+        return
+
+    cmd.scope = scope
+    scopes.append(scope)
+    for stmt in cmd.body:
+        resolve_stmt(stmt, scopes)
+    scopes.pop()
+
+
+@resolve_stmt.register
+def _(cmd: If, scopes: Scopes):
+    resolve_expr(cmd.cond, scopes)
+    resolve_stmt(cmd.then_body, scopes)
+    resolve_stmt(cmd.else_body, scopes)
+
+
+@resolve_stmt.register
+def _(cmd: While, scopes: Scopes):
+    resolve_expr(cmd.cond, scopes)
+    resolve_stmt(cmd.body, scopes)
+
+
+@resolve_stmt.register
+def _(cmd: Function, scopes: Scopes):
+    cmd.slot = local_slot(cmd.name, scopes)
+
+    # A closure da função mantém todos os escopos envolventes vivos
+    for scope in scopes:
+        scope.captures = True
+
+    scope = Scope(function=True)
+    for param in cmd.params:
+        scope.declare(param)
+    cmd.scope = declare_body(scope, cmd.body)
+
+    scopes.append(cmd.scope)
+    for stmt in cmd.body:
+        resolve_stmt(stmt, scopes)
+    scopes.pop()
+
+
+@resolve_stmt.register
+def _(cmd: Return, scopes: Scopes):
+    if cmd.value is not None:
+        resolve_expr(cmd.value, scopes)
+    cmd.tail = isinstance(cmd.value, Call) and any(scope.function for scope in scopes)
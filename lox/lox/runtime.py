@@ -1,7 +1,12 @@
 from __future__ import annotations
 import abc
+import time
+from array import array
 from dataclasses import dataclass
-from typing import Callable, Any, TYPE_CHECKING
+from datetime import date
+from operator import sub
+from reprlib import recursive_repr
+from typing import Callable, Any, Iterable, Sequence, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .interpreter import Value, Env
@@ -27,7 +32,8 @@ class NativeFunction(LoxCallable):
         return self.arity
 
     def call(self, ctx, args):
-        return self.python_callable(*args)
+        # Funções nativas sempre recebem str no lugar de ropes
+        return self.python_callable(*[flat(arg) for arg in args])
 
 
 @dataclass
@@ -35,26 +41,43 @@ class LoxFunction(LoxCallable):
     ast: Function
     closure: Env
 
+    @recursive_repr()
+    def __repr__(self):
+        # Funções dos outros mecanismos de execução são exibidas do mesmo modo
+        return f"LoxFunction(ast={self.ast!r}, closure={self.closure!r})"
+
     def n_args(self):
        return len(self.ast.params)
 
     def call(self, ctx: Env, argvalues: list[Value]):
-        from .interpreter import exec, LoxReturn
+        from .interpreter import TailCall, exec_body
 
-        # Abre um novo escopo de variáveis
-        ctx = self.closure.new_scope()
+        function = self
+        tick = self.closure.globals.budget.tick
+        while True:
+            tick()
 
-        # Insere os argumentos no escopo atual
-        argnames = self.ast.params
-        for name, value in zip(argnames, argvalues):
-            ctx.define(name, value)
+            # Abre um novo escopo de variáveis
+            scope = function.ast.scope
+            ctx = scope.acquire(function.closure)
 
-        # Excuta o corpo da função
-        try:
-            for stmt in self.ast.body:
-                exec(stmt, ctx)
-        except LoxReturn as exception:
-            return exception.value
+            # Insere os argumentos no escopo atual
+            argnames = function.ast.params
+            for name, value in zip(argnames, argvalues):
+                ctx.define(name, value)
+
+            # Excuta o corpo da função
+            try:
+                completion = exec_body(function.ast.body, ctx)
+            finally:
+                scope.release(ctx)
+            if completion is None:
+                return None
+
+            # `return g(...)`: executa g no lugar da função atual
+            if type(completion) is not TailCall:
+                return completion.value
+            function, argvalues = completion.function, completion.args
 
 @dataclass
 class LoxClass:
@@ -68,3 +91,282 @@ class LoxInstance:
     fields: dict[str, Value]
     klass: LoxClass
 
+
+class LoxArray:
+    """
+    Array de valores Lox.
+
+    Enquanto todos os elementos são números, os valores ficam em um
+    array('d'), que ocupa 8 bytes por elemento. O primeiro valor de outro
+    tipo converte a representação para uma lista comum, sem que o programa
+    perceba a diferença.
+    """
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: Iterable[Value] = ()):
+        items = list(items)
+        if all(type(item) is float for item in items):
+            self.items: array | list = array("d", items)
+        else:
+            self.items = items
+
+    @recursive_repr("[...]")
+    def __repr__(self):
+        return "[" + ", ".join(str(item) for item in self.items) + "]"
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    @property
+    def compact(self) -> bool:
+        return type(self.items) is array
+
+    @staticmethod
+    def _integer(index: Value) -> int:
+        if type(index) is int:
+            return index
+        if type(index) is not float or not index.is_integer():
+            raise RuntimeError(f"índice inválido: {index}")
+        return int(index)
+
+    def _position(self, index: Value) -> int:
+        position = self._integer(index)
+        if not -len(self.items) <= position < len(self.items):
+            raise RuntimeError(f"índice fora dos limites: {position}")
+        return position
+
+    def get(self, index: Value) -> Value:
+        return self.items[self._position(index)]
+
+    def set(self, index: Value, value: Value):
+        position = self._position(index)
+        if type(value) is not float and type(self.items) is array:
+            self.items = list(self.items)
+        self.items[position] = value
+
+    def push(self, value: Value):
+        if type(value) is not float and type(self.items) is array:
+            self.items = list(self.items)
+        self.items.append(value)
+
+    def pop(self) -> Value:
+        if not self.items:
+            raise RuntimeError("pop: array vazia.")
+        return self.items.pop()
+
+    def slice(self, start: Value, end: Value) -> LoxArray:
+        start = None if start is None else self._integer(start)
+        end = None if end is None else self._integer(end)
+        result = LoxArray.__new__(LoxArray)
+        result.items = self.items[start:end]
+        return result
+
+
+
+class LoxRope:
+    """
+    String construída por concatenações sucessivas.
+
+    Em um laço como `s = s + parte`, concatenar duas str copia a string
+    inteira a cada passo. A rope apenas acrescenta a parte a uma lista e só
+    junta os pedaços (uma vez) quando o texto é necessário: ao imprimir,
+    comparar ou passar o valor para uma função nativa.
+
+    Ropes derivadas da mesma rope compartilham a lista de partes. Cada uma
+    enxerga apenas as `count` primeiras, de modo que `t = s + "a"` não altera
+    s; a lista só é copiada quando duas ropes tentam estender o mesmo
+    prefixo.
+    """
+
+    __slots__ = ("parts", "count", "length", "text")
+
+    def __init__(self, parts: list[str]):
+        self.parts = parts
+        self.count = len(parts)
+        self.length = sum(map(len, parts))
+        self.text: str | None = None
+
+    def __str__(self) -> str:
+        if self.text is None:
+            parts = self.parts
+            if len(parts) != self.count:
+                parts = parts[: self.count]
+            self.text = "".join(parts)
+        return self.text
+
+    def __repr__(self):
+        return f"LoxRope({str(self)!r})"
+
+    def __len__(self):
+        return self.length
+
+    def __eq__(self, other):
+        if type(other) is LoxRope or type(other) is str:
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def concat(self, other: str) -> LoxRope:
+        parts = self.parts
+        if len(parts) != self.count:
+            parts = parts[: self.count]  # outra rope já estendeu esta lista
+        parts.append(other)
+
+        rope = LoxRope.__new__(LoxRope)
+        rope.parts = parts
+        rope.count = self.count + 1
+        rope.length = self.length + len(other)
+        rope.text = None
+        return rope
+
+
+def flat(value: Value) -> Value:
+    """
+    Converte ropes em str e retorna os demais valores intactos.
+    """
+    if type(value) is LoxRope:
+        return str(value)
+    return value
+
+
+class LoxDate(date):
+    """
+    Data literal, escrita como 'AAAA-MM-DD.
+
+    O literal é convertido uma única vez, pelo parser. A data guarda o seu
+    número ordinal (dias desde 01/01/0001), de modo que subtrações e
+    comparações entre datas operam diretamente sobre inteiros.
+    """
+
+    __slots__ = ("ordinal",)
+
+    def __new__(cls, year: int, month: int, day: int):
+        self = super().__new__(cls, year, month, day)
+        self.ordinal = self.toordinal()
+        return self
+
+    def __reduce__(self):
+        return (type(self), (self.year, self.month, self.day))
+
+    def __repr__(self):
+        return f"LoxDate({self.year}, {self.month}, {self.day})"
+
+    @classmethod
+    def parse(cls, lexeme: str) -> LoxDate:
+        """
+        Converte um literal 'AAAA-MM-DD, já validado pelo scanner.
+        """
+        try:
+            return cls(int(lexeme[1:5]), int(lexeme[6:8]), int(lexeme[9:11]))
+        except ValueError:
+            raise ValueError(f"data inválida: {lexeme}")
+
+    def shift(self, days: Value) -> LoxDate:
+        """
+        Data deslocada pelo número de dias dado.
+        """
+        if type(days) is float and not days.is_integer():
+            raise RuntimeError(f"número de dias inválido: {days}")
+        try:
+            return LoxDate.fromordinal(self.ordinal + int(days))
+        except (ValueError, OverflowError):
+            raise RuntimeError(f"data fora dos limites: {self} + {days}")
+
+
+#
+# Operações sobre arrays compartilhadas pelos mecanismos de execução
+#
+def get_index(value: Value, index: Value) -> Value:
+    if type(value) is not LoxArray:
+        raise RuntimeError(f"{value} não é uma array.")
+    return value.get(index)
+
+
+def set_index(value: Value, index: Value, item: Value) -> Value:
+    if type(value) is not LoxArray:
+        raise RuntimeError(f"{value} não é uma array.")
+    value.set(index, item)
+    return item
+
+
+def get_slice(value: Value, start: Value, end: Value) -> LoxArray:
+    if type(value) is not LoxArray:
+        raise RuntimeError(f"{value} não é uma array.")
+    return value.slice(start, end)
+
+
+#
+# Funções nativas
+#
+def length(value: Value) -> float:
+    if type(value) is LoxArray or type(value) is str:
+        return float(len(value))
+    raise RuntimeError(f"len: {value} não é uma array.")
+
+
+def push(value: Value, item: Value) -> None:
+    if type(value) is not LoxArray:
+        raise RuntimeError(f"push: {value} não é uma array.")
+    value.push(item)
+
+
+def pop(value: Value) -> Value:
+    if type(value) is not LoxArray:
+        raise RuntimeError(f"pop: {value} não é uma array.")
+    return value.pop()
+
+
+def _ordered(name: str, value: Value) -> Sequence[Value]:
+    """
+    Elementos de uma array que contém apenas números ou apenas datas.
+    """
+    if type(value) is not LoxArray:
+        raise RuntimeError(f"{name}: {value} não é uma array.")
+    items = value.items
+    if type(items) is list:
+        kinds = set(map(type, items))
+        if not (kinds <= {float, int} or kinds == {LoxDate}):
+            raise RuntimeError(f"{name}: a array deve conter apenas números ou apenas datas.")
+    return items
+
+
+def minimum(value: Value) -> Value:
+    items = _ordered("min", value)
+    if not items:
+        raise RuntimeError("min: array vazia.")
+    return min(items)
+
+
+def maximum(value: Value) -> Value:
+    items = _ordered("max", value)
+    if not items:
+        raise RuntimeError("max: array vazia.")
+    return max(items)
+
+
+def differences(value: Value) -> LoxArray:
+    """
+    Diferenças entre elementos consecutivos; em dias, para arrays de datas.
+    """
+    items = _ordered("diff", value)
+    if items and type(items[0]) is LoxDate:
+        items = [item.ordinal for item in items]
+    return LoxArray(list(map(sub, items[1:], items)))
+
+
+# Funções disponíveis no escopo global de todo programa
+NATIVES = {
+    "clock": NativeFunction(time.time, 0),
+    "len": NativeFunction(length, 1),
+    "push": NativeFunction(push, 2),
+    "pop": NativeFunction(pop, 1),
+    "min": NativeFunction(minimum, 1),
+    "max": NativeFunction(maximum, 1),
+    "diff": NativeFunction(differences, 1),
+}
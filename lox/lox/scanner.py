@@ -0,0 +1,185 @@
+"""
+Analisador léxico escrito à mão.
+
+Converte o código fonte em uma lista de lox.token.Token, reconhecendo os
+mesmos terminais da gramática em grammar.lark.
+"""
+
+import re
+from typing import Iterable, Iterator
+
+from .runtime import LoxDate
+from .token import Token, TokenType
+
+
+class LoxSyntaxError(Exception):
+    """
+    Erro de sintaxe encontrado pelo scanner ou pelo parser descendente.
+    """
+
+
+KEYWORDS = {
+    "and": TokenType.AND,
+    "class": TokenType.CLASS,
+    "else": TokenType.ELSE,
+    "false": TokenType.FALSE,
+    "for": TokenType.FOR,
+    "fun": TokenType.FUN,
+    "if": TokenType.IF,
+    "nil": TokenType.NIL,
+    "or": TokenType.OR,
+    "print": TokenType.PRINT,
+    "return": TokenType.RETURN,
+    "super": TokenType.SUPER,
+    "this": TokenType.THIS,
+    "true": TokenType.TRUE,
+    "var": TokenType.VAR,
+    "while": TokenType.WHILE,
+}
+
+SYMBOLS = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    "[": TokenType.LEFT_BRACKET,
+    "]": TokenType.RIGHT_BRACKET,
+    ":": TokenType.COLON,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    ";": TokenType.SEMICOLON,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    "/": TokenType.SLASH,
+    "*": TokenType.STAR,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+}
+
+# A ordem das alternativas importa: operadores de dois caracteres vêm antes
+# dos de um caractere.
+TOKEN_RE = re.compile(
+    r"""
+    (?P<space>\s+|//[^\n]*)
+    | (?P<date>'[0-9]{4}-[0-9]{2}-[0-9]{2})
+    | (?P<number>[0-9]+(?:\.[0-9]+)?)
+    | (?P<string>"[^"]*")
+    | (?P<name>[a-zA-Z_][a-zA-Z_0-9]*)
+    | (?P<symbol>!=|==|>=|<=|[(){}\[\],.:;\-+/*!=><])
+    | (?P<unterminated>"[^"]*)
+    | (?P<invalid>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def tokenize(src: str, line: int = 1) -> list[Token]:
+    """
+    Retorna a lista de tokens do código, terminada por um token EOF.
+
+    line é o número da primeira linha de src.
+
+    Trechos inválidos viram tokens INVALID ou UNTERMINATED_STRING, e o parser
+    decide como reportá-los.
+    """
+    tokens = []
+    append = tokens.append
+
+    for match in TOKEN_RE.finditer(src):
+        kind = match.lastgroup
+        text = match.group()
+
+        if kind == "space":
+            line += text.count("\n")
+        elif kind == "name":
+            append(Token(KEYWORDS.get(text, TokenType.IDENTIFIER), text, line))
+        elif kind == "symbol":
+            append(Token(SYMBOLS[text], text, line))
+        elif kind == "number":
+            append(Token(TokenType.NUMBER, text, line, float(text)))
+        elif kind == "date":
+            try:
+                append(Token(TokenType.DATE, text, line, LoxDate.parse(text)))
+            except ValueError:
+                append(Token(TokenType.INVALID, text, line))
+        elif kind == "string":
+            append(Token(TokenType.STRING, text, line, text[1:-1]))
+            line += text.count("\n")
+        elif kind == "unterminated":
+            append(Token(TokenType.UNTERMINATED_STRING, text, line))
+            line += text.count("\n")
+        else:
+            append(Token(TokenType.INVALID, text, line))
+
+    append(Token(TokenType.EOF, "", line))
+    return tokens
+
+
+OPEN = {"(", "{", "["}
+CLOSE = {")", "}", "]"}
+
+
+def declarations(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """
+    Divide o código, lido linha a linha, em declarações de nível superior.
+
+    Retorna pares (linha inicial, código) assim que cada declaração termina,
+    sem ler o restante do arquivo. Uma declaração termina em um ";" ou "}"
+    fora de parênteses, chaves e colchetes, a menos que o próximo token seja
+    um "else". Código mal formado é repassado ao parser, que reporta o erro.
+    """
+    parts: list[str] = []  # trechos da declaração atual em linhas anteriores
+    first = 1
+    depth = 0
+    ended = False  # a declaração atual pode terminar antes do próximo token
+    pending = False  # a declaração atual contém algum token
+    in_string = False
+    number = 0
+
+    for number, line in enumerate(lines, 1):
+        start = 0  # início da declaração atual nesta linha
+        pos = 0
+        if in_string:
+            end = line.find('"')
+            if end < 0:
+                parts.append(line)
+                continue
+            in_string = False
+            pos = end + 1
+
+        for match in TOKEN_RE.finditer(line, pos):
+            kind = match.lastgroup
+            if kind == "space":
+                continue
+            text = match.group()
+
+            if ended and not (kind == "name" and text == "else"):
+                parts.append(line[start : match.start()])
+                yield first, "".join(parts)
+                parts = []
+                first = number
+                start = match.start()
+            ended = False
+            pending = True
+
+            if kind == "unterminated":
+                in_string = True
+                break
+            if kind == "symbol":
+                if text in OPEN:
+                    depth += 1
+                elif text in CLOSE:
+                    depth -= 1
+                if depth == 0 and (text == ";" or text == "}"):
+                    ended = True
+
+        parts.append(line[start:])
+
+    if pending:
+        yield first, "".join(parts)
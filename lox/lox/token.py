@@ -8,6 +8,9 @@ class TokenType(Enum):
     RIGHT_PAREN = auto()
     LEFT_BRACE = auto()
     RIGHT_BRACE = auto()
+    LEFT_BRACKET = auto()
+    RIGHT_BRACKET = auto()
+    COLON = auto()
     COMMA = auto()
     DOT = auto()
     SEMICOLON = auto()
@@ -30,6 +33,7 @@ class TokenType(Enum):
     IDENTIFIER = auto()
     STRING = auto()
     NUMBER = auto()
+    DATE = auto()
 
     # Keywords.
     AND = auto()
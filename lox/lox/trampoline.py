@@ -0,0 +1,551 @@
+"""
+Interpretador da AST com pilha explícita.
+
+Em vez de chamar eval/exec recursivamente, o interpretador guarda o trabalho
+pendente (as continuações) em uma lista. Cada item é um par (função, nó): a
+função executa um passo curto e empilha os próximos passos, de modo que a
+pilha do Python nunca cresce com a profundidade do programa. Valores
+intermediários das expressões ficam em uma segunda lista.
+
+A recursão de funções Lox fica limitada apenas pela memória e pela
+profundidade máxima de chamadas: Lox(max_depth=...) ou, por padrão,
+MAX_DEPTH, configurável pela variável de ambiente LOX_MAX_DEPTH.
+
+Como todo o estado da execução está no Machine, ela também pode ser pausada
+entre dois passos: execute_async roda a mesma máquina em uma corrotina, que
+devolve o controle ao laço de eventos a cada `interval` passos e aguarda os
+objetos awaitable retornados por funções nativas.
+"""
+
+import asyncio
+import os
+from inspect import isawaitable
+from typing import Callable
+
+from .ast import (
+    Array,
+    Assign,
+    Binary,
+    Block,
+    Call,
+    ExprStmt,
+    Function,
+    Grouping,
+    Identifier,
+    If,
+    Index,
+    Literal,
+    LogicAnd,
+    LogicOr,
+    Print,
+    Program,
+    Return,
+    SetIndex,
+    Slice,
+    Unary,
+    Value,
+    Var,
+    While,
+)
+from .callsite import call_cache
+from .env import Env, Frame
+from .interpreter import LoxReturn, check_call, define, truthy
+from .runtime import LoxArray, LoxFunction, get_index, get_slice, set_index
+from .token import TokenType
+
+MAX_DEPTH = int(os.environ.get("LOX_MAX_DEPTH", "100000"))
+
+# Limite omitido de um slice, como em a[1:]
+NIL = Literal(None)
+
+type Step = Callable[["Machine", object], None]
+
+
+class Machine:
+    """
+    Estado do interpretador: continuações pendentes, valores intermediários,
+    ambiente atual e profundidade de chamadas.
+    """
+
+    __slots__ = ("todo", "values", "env", "depth", "max_depth", "tick", "suspend", "pending")
+
+    def __init__(self, env: Env | Frame, max_depth: int, suspend: bool = False):
+        self.todo: list[tuple[Step, object]] = []
+        self.values: list[Value] = []
+        self.env = env
+        self.depth = 0
+        self.max_depth = max_depth
+        self.tick = env.globals.budget.tick
+        self.suspend = suspend  # funções nativas podem retornar awaitables
+        self.pending = None  # awaitable no topo de values, a ser aguardado
+
+    def run(self):
+        todo = self.todo
+        pop = todo.pop
+        while todo:
+            step, arg = pop()
+            step(self, arg)
+
+    async def run_async(self, interval: int):
+        """
+        Executa os passos pendentes, cedendo o laço de eventos a cada
+        `interval` passos e ao aguardar o resultado de uma função nativa.
+        """
+        todo = self.todo
+        pop = todo.pop
+        values = self.values
+        while todo:
+            for _ in range(interval):
+                step, arg = pop()
+                step(self, arg)
+                if self.pending is not None or not todo:
+                    break
+
+            if self.pending is not None:
+                awaitable, self.pending = self.pending, None
+                values[-1] = await awaitable
+            elif todo:
+                await asyncio.sleep(0)
+
+
+def compile(program: Program) -> Program:
+    """
+    O interpretador executa a AST resolvida diretamente.
+    """
+    return program
+
+
+def execute(program: Program, ctx: Env):
+    """
+    Executa um programa no contexto dado.
+    """
+    machine = Machine(ctx, max_depth(ctx))
+    push_body(machine.todo, program.body)
+    machine.run()
+
+
+async def execute_async(program: Program, ctx: Env, interval: int):
+    """
+    Executa um programa no contexto dado, cedendo o laço de eventos a cada
+    `interval` passos.
+    """
+    machine = Machine(ctx, max_depth(ctx), suspend=True)
+    push_body(machine.todo, program.body)
+    await machine.run_async(interval)
+
+
+def max_depth(ctx: Env) -> int:
+    depth = ctx.globals.budget.max_depth
+    return MAX_DEPTH if depth is None else depth
+
+
+#
+# Expressões
+#
+def push_eval(todo: list, expr):
+    try:
+        step = EVAL[type(expr)]
+    except KeyError:
+        raise TypeError(f"[eval] tipo não suportado: {type(expr)}")
+    todo.append((step, expr))
+
+
+def eval_literal(m: Machine, expr: Literal):
+    m.values.append(expr.value)
+
+
+def eval_grouping(m: Machine, expr: Grouping):
+    push_eval(m.todo, expr.expression)
+
+
+def eval_identifier(m: Machine, expr: Identifier):
+    try:
+        if expr.depth < 0:
+            value = m.env.globals[expr.name]
+        else:
+            value = m.env.load(expr.depth, expr.slot, expr.name)  # type: ignore
+    except KeyError:
+        raise RuntimeError(f"variável não existe: {expr.name}")
+    m.values.append(value)
+
+
+def eval_unary(m: Machine, expr: Unary):
+    m.todo.append((apply_unary, expr))
+    push_eval(m.todo, expr.right)
+
+
+def apply_unary(m: Machine, expr: Unary):
+    values = m.values
+    right = values.pop()
+    match expr.operator.type:
+        case TokenType.MINUS:
+            if not isinstance(right, float) and type(right) is not int:
+                raise RuntimeError(f"operação inválida: -{right}")
+            values.append(-right)
+        case TokenType.BANG:
+            values.append(not truthy(right))
+        case token:
+            raise RuntimeError(f"operação unária inválida {token}")
+
+
+def eval_binary(m: Machine, expr: Binary):
+    # O lado esquerdo é avaliado primeiro: é empilhado por último
+    todo = m.todo
+    todo.append((apply_binary, expr))
+    push_eval(todo, expr.right)
+    push_eval(todo, expr.left)
+
+
+def apply_binary(m: Machine, expr: Binary):
+    values = m.values
+    right = values.pop()
+    left = values.pop()
+    values.append(expr.apply(left, right, expr.operator))
+
+
+def eval_logic(m: Machine, expr: LogicAnd | LogicOr):
+    m.todo.append((SHORT_CIRCUIT[type(expr)], expr))
+    push_eval(m.todo, expr.left)
+
+
+def and_right(m: Machine, expr: LogicAnd):
+    # O valor do lado esquerdo fica na pilha se decidir o resultado
+    if truthy(m.values[-1]):
+        m.values.pop()
+        push_eval(m.todo, expr.right)
+
+
+def or_right(m: Machine, expr: LogicOr):
+    if not truthy(m.values[-1]):
+        m.values.pop()
+        push_eval(m.todo, expr.right)
+
+
+def eval_assign(m: Machine, expr: Assign):
+    m.todo.append((apply_assign, expr))
+    push_eval(m.todo, expr.right)
+
+
+def apply_assign(m: Machine, expr: Assign):
+    value = m.values[-1]
+    if expr.depth < 0:
+        m.env.globals[expr.name] = value
+    else:
+        m.env.store(expr.depth, expr.slot, expr.name, value)  # type: ignore
+
+
+def eval_array(m: Machine, expr: Array):
+    m.todo.append((build_array, expr))
+    for item in reversed(expr.value):
+        push_eval(m.todo, item)
+
+
+def build_array(m: Machine, expr: Array):
+    values = m.values
+    base = len(values) - len(expr.value)
+    array = LoxArray(values[base:])
+    del values[base:]
+    values.append(array)
+
+
+def eval_index(m: Machine, expr: Index):
+    todo = m.todo
+    todo.append((apply_index, expr))
+    push_eval(todo, expr.index)
+    push_eval(todo, expr.value)
+
+
+def apply_index(m: Machine, expr: Index):
+    values = m.values
+    index = values.pop()
+    values.append(get_index(values.pop(), index))
+
+
+def eval_set_index(m: Machine, expr: SetIndex):
+    todo = m.todo
+    todo.append((apply_set_index, expr))
+    push_eval(todo, expr.right)
+    push_eval(todo, expr.index)
+    push_eval(todo, expr.value)
+
+
+def apply_set_index(m: Machine, expr: SetIndex):
+    values = m.values
+    value = values.pop()
+    index = values.pop()
+    values.append(set_index(values.pop(), index, value))
+
+
+def eval_slice(m: Machine, expr: Slice):
+    todo = m.todo
+    todo.append((apply_slice, expr))
+    for bound in (expr.end, expr.start):
+        if bound is None:
+            todo.append((eval_literal, NIL))
+        else:
+            push_eval(todo, bound)
+    push_eval(todo, expr.value)
+
+
+def apply_slice(m: Machine, expr: Slice):
+    values = m.values
+    end = values.pop()
+    start = values.pop()
+    values.append(get_slice(values.pop(), start, end))
+
+
+def eval_call(m: Machine, expr: Call, apply: Step | None = None):
+    # Avalia a função e depois os argumentos, da esquerda para a direita
+    todo = m.todo
+    todo.append((apply or apply_call, expr))
+    for arg in reversed(expr.args):
+        push_eval(todo, arg)
+    site = expr.site
+    if site is None:
+        push_eval(todo, expr.callee)
+    else:
+        globals = m.env.globals
+        cache = globals.calls.get(site) or call_cache(globals, site)  # type: ignore
+        m.values.append(cache.lookup(globals))
+
+
+def pop_call(m: Machine, expr: Call) -> tuple[Value, list[Value]]:
+    values = m.values
+    base = len(values) - len(expr.args) - 1
+    callee = values[base]
+    args = values[base + 1 :]
+    del values[base:]
+    site = expr.site
+    if site is None:
+        check_call(callee, args)
+    else:
+        globals = m.env.globals
+        cache = globals.calls.get(site) or call_cache(globals, site)  # type: ignore
+        if callee is not cache.checked:
+            check_call(callee, args)
+            cache.checked = callee
+    return callee, args
+
+
+def apply_call(m: Machine, expr: Call):
+    callee, args = pop_call(m, expr)
+    if type(callee) is LoxFunction:
+        enter_function(m, callee, args)
+        return
+
+    value = callee.call(m.env, args)  # type: ignore
+    if m.suspend and isawaitable(value):
+        # O awaitable fica na pilha até run_async trocá-lo pelo resultado
+        m.pending = value
+    m.values.append(value)
+
+
+#
+# Chamadas de função
+#
+def enter_function(m: Machine, function: LoxFunction, args: list[Value]):
+    if m.depth >= m.max_depth:
+        raise RuntimeError(f"profundidade máxima de chamadas excedida ({m.max_depth}).")
+    m.tick()
+
+    frame = function.ast.scope.acquire(function.closure)  # type: ignore
+    for name, value in zip(function.ast.params, args):
+        frame.define(name, value)
+
+    m.todo.append((leave_function, m.env))
+    m.env = frame
+    m.depth += 1
+    push_body(m.todo, function.ast.body)
+
+
+def leave_function(m: Machine, caller_env: Env | Frame, value: Value = None):
+    """
+    Fim da chamada: fecha o escopo da função e volta ao ambiente de quem
+    chamou, deixando o valor de retorno na pilha.
+    """
+    frame: Frame = m.env  # type: ignore
+    frame.scope.release(frame)
+    m.env = caller_env
+    m.depth -= 1
+    m.values.append(value)
+
+
+def unwind(m: Machine) -> Env | Frame | None:
+    """
+    Descarta as continuações da função atual, fechando os blocos abertos, e
+    retorna o ambiente de quem a chamou (None se não há função em execução).
+    """
+    todo = m.todo
+    while todo:
+        step, arg = todo.pop()
+        if step is leave_function:
+            return arg  # type: ignore
+        if step is exit_block:
+            exit_block(m, arg)
+    return None
+
+
+#
+# Comandos
+#
+def push_exec(todo: list, stmt):
+    try:
+        step = EXEC[type(stmt)]
+    except KeyError:
+        raise TypeError(f"[exec] tipo não suportado: {type(stmt)}")
+    todo.append((step, stmt))
+
+
+def push_body(todo: list, body: list):
+    for stmt in reversed(body):
+        push_exec(todo, stmt)
+
+
+def exec_expr_stmt(m: Machine, stmt: ExprStmt):
+    m.todo.append((discard, None))
+    push_eval(m.todo, stmt.expr)
+
+
+def discard(m: Machine, _):
+    m.values.pop()
+
+
+def exec_print(m: Machine, stmt: Print):
+    m.todo.append((print_value, None))
+    push_eval(m.todo, stmt.right)
+
+
+def print_value(m: Machine, _):
+    m.env.globals.output.print(m.values.pop())
+
+
+def exec_var(m: Machine, stmt: Var):
+    m.todo.append((define_var, stmt))
+    push_eval(m.todo, stmt.right)
+
+
+def define_var(m: Machine, stmt: Var):
+    define(m.env, stmt.slot, stmt.name, m.values.pop())
+
+
+def exec_block(m: Machine, stmt: Block):
+    if stmt.scope is not None:
+        m.todo.append((exit_block, None))
+        m.env = stmt.scope.acquire(m.env)
+    push_body(m.todo, stmt.body)
+
+
+def exit_block(m: Machine, _):
+    frame: Frame = m.env  # type: ignore
+    m.env = frame.parent
+    frame.scope.release(frame)
+
+
+def exec_if(m: Machine, stmt: If):
+    m.todo.append((branch, stmt))
+    push_eval(m.todo, stmt.cond)
+
+
+def branch(m: Machine, stmt: If):
+    if truthy(m.values.pop()):
+        push_exec(m.todo, stmt.then_body)
+    else:
+        push_exec(m.todo, stmt.else_body)
+
+
+def exec_while(m: Machine, stmt: While):
+    # Condição constante, como em for (;;): não precisa ser avaliada
+    if isinstance(stmt.cond, Literal) and truthy(stmt.cond.value):
+        m.todo.append((loop_forever, stmt))
+    else:
+        m.todo.append((loop_test, stmt))
+        push_eval(m.todo, stmt.cond)
+
+
+def loop_test(m: Machine, stmt: While):
+    if truthy(m.values.pop()):
+        m.tick()
+        todo = m.todo
+        todo.append((loop_test, stmt))
+        push_eval(todo, stmt.cond)
+        push_exec(todo, stmt.body)
+
+
+def loop_forever(m: Machine, stmt: While):
+    m.tick()
+    m.todo.append((loop_forever, stmt))
+    push_exec(m.todo, stmt.body)
+
+
+def exec_function(m: Machine, stmt: Function):
+    define(m.env, stmt.slot, stmt.name, LoxFunction(stmt, m.env))
+
+
+def exec_return(m: Machine, stmt: Return):
+    if stmt.tail:
+        eval_call(m, stmt.value, tail_call)  # type: ignore
+    elif stmt.value is None:
+        m.values.append(None)
+        do_return(m, None)
+    else:
+        m.todo.append((do_return, None))
+        push_eval(m.todo, stmt.value)
+
+
+def do_return(m: Machine, _):
+    value = m.values.pop()
+    caller_env = unwind(m)
+    if caller_env is None:
+        raise LoxReturn(value)
+    leave_function(m, caller_env, value)
+
+
+def tail_call(m: Machine, expr: Call):
+    callee, args = pop_call(m, expr)
+    if type(callee) is not LoxFunction:
+        # do_return fica para o próximo passo, depois de o resultado ser
+        # aguardado
+        m.todo.append((do_return, None))
+        value = callee.call(m.env, args)  # type: ignore
+        if m.suspend and isawaitable(value):
+            m.pending = value
+        m.values.append(value)
+        return
+
+    # Encerra a função atual e entra na chamada no seu lugar
+    caller_env: Env | Frame = unwind(m)  # type: ignore
+    frame: Frame = m.env  # type: ignore
+    frame.scope.release(frame)
+    m.env = caller_env
+    m.depth -= 1
+    enter_function(m, callee, args)
+
+
+SHORT_CIRCUIT = {LogicAnd: and_right, LogicOr: or_right}
+
+EVAL = {
+    Literal: eval_literal,
+    Grouping: eval_grouping,
+    Identifier: eval_identifier,
+    Unary: eval_unary,
+    Binary: eval_binary,
+    LogicAnd: eval_logic,
+    LogicOr: eval_logic,
+    Assign: eval_assign,
+    Call: eval_call,
+    Array: eval_array,
+    Index: eval_index,
+    SetIndex: eval_set_index,
+    Slice: eval_slice,
+}
+
+EXEC = {
+    ExprStmt: exec_expr_stmt,
+    Print: exec_print,
+    Var: exec_var,
+    Block: exec_block,
+    If: exec_if,
+    While: exec_while,
+    Function: exec_function,
+    Return: exec_return,
+}
@@ -0,0 +1,431 @@
+"""
+Máquina virtual de pilha que executa o bytecode gerado por lox.bytecode.
+
+Chamadas entre funções Lox não usam a pilha do Python: o estado da função
+chamadora é guardado em uma lista e restaurado no RETURN. O tamanho dessa
+lista é limitado por Lox(max_depth=...) ou, por padrão, por
+lox.trampoline.MAX_DEPTH. As variáveis vivem
+nos mesmos Env/Frame usados pelos outros mecanismos de execução, o que mantém
+closures, LoxFunction e NativeFunction compatíveis.
+"""
+
+from dataclasses import dataclass
+
+from .ast import Value
+from .bytecode import Code, Op
+from .callsite import call_cache
+from .env import UNSET, Env, Frame
+from .interpreter import LoxReturn
+from . import operators
+from .runtime import LoxArray, LoxCallable, LoxFunction, get_index, get_slice, set_index
+from .token import Token, TokenType
+from .trampoline import max_depth
+
+CONST = Op.CONST
+POP = Op.POP
+LOAD_LOCAL = Op.LOAD_LOCAL
+STORE_LOCAL = Op.STORE_LOCAL
+DEFINE_LOCAL = Op.DEFINE_LOCAL
+LOAD_DEREF = Op.LOAD_DEREF
+STORE_DEREF = Op.STORE_DEREF
+LOAD_GLOBAL = Op.LOAD_GLOBAL
+STORE_GLOBAL = Op.STORE_GLOBAL
+DEFINE_GLOBAL = Op.DEFINE_GLOBAL
+LOAD_CALLEE = Op.LOAD_CALLEE
+ADD = Op.ADD
+SUB = Op.SUB
+MUL = Op.MUL
+DIV = Op.DIV
+EQ = Op.EQ
+NE = Op.NE
+GT = Op.GT
+GE = Op.GE
+LT = Op.LT
+LE = Op.LE
+NEGATE = Op.NEGATE
+NOT = Op.NOT
+BUILD_ARRAY = Op.BUILD_ARRAY
+GET_INDEX = Op.GET_INDEX
+SET_INDEX = Op.SET_INDEX
+SLICE = Op.SLICE
+JUMP = Op.JUMP
+JUMP_IF_FALSE = Op.JUMP_IF_FALSE
+JUMP_IF_FALSE_OR_POP = Op.JUMP_IF_FALSE_OR_POP
+JUMP_IF_TRUE_OR_POP = Op.JUMP_IF_TRUE_OR_POP
+ENTER_SCOPE = Op.ENTER_SCOPE
+EXIT_SCOPE = Op.EXIT_SCOPE
+CALL = Op.CALL
+CALL_GLOBAL = Op.CALL_GLOBAL
+TAIL_CALL = Op.TAIL_CALL
+RETURN = Op.RETURN
+FUNCTION = Op.FUNCTION
+PRINT = Op.PRINT
+
+# Tokens usados nas mensagens de erro dos operadores
+TOKENS = {
+    SUB: Token(TokenType.MINUS, "-", 0),
+    MUL: Token(TokenType.STAR, "*", 0),
+    DIV: Token(TokenType.SLASH, "/", 0),
+    GT: Token(TokenType.GREATER, ">", 0),
+    GE: Token(TokenType.GREATER_EQUAL, ">=", 0),
+    LT: Token(TokenType.LESS, "<", 0),
+    LE: Token(TokenType.LESS_EQUAL, "<=", 0),
+}
+
+
+@dataclass(repr=False)
+class VMFunction(LoxFunction):
+    code: Code
+
+    def enter(self, argvalues: list[Value]) -> Frame:
+        """
+        Abre o escopo de uma nova chamada com os argumentos já definidos.
+        """
+        ctx = self.ast.scope.acquire(self.closure)
+        for name, value in zip(self.ast.params, argvalues):
+            ctx.define(name, value)
+        return ctx
+
+    def call(self, ctx: Env, argvalues: list[Value]):
+        self.closure.globals.budget.tick()
+        return execute(self.code, self.enter(argvalues))
+
+
+def execute(code: Code, env: Env | Frame) -> Value:
+    """
+    Executa o código até o RETURN correspondente e retorna o seu valor.
+    """
+    ops, args, consts = code.ops, code.args, code.constants
+    globals_ = env.globals
+    caches = globals_.calls
+    write = globals_.output.print
+    tick = globals_.budget.tick
+    limit = max_depth(globals_)
+    pc = 0
+    stack: list[Value] = []
+    push = stack.append
+    pop = stack.pop
+
+    # Escopo da função em execução e estado das funções chamadoras
+    fenv = env
+    calls = []
+
+    while True:
+        op = ops[pc]
+        arg = args[pc]
+        pc += 1
+
+        if op == LOAD_LOCAL:
+            value = env.slots[arg]  # type: ignore
+            if value is UNSET:
+                value = load_outer(env, arg)  # type: ignore
+            push(value)
+
+        elif op == CONST:
+            push(consts[arg])
+
+        elif op == LOAD_GLOBAL:
+            try:
+                push(env.globals[consts[arg]])
+            except KeyError:
+                raise RuntimeError(f"variável não existe: {consts[arg]}")
+
+        elif op == JUMP_IF_FALSE:
+            value = pop()
+            if value is False or value is None:
+                pc = arg
+
+        elif op == ADD:
+            y = pop()
+            x = pop()
+            if type(x) is float and type(y) is float:
+                push(x + y)
+            else:
+                push(operators.add(x, y))
+
+        elif op == SUB:
+            y = pop()
+            x = pop()
+            if type(x) is float and type(y) is float:
+                push(x - y)
+            else:
+                push(operators.sub(x, y, TOKENS[SUB]))
+
+        elif op == LT:
+            y = pop()
+            x = pop()
+            if type(x) is float and type(y) is float:
+                push(x < y)
+            else:
+                push(operators.lt(x, y, TOKENS[LT]))
+
+        elif op == LOAD_CALLEE:
+            site = consts[arg]
+            cache = caches.get(site) or call_cache(globals_, site)
+            if cache.version == globals_.version:
+                cache.hits += 1
+                push(cache.value)
+            else:
+                push(cache.lookup(globals_))
+
+        elif op == CALL_GLOBAL:
+            site = consts[arg]
+            nargs = site.nargs
+            base = len(stack) - nargs - 1
+            callee = stack[base]
+            argvalues = stack[base + 1 :]
+            del stack[base:]
+
+            # A aridade só é verificada quando a função chamada muda
+            cache = caches.get(site) or call_cache(globals_, site)
+            if callee is not cache.checked:
+                if not isinstance(callee, LoxCallable):
+                    raise RuntimeError(f"{callee} não é uma função.")
+                if nargs != callee.n_args():
+                    raise RuntimeError(f"{callee}: número errado de argumentos.")
+                cache.checked = callee
+
+            if type(callee) is VMFunction:
+                tick()
+                if len(calls) >= limit:
+                    raise RuntimeError(f"profundidade máxima de chamadas excedida ({limit}).")
+                calls.append((ops, args, consts, pc, env, fenv))
+                env = fenv = callee.enter(argvalues)
+                code = callee.code
+                ops, args, consts = code.ops, code.args, code.constants
+                pc = 0
+            else:
+                push(callee.call(env, argvalues))  # type: ignore
+
+        elif op == CALL:
+            base = len(stack) - arg - 1
+            callee = stack[base]
+            argvalues = stack[base + 1 :]
+            del stack[base:]
+
+            if not isinstance(callee, LoxCallable):
+                raise RuntimeError(f"{callee} não é uma função.")
+            if arg != callee.n_args():
+                raise RuntimeError(f"{callee}: número errado de argumentos.")
+
+            if type(callee) is VMFunction:
+                tick()
+                if len(calls) >= limit:
+                    raise RuntimeError(f"profundidade máxima de chamadas excedida ({limit}).")
+                calls.append((ops, args, consts, pc, env, fenv))
+                env = fenv = callee.enter(argvalues)
+                code = callee.code
+                ops, args, consts = code.ops, code.args, code.constants
+                pc = 0
+            else:
+                push(callee.call(env, argvalues))  # type: ignore
+
+        elif op == RETURN:
+            value = pop()
+
+            # Fecha os blocos abertos e o escopo da função
+            while env is not fenv:
+                env = exit_scope(env)  # type: ignore
+            if type(fenv) is Frame:
+                fenv.scope.release(fenv)
+
+            if arg:
+                raise LoxReturn(value)
+            if not calls:
+                return value
+            ops, args, consts, pc, env, fenv = calls.pop()
+            push(value)
+
+        elif op == TAIL_CALL:
+            base = len(stack) - arg - 1
+            callee = stack[base]
+            argvalues = stack[base + 1 :]
+            del stack[base:]
+
+            if not isinstance(callee, LoxCallable):
+                raise RuntimeError(f"{callee} não é uma função.")
+            if arg != callee.n_args():
+                raise RuntimeError(f"{callee}: número errado de argumentos.")
+
+            if type(callee) is VMFunction:
+                # Encerra a função atual e entra na chamada no seu lugar, sem
+                # empilhar o estado em calls
+                tick()
+                while env is not fenv:
+                    env = exit_scope(env)  # type: ignore
+                if type(fenv) is Frame:
+                    fenv.scope.release(fenv)
+                env = fenv = callee.enter(argvalues)
+                code = callee.code
+                ops, args, consts = code.ops, code.args, code.constants
+                pc = 0
+            else:
+                push(callee.call(env, argvalues))  # type: ignore
+
+        elif op == STORE_LOCAL:
+            if env.slots[arg] is UNSET:  # type: ignore
+                store_outer(env, arg, stack[-1])  # type: ignore
+            else:
+                env.slots[arg] = stack[-1]  # type: ignore
+
+        elif op == POP:
+            pop()
+
+        elif op == JUMP:
+            if arg < pc:  # fim de uma volta de laço
+                tick()
+            pc = arg
+
+        elif op == ENTER_SCOPE:
+            env = consts[arg].acquire(env)
+
+        elif op == EXIT_SCOPE:
+            env = exit_scope(env)  # type: ignore
+
+        elif op == DEFINE_LOCAL:
+            env.define_slot(arg, env.scope.names[arg], pop())  # type: ignore
+
+        elif op == LOAD_DEREF:
+            depth, slot = consts[arg]
+            frame = env.ancestor(depth)  # type: ignore
+            value = frame.slots[slot]
+            if value is UNSET:
+                value = load_outer(frame, slot)
+            push(value)
+
+        elif op == STORE_DEREF:
+            depth, slot = consts[arg]
+            frame = env.ancestor(depth)  # type: ignore
+            if frame.slots[slot] is UNSET:
+                store_outer(frame, slot, stack[-1])
+            else:
+                frame.slots[slot] = stack[-1]
+
+        elif op == STORE_GLOBAL:
+            env.globals[consts[arg]] = stack[-1]
+
+        elif op == DEFINE_GLOBAL:
+            env.define(consts[arg], pop())  # type: ignore
+
+        elif op == MUL:
+            y = pop()
+            x = pop()
+            if type(x) is float and type(y) is float:
+                push(x * y)
+            else:
+                push(operators.mul(x, y, TOKENS[MUL]))
+
+        elif op == DIV:
+            y = pop()
+            x = pop()
+            if type(x) is float and type(y) is float:
+                push(x / y)
+            else:
+                push(operators.div(x, y, TOKENS[DIV]))
+
+        elif op == EQ:
+            y = pop()
+            x = pop()
+            push(x == y if type(x) is type(y) else operators.eq(x, y))
+
+        elif op == NE:
+            y = pop()
+            x = pop()
+            push(x != y if type(x) is type(y) else operators.ne(x, y))
+
+        elif op == GT:
+            y = pop()
+            x = pop()
+            if type(x) is float and type(y) is float:
+                push(x > y)
+            else:
+                push(operators.gt(x, y, TOKENS[GT]))
+
+        elif op == GE:
+            y = pop()
+            x = pop()
+            if type(x) is float and type(y) is float:
+                push(x >= y)
+            else:
+                push(operators.ge(x, y, TOKENS[GE]))
+
+        elif op == LE:
+            y = pop()
+            x = pop()
+            if type(x) is float and type(y) is float:
+                push(x <= y)
+            else:
+                push(operators.le(x, y, TOKENS[LE]))
+
+        elif op == NEGATE:
+            value = pop()
+            if not isinstance(value, float) and type(value) is not int:
+                raise RuntimeError(f"operação inválida: -{value}")
+            push(-value)
+
+        elif op == NOT:
+            value = pop()
+            push(value is False or value is None)
+
+        elif op == JUMP_IF_FALSE_OR_POP:
+            value = stack[-1]
+            if value is False or value is None:
+                pc = arg
+            else:
+                pop()
+
+        elif op == JUMP_IF_TRUE_OR_POP:
+            value = stack[-1]
+            if value is False or value is None:
+                pop()
+            else:
+                pc = arg
+
+        elif op == GET_INDEX:
+            index = pop()
+            push(get_index(pop(), index))
+
+        elif op == SET_INDEX:
+            value = pop()
+            index = pop()
+            push(set_index(pop(), index, value))
+
+        elif op == BUILD_ARRAY:
+            base = len(stack) - arg
+            array = LoxArray(stack[base:])
+            del stack[base:]
+            push(array)
+
+        elif op == SLICE:
+            end = pop()
+            start = pop()
+            push(get_slice(pop(), start, end))
+
+        elif op == FUNCTION:
+            function, function_code = consts[arg]
+            push(VMFunction(function, env, function_code))  # type: ignore
+
+        elif op == PRINT:
+            write(pop())
+
+        else:
+            raise RuntimeError(f"instrução inválida: {op}")
+
+
+def exit_scope(frame: Frame) -> Frame | Env:
+    parent = frame.parent
+    frame.scope.release(frame)
+    return parent
+
+
+def load_outer(frame: Frame, slot: int) -> Value:
+    # A variável ainda não foi declarada: procura pelo nome nos escopos externos
+    name = frame.scope.names[slot]
+    try:
+        return frame.parent[name]
+    except KeyError:
+        raise RuntimeError(f"variável não existe: {name}")
+
+
+def store_outer(frame: Frame, slot: int, value: Value):
+    frame.parent[frame.scope.names[slot]] = value
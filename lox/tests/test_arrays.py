@@ -0,0 +1,167 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.lox import ENGINES, Lox
+from lox.runtime import LoxArray
+
+
+def run(src: str, engine: str) -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        Lox(engine).run(src)
+    return f.getvalue()
+
+
+def test_array_numerica_e_compacta():
+    xs = LoxArray([1.0, 2.0])
+    assert xs.compact
+    xs.push(3.0)
+    xs.set(0.0, 10.0)
+    assert xs.compact
+    assert list(xs) == [10.0, 2.0, 3.0]
+    assert xs.slice(1.0, None).compact
+
+
+def test_array_promove_para_lista():
+    xs = LoxArray([1.0, 2.0])
+    xs.push("a")
+    assert not xs.compact
+    assert list(xs) == [1.0, 2.0, "a"]
+
+    ys = LoxArray([1.0, 2.0])
+    ys.set(1.0, True)
+    assert not ys.compact
+    assert list(ys) == [1.0, True]
+
+    assert not LoxArray([1.0, None]).compact
+    assert LoxArray().compact
+
+
+def test_array_recursiva():
+    xs = LoxArray([1.0])
+    xs.push(xs)
+    assert str(xs) == "[1.0, [...]]"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_indices_e_atribuicao(engine: str):
+    src = """
+        var xs = [1, 2, 3];
+        print xs[0] + xs[2];
+        print xs[-1];
+        xs[1] = "dois";
+        print xs;
+        var m = [[1, 2], [3, 4]];
+        m[1][0] = m[0][1] = 9;
+        print m;
+    """
+    assert run(src, engine) == "4.0\n3.0\n[1.0, dois, 3.0]\n[[1.0, 9.0], [9.0, 4.0]]\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_fatias(engine: str):
+    src = """
+        var xs = [0, 1, 2, 3, 4];
+        print xs[1:3];
+        print xs[:2];
+        print xs[3:];
+        print xs[:];
+        print xs[-2:];
+        var ys = xs[:];
+        ys[0] = 99;
+        print xs[0];
+    """
+    assert run(src, engine) == (
+        "[1.0, 2.0]\n[0.0, 1.0]\n[3.0, 4.0]\n[0.0, 1.0, 2.0, 3.0, 4.0]\n[3.0, 4.0]\n0.0\n"
+    )
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_funcoes_nativas(engine: str):
+    src = """
+        var xs = [];
+        for (var i = 0; i < 5; i = i + 1) push(xs, i * i);
+        print len(xs);
+        print pop(xs);
+        print xs;
+        print len("abc");
+        push(xs, nil);
+        print xs;
+    """
+    assert run(src, engine) == "5.0\n16.0\n[0.0, 1.0, 4.0, 9.0]\n3.0\n[0.0, 1.0, 4.0, 9.0, None]\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize(
+    "src, message",
+    [
+        ("var xs = [1]; print xs[1];", "índice fora dos limites: 1"),
+        ("var xs = [1]; xs[-2] = 0;", "índice fora dos limites: -2"),
+        ("var xs = [1]; print xs[0.5];", "índice inválido: 0.5"),
+        ('var xs = [1]; print xs["a"];', "índice inválido: a"),
+        ('var xs = [1]; print xs[:"a"];', "índice inválido: a"),
+        ("var x = 1; print x[0];", "1.0 não é uma array"),
+        ('var s = "abc"; s[0] = "x";', "abc não é uma array"),
+        ("pop([]);", "pop: array vazia"),
+        ("push(1, 2);", "push: 1.0 não é uma array"),
+        ("len(nil);", "len: None não é uma array"),
+    ],
+)
+def test_erros(engine: str, src: str, message: str):
+    with pytest.raises(RuntimeError, match=message):
+        run(src, engine)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_ordem_de_avaliacao(engine: str):
+    src = """
+        fun log(x) { print x; return x; }
+        var xs = [0, 0];
+        log(xs)[log(1)] = log(2);
+        print xs;
+    """
+    assert run(src, engine) == "[0.0, 0.0]\n1.0\n2.0\n[0.0, 2.0]\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_indices_inteiros(engine: str):
+    # A diferença entre duas datas é um int
+    src = """
+        var xs = [0, 1, 2, 3, 4];
+        var d = '2024-01-03 - '2024-01-01;
+        print xs[d];
+        print xs[d:];
+        print xs[:d];
+        print xs[-d:d + 1];
+    """
+    assert run(src, engine) == "2.0\n[2.0, 3.0, 4.0]\n[0.0, 1.0]\n[]\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_globais_com_nome_de_funcao_nativa(engine: str):
+    src = """
+        fun len(x) { return "meu len"; }
+        var push = 1;
+        print len([1, 2]);
+        print push;
+        pop = 2;
+        print pop;
+        fun f() { return len(nil); }
+        print f();
+    """
+    assert run(src, engine) == "meu len\n1.0\n2.0\nmeu len\n"
+    # Outras instâncias continuam com as funções nativas
+    assert run("print len([1, 2]); print pop([3]);", engine) == "2.0\n3.0\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_atribuicao_a_funcao_nativa_invalida_cache(engine: str):
+    src = """
+        fun f(x) { return len(x); }
+        fun meu(x) { return 0; }
+        print f("ab");
+        len = meu;
+        print f("ab");
+    """
+    assert run(src, engine) == "2.0\n0.0\n"
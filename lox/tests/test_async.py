@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from lox.budget import LoxTimeout
+from lox.lox import AsyncLox, Lox
+from lox.output import CallbackOutput, ListOutput
+from lox.runtime import NativeFunction
+
+LOOP = "for (var i = 0; i < {n}; i = i + 1) print i;"
+
+
+async def dobro(x):
+    await asyncio.sleep(0.001)
+    return x * 2
+
+
+async def falha(x):
+    await asyncio.sleep(0)
+    raise RuntimeError(f"falha: {x}")
+
+
+def async_lox(**kwargs) -> tuple[AsyncLox, ListOutput]:
+    output = ListOutput()
+    lox = AsyncLox(output=output, **kwargs)
+    lox.ctx.define("dobro", NativeFunction(dobro, 1))
+    lox.ctx.define("falha", NativeFunction(falha, 1))
+    return lox, output
+
+
+def test_mesma_saida_que_lox():
+    src = """
+    fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+    var s = "";
+    for (var i = 0; i < 10; i = i + 1) s = s + "ab";
+    print fib(12); print len(s); print [1, "a", nil];
+    """
+    expected = ListOutput()
+    Lox("stack", output=expected).run(src)
+    lox, output = async_lox(yield_every=7)
+    asyncio.run(lox.run(src))
+    assert output.lines == expected.lines == ["144.0", "20.0", "[1.0, a, None]"]
+
+
+def test_suspende_em_funcao_nativa_assincrona():
+    lox, output = async_lox()
+    asyncio.run(
+        lox.run(
+            """
+            fun f(x) { return dobro(x); }
+            fun g(x) { var y = dobro(x) + 1; return y; }
+            print dobro(1);
+            print f(2) + g(3);
+            print [dobro(4), dobro(5)];
+            """
+        )
+    )
+    assert output.lines == ["2.0", "11.0", "[8.0, 10.0]"]
+
+
+def test_erro_da_funcao_nativa_assincrona():
+    lox, output = async_lox()
+    with pytest.raises(RuntimeError, match="falha: 1.0"):
+        asyncio.run(lox.run("print 0; print falha(1); print 2;"))
+    assert output.lines == ["0.0"]
+
+
+def test_programas_se_alternam_no_mesmo_laco():
+    lines = []
+
+    def instance(tag: str) -> AsyncLox:
+        output = CallbackOutput(lambda batch: lines.extend((tag, line) for line in batch))
+        return AsyncLox(yield_every=20, output=output)
+
+    async def main():
+        await asyncio.gather(
+            instance("a").run(LOOP.format(n=50)),
+            instance("b").run(LOOP.format(n=50)),
+        )
+
+    asyncio.run(main())
+    tags = [tag for tag, _ in lines]
+    assert tags.count("a") == tags.count("b") == 50
+    assert tags != sorted(tags)
+    assert [line for tag, line in lines if tag == "a"] == [f"{i}.0" for i in range(50)]
+
+
+def test_outras_tarefas_executam_durante_o_programa():
+    async def main():
+        ticks = 0
+        done = False
+
+        async def ticker():
+            nonlocal ticks
+            while not done:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        lox, _ = async_lox(yield_every=100)
+        await lox.run("var t = 0; for (var i = 0; i < 5000; i = i + 1) t = t + i;")
+        during = ticks
+        done = True
+        await task
+        return during
+
+    assert asyncio.run(main()) > 10
+
+
+def test_mesma_instancia_serializada():
+    lox, output = async_lox(yield_every=10)
+
+    async def main():
+        await lox.run("var n = 0;")
+        src = "for (var i = 0; i < 100; i = i + 1) n = n + dobro(0) + 1;"
+        await asyncio.gather(*[lox.run(src) for _ in range(5)])
+        await lox.run("print n;")
+
+    asyncio.run(main())
+    assert output.lines == ["500.0"]
+
+
+def test_limite_de_passos():
+    lox, _ = async_lox(max_steps=100)
+    with pytest.raises(LoxTimeout):
+        asyncio.run(lox.run("while (true) {}"))
+
+
+def test_cancelamento_da_tarefa():
+    lox, output = async_lox(yield_every=10)
+
+    async def main():
+        task = asyncio.create_task(lox.run("print 1; while (true) {}"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert output.lines == ["1.0"]
+
+
+def test_run_stream():
+    lox, output = async_lox()
+    asyncio.run(lox.run_stream(["var x = dobro(2);\n", "print x;\n"]))
+    assert output.lines == ["4.0"]
+
+
+@pytest.mark.parametrize("kwargs", [{"engine": "vm"}, {"yield_every": 0}])
+def test_argumentos_invalidos(kwargs):
+    with pytest.raises(ValueError):
+        AsyncLox(**kwargs)
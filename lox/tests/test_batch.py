@@ -0,0 +1,98 @@
+import io
+import json
+import multiprocessing
+import os
+from pathlib import Path
+
+import pytest
+
+from lox import batch
+from lox.lox import ENGINES, Lox, main
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_saida_sem_trocar_stdout(engine, capsys):
+    out = io.StringIO()
+    Lox(engine, stdout=out).run("fun f(x) { print x; } f(1); print [2];")
+    assert out.getvalue() == "1.0\n[2.0]\n"
+    assert capsys.readouterr().out == ""
+
+
+@pytest.fixture
+def programs(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.lox").write_text("print 1 + 2;")
+    (tmp_path / "b.lox").write_text('print "x"; print y;')
+    (tmp_path / "sub" / "c.lox").write_text("print '2024-01-02 - '2024-01-01;")
+    (tmp_path / "ignorado.txt").write_text("print 0;")
+    return tmp_path
+
+
+def test_encontra_programas(programs):
+    found = batch.find_programs([programs, programs / "ignorado.txt"])
+    names = [path.relative_to(programs).as_posix() for path in found]
+    assert names == ["a.lox", "b.lox", "sub/c.lox", "ignorado.txt"]
+
+
+def test_executa_em_paralelo(programs):
+    results = {r["path"]: r for r in batch.run_batch([programs], jobs=2)}
+    assert len(results) == 3
+
+    a = results[str(programs / "a.lox")]
+    assert a["ok"] and a["output"] == "3.0\n" and a["error"] is None
+
+    b = results[str(programs / "b.lox")]
+    assert not b["ok"]
+    assert b["output"] == "x\n"
+    assert b["error"] == "RuntimeError: variável não existe: y"
+
+    assert results[str(programs / "sub" / "c.lox")]["output"] == "1\n"
+
+
+@pytest.mark.skipif(batch.resource is None, reason="requer o módulo resource")
+def test_limites(tmp_path):
+    (tmp_path / "loop.lox").write_text("while (true) {}")
+    (tmp_path / "mem.lox").write_text('var s = "abcdefghij"; while (true) s = s + s;')
+    (tmp_path / "ok.lox").write_text("print 1;")
+    results = batch.run_batch([tmp_path], jobs=1, cpu_time=1, memory=64 * 2**20)
+    errors = {Path(r["path"]).name: r["error"] for r in results}
+    assert errors == {
+        "loop.lox": "LimitExceeded: tempo de CPU excedido",
+        "mem.lox": "MemoryError",
+        "ok.lox": None,
+    }
+
+
+def test_linha_de_comando(programs, capsys):
+    assert main(["batch", str(programs), "--jobs", "2", "--engine", "vm"]) == 1
+    lines = capsys.readouterr().out.splitlines()
+    results = sorted(map(json.loads, lines), key=lambda r: r["path"])
+    assert [r["ok"] for r in results] == [True, False, True]
+
+
+def run_or_crash(path, *args):
+    # Simula um processo que morre no meio do programa
+    if path.endswith("crash.lox"):
+        os._exit(1)
+    return RUN_PROGRAM(path, *args)
+
+
+RUN_PROGRAM = batch.run_program
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="o monkeypatch só chega aos processos criados com fork",
+)
+def test_processo_que_morre_nao_interrompe_o_lote(tmp_path, monkeypatch):
+    for i in range(6):
+        (tmp_path / f"p{i}.lox").write_text(f"print {i};")
+    (tmp_path / "p2-crash.lox").write_text("print 0;")
+    monkeypatch.setattr(batch, "run_program", run_or_crash)
+
+    results = {Path(r["path"]).name: r for r in batch.run_batch([tmp_path], jobs=2)}
+    assert sorted(results) == sorted(["p2-crash.lox"] + [f"p{i}.lox" for i in range(6)])
+    crash = results.pop("p2-crash.lox")
+    assert not crash["ok"] and crash["error"].startswith("BrokenProcessPool")
+    for name, result in results.items():
+        assert result["ok"] and result["output"] == f"{name[1]}.0\n"
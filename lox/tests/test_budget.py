@@ -0,0 +1,100 @@
+import io
+import threading
+import time
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.budget import CHECK_INTERVAL, Budget, LoxTimeout
+from lox.env import Env
+from lox.lox import ENGINES, Lox
+
+LOOP = "{ var i = 0; while (i < 10) { i = i + 1; } }"
+CALLS = "fun f(n) { return n; } for (var i = 0; i < 4; i = i + 1) f(i);"
+FOREVER = "while (true) {}"
+RECURSION = "fun f(n) { return f(n + 1); } f(0);"
+
+
+def test_budget_conta_passos():
+    budget = Budget(max_steps=3 * CHECK_INTERVAL)
+    for _ in range(3 * CHECK_INTERVAL):
+        budget.tick()
+    assert budget.used == 3 * CHECK_INTERVAL
+    with pytest.raises(LoxTimeout, match="limite de 3072 passos excedido"):
+        budget.tick()
+    with pytest.raises(LoxTimeout):
+        budget.tick()  # continua esgotado até o próximo start()
+    budget.start()
+    budget.tick()
+    assert budget.used == 1
+
+
+def test_budget_cancelado():
+    budget = Budget()
+    budget.cancel()
+    with pytest.raises(LoxTimeout, match="execução cancelada"):
+        budget.tick()
+    budget.tick()  # o cancelamento vale para uma única execução
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("src, steps", [(LOOP, 10), (CALLS, 4 + 4)])
+def test_passos_iguais_em_todas_as_engines(engine, src, steps):
+    lox = Lox(engine, max_steps=steps)
+    lox.run(src)
+    assert lox.budget.used == steps
+
+    lox = Lox(engine, max_steps=steps - 1)
+    with pytest.raises(LoxTimeout):
+        lox.run(src)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("src", [FOREVER, RECURSION])
+def test_limite_de_passos(engine, src):
+    lox = Lox(engine, max_steps=5000)
+    with pytest.raises(LoxTimeout, match="limite de 5000 passos"):
+        lox.run(src)
+    assert lox.budget.used == 5001
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_prazo(engine):
+    lox = Lox(engine, timeout=0.05)
+    start = time.monotonic()
+    with pytest.raises(LoxTimeout, match="tempo limite de 0.05 segundos"):
+        lox.run(FOREVER)
+    assert time.monotonic() - start < 5
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("src", [FOREVER, RECURSION])
+def test_cancelamento_por_outra_thread(engine, src):
+    lox = Lox(engine)
+    timer = threading.Timer(0.05, lox.cancel)
+    timer.start()
+    try:
+        with pytest.raises(LoxTimeout, match="execução cancelada"):
+            lox.run(src)
+    finally:
+        timer.cancel()
+
+
+def test_cada_execucao_recomeca_a_contagem():
+    lox = Lox("closure", max_steps=10)
+    with redirect_stdout(io.StringIO()):
+        for _ in range(3):
+            lox.run(LOOP)
+
+
+def test_limite_vale_para_todo_o_stream():
+    lox = Lox("tree", max_steps=15)
+    with pytest.raises(LoxTimeout):
+        lox.run_stream(io.StringIO(LOOP + "\n" + LOOP))
+
+
+def test_apenas_o_env_global_tem_budget():
+    lox = Lox("tree", max_steps=10)
+    assert lox.ctx.budget is lox.budget
+    assert lox.ctx.parent.budget is None
+    assert Env().budget is None
@@ -0,0 +1,73 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox import lox as lox_module
+from lox.cache import ProgramCache, digest
+from lox.lox import ENGINES, Lox
+
+
+def run(lox: Lox, src: str) -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        lox.run(src)
+    return f.getvalue()
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_programa_repetido_usa_cache(engine: str, monkeypatch):
+    lox = Lox(engine)
+    src = "print 1 + 2;"
+    assert run(lox, src) == "3.0\n"
+
+    def fail(src):
+        raise AssertionError("programa analisado novamente")
+
+    monkeypatch.setattr(lox_module, "parse", fail)
+    assert run(lox, src) == "3.0\n"
+    assert (lox.cache.hits, lox.cache.misses) == (1, 1)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_ast_compartilhada_entre_execucoes(engine: str, monkeypatch):
+    lox = Lox(engine)
+    src = "{ var a = 1; fun f() { a = a + 1; return a; } print f(); print f(); }"
+    first = run(lox, src)
+
+    monkeypatch.setattr(lox_module, "parse", None)  # não deve ser chamado
+    assert run(lox, src) == first == "2.0\n3.0\n"
+    assert run(lox, src) == first
+    assert (lox.cache.hits, lox.cache.misses) == (2, 1)
+
+
+def test_erro_de_sintaxe_nao_e_guardado():
+    lox = Lox()
+    with pytest.raises(Exception):
+        lox.run("print ;")
+    assert len(lox.cache) == 0
+
+
+def test_lru_descarta_o_mais_antigo():
+    cache = ProgramCache(maxsize=2)
+    a, b, c = digest("a"), digest("b"), digest("c")
+    cache.put(a, 1)
+    cache.put(b, 2)
+    assert cache.get(a) == 1
+    cache.put(c, 3)
+
+    assert cache.get(b) is None
+    assert cache.get(a) == 1
+    assert cache.get(c) == 3
+    assert (cache.hits, cache.misses, len(cache)) == (3, 1, 2)
+
+
+def test_cache_desativado():
+    lox = Lox(cache_size=0)
+    run(lox, "print 1;")
+    run(lox, "print 1;")
+    assert (lox.cache.hits, lox.cache.misses, len(lox.cache)) == (0, 2, 0)
+
+
+def test_tamanho_invalido():
+    with pytest.raises(ValueError):
+        ProgramCache(-1)
@@ -0,0 +1,134 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox import callsite
+from lox import lox as lox_module
+from lox.ast import Call
+from lox.lox import ENGINES, Lox
+from lox.output import ListOutput
+from lox.parser import parse
+from lox.resolver import resolve
+
+
+def run(src: str, engine: str, lox: Lox | None = None) -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        (lox or Lox(engine)).run(src)
+    return f.getvalue()
+
+
+def test_resolvedor_cria_cache_apenas_para_globais():
+    program = resolve(parse("""
+        fun f(a) {
+            fun g() { return a; }
+            return g() + f(1);
+        }
+    """))
+    ret = program.body[0].body[1]
+    local, global_ = ret.value.left, ret.value.right
+    assert isinstance(local, Call) and local.site is None
+    assert global_.site.name == "f"
+    assert global_.site.nargs == 1
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_acertos_no_cache(engine: str):
+    callsite.reset_stats()
+    src = """
+        fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+        print fib(15);
+    """
+    lox = Lox(engine)
+    assert run(src, engine, lox) == "610.0\n"
+    info = callsite.cache_info()
+    assert info.hits + info.misses == 1973
+    assert info.hit_rate > 0.99
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_redefinir_funcao_invalida_cache(engine: str):
+    src = """
+        fun a() { return 1; }
+        fun b() { return 2; }
+        var f = a;
+        fun chama() { return f() + 0; }
+        print chama();
+        f = b;
+        print chama();
+        f = a;
+        print chama();
+    """
+    assert run(src, engine) == "1.0\n2.0\n1.0\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_redefinir_funcao_entre_execucoes(engine: str):
+    lox = Lox(engine)
+    run("fun a() { return 1; } var f = a; fun chama() { return f(); }", engine, lox)
+    assert run("print chama();", engine, lox) == "1.0\n"
+    run("fun b(x) { return x; } f = b;", engine, lox)
+    with pytest.raises(RuntimeError, match="número errado de argumentos"):
+        run("print chama();", engine, lox)
+    run('f = "texto";', engine, lox)
+    with pytest.raises(RuntimeError, match="texto não é uma função"):
+        run("print chama();", engine, lox)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_argumento_que_redefine_a_funcao(engine: str):
+    # A função é avaliada antes dos argumentos, como sem o cache
+    src = """
+        fun a(x) { return "a"; }
+        fun b(x) { return "b"; }
+        var f = a;
+        for (var i = 0; i < 3; i = i + 1) {
+            print f(f = b);
+            f = a;
+        }
+        print f(0);
+    """
+    assert run(src, engine) == "a\na\na\na\n"
+
+
+def test_variavel_global_comum_nao_invalida_cache():
+    callsite.reset_stats()
+    src = """
+        fun f() { return 1; }
+        var n = 0;
+        while (n < 100) n = n + f();
+    """
+    lox = Lox("tree")
+    run(src, "tree", lox)
+    info = callsite.cache_info()
+    assert info.misses == 1
+    assert info.hits == 99
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_programa_compartilhado_entre_instancias(engine: str):
+    instances = [Lox(engine, output=ListOutput()) for _ in range(2)]
+    define = instances[0].compile(
+        "fun conta(n) { var x = n; if (x < 1) return 0; return 1 + conta(x - 1); }"
+    )
+    call = instances[0].compile("print conta(k);")
+    for k, lox in enumerate(instances):
+        lox.ctx.define("k", 3.0 * (k + 1))
+        lox.execute(define)
+    for lox in instances * 2:
+        lox.execute(call)
+    assert [lox.output.lines for lox in instances] == [["3.0", "3.0"], ["6.0", "6.0"]]
+
+    # Cada instância tem os seus próprios caches para os mesmos CallSites
+    a, b = (lox.ctx.calls for lox in instances)
+    assert a.keys() == b.keys() and a
+    assert all(a[site] is not b[site] for site in a)
+
+
+def test_tabelas_de_estado_limitadas(monkeypatch):
+    monkeypatch.setattr(lox_module, "MAX_STATE", 4)
+    lox = Lox("tree", output=ListOutput())
+    for k in range(10):
+        lox.run(f"fun f{k}() {{ var x = {k}; return x; }} print f{k}();")
+        assert len(lox.ctx.calls) <= 4 and len(lox.ctx.free) <= 4
+    assert lox.output.lines == [f"{k}.0" for k in range(10)]
@@ -0,0 +1,119 @@
+import io
+from contextlib import redirect_stdout
+from datetime import date
+
+import pytest
+
+from lox.lox import ENGINES, Lox
+from lox.parser import parse
+from lox.runtime import LoxDate
+
+
+def run(src: str, engine: str) -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        Lox(engine).run(src)
+    return f.getvalue()
+
+
+def test_literal_convertido_pelo_parser():
+    for frontend in ["lark", "native"]:
+        [stmt] = parse("print '2024-02-29;", frontend=frontend).body
+        value = stmt.right.value
+        assert type(value) is LoxDate
+        assert value == date(2024, 2, 29)
+        assert value.ordinal == date(2024, 2, 29).toordinal()
+
+
+def test_desloca_datas():
+    d = LoxDate(2024, 2, 28)
+    assert d.shift(1.0) == date(2024, 2, 29)
+    assert d.shift(-59).ordinal == LoxDate(2023, 12, 31).ordinal
+    with pytest.raises(RuntimeError, match="número de dias inválido"):
+        d.shift(0.5)
+    with pytest.raises(RuntimeError, match="data fora dos limites"):
+        LoxDate(9999, 12, 31).shift(1.0)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize(
+    "expr, expected",
+    [
+        ("'2025-11-27 - '2024-01-01", "696"),
+        ("'2024-01-01 - '2025-11-27", "-696"),
+        ("-('2025-11-27 - '2024-01-01)", "-696"),
+        ("'2025-11-27 - '2024-01-01 + 1", "697.0"),
+        ("('2025-11-27 - '2024-01-01) / 2", "348.0"),
+        ("'2025-11-27 - '2024-01-01 == 696", "True"),
+        ("'2024-02-28 + 1", "2024-02-29"),
+        ("1 + '2024-12-31", "2025-01-01"),
+        ("'2024-03-01 - 1", "2024-02-29"),
+        ("'2024-01-01 < '2025-11-27", "True"),
+        ("'2024-01-01 >= '2025-11-27", "False"),
+        ("'2024-01-01 == '2024-01-01", "True"),
+        ("'2024-01-01 != '2024-01-02", "True"),
+        ("'2024-01-01 == 1", "False"),
+        ("['2025-11-27, '2024-01-01]", "[2025-11-27, 2024-01-01]"),
+        ("[1, 2, 3][('2024-01-03 - '2024-01-01)]", "3.0"),
+    ],
+)
+def test_operacoes_com_datas(engine, expr, expected):
+    assert run(f"var d = {expr}; print d;", engine) == expected + "\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize(
+    "expr, error",
+    [
+        ("'2024-01-01 - \"a\"", "operação inválida: -"),
+        ("'2024-01-01 < \"a\"", "operação inválida: <"),
+        ("'2024-01-01 + '2024-01-01", "operação inválida: 2024-01-01 + 2024-01-01"),
+        ("'2024-01-01 + 0.5", "número de dias inválido: 0.5"),
+    ],
+)
+def test_operacoes_invalidas(engine, expr, error):
+    with pytest.raises(RuntimeError) as info:
+        run(f"print {expr};", engine)
+    assert str(info.value) == error
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_operacoes_sobre_arrays(engine):
+    src = """
+    var ds = ['2024-03-01, '2024-01-01, '2024-02-01];
+    print min(ds);
+    print max(ds);
+    print diff(ds);
+    print diff([1, 4, 9]);
+    print min([3, 1, 2]);
+    print diff([]);
+    """
+    out = "2024-01-01\n2024-03-01\n[-60, 31]\n[3.0, 5.0]\n1.0\n[]\n"
+    assert run(src, engine) == out
+
+
+@pytest.mark.parametrize(
+    "src, error",
+    [
+        ("min([]);", "min: array vazia."),
+        ("max(1);", "max: 1.0 não é uma array."),
+        ("diff(['2024-01-01, 1]);", "diff: a array deve conter apenas números ou apenas datas."),
+        ('min(["a"]);', "min: a array deve conter apenas números ou apenas datas."),
+    ],
+)
+def test_erros_nas_operacoes_sobre_arrays(src, error):
+    with pytest.raises(RuntimeError) as info:
+        run(src, "tree")
+    assert str(info.value) == error
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_programas_podem_declarar_max_min_e_diff(engine):
+    src = """
+        fun max(a, b) { if (a > b) return a; return b; }
+        var min = 1;
+        var diff = 3;
+        print max(2, 5);
+        print min + diff;
+    """
+    assert run(src, engine) == "5.0\n4.0\n"
+    assert run("print max([1, 4, 2]);", engine) == "4.0\n"
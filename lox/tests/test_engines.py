@@ -0,0 +1,87 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.lox import ENGINES, Lox
+
+PROGRAMS = {
+    "aritmetica": "print 1 + 2 * 3; print (1 + 2) * 3; print 10 / 4; print -2 - 3;",
+    "comparacoes": 'print 1 < 2; print 2 <= 1; print "a" == "a"; print 1 == "1"; print nil != false;',
+    "strings": 'var s = "a"; s = s + "b"; print s + "c";',
+    "logica": "print nil or 1; print false and 2; print 1 and 2; print !nil;",
+    "escopos": """
+        var a = "global";
+        {
+            print a;
+            var a = "bloco";
+            print a;
+            { a = "alterado"; }
+            print a;
+        }
+        print a;
+    """,
+    "fib_loop": """
+        fun fib(n) {
+            var x = 0;
+            var y = 1;
+            for (var i = 0; i < n; i = i + 1) {
+                var aux = x;
+                x = y;
+                y = aux + y;
+            }
+            return y;
+        }
+        print fib(20);
+    """,
+    "fib_recur": """
+        fun fib(n) {
+            if (n < 2) return n;
+            return fib(n - 1) + fib(n - 2);
+        }
+        print fib(15);
+    """,
+    "closures": """
+        fun counter() {
+            var n = 0;
+            fun incr() {
+                n = n + 1;
+                return n;
+            }
+            return incr;
+        }
+        var c1 = counter();
+        var c2 = counter();
+        c1(); c1();
+        print c1();
+        print c2();
+    """,
+    "retorno_global": "print 1; return 2; print 3;",
+    "retorno_vazio": "fun f() { print 1; return; print 2; } print f();",
+    "erro_variavel": "print x;",
+    "erro_redefinicao": "{ var a = 1; var a = 2; }",
+    "erro_aridade": "fun f(a) {} f(1, 2);",
+    "erro_operacao": 'print "a" + 1;',
+}
+
+
+def run(src: str, engine: str) -> str:
+    lox = Lox(engine=engine)
+    try:
+        with redirect_stdout(io.StringIO()) as f:
+            lox.run(src)
+    except Exception as e:
+        return f.getvalue() + f"{e.__class__.__name__}: {e}"
+    return f.getvalue()
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_engines_produzem_mesma_saida(name: str, engine: str):
+    src = PROGRAMS[name]
+    assert run(src, engine) == run(src, "tree")
+
+
+def test_engine_invalida():
+    with pytest.raises(ValueError):
+        Lox(engine="nope")
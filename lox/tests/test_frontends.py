@@ -0,0 +1,172 @@
+import random
+from pathlib import Path
+
+import lark
+import pytest
+
+from lox.parser import parse
+from lox.scanner import LoxSyntaxError
+
+ROOT = Path(__file__).parent.parent
+
+# Nomes que começam com true/false/nil/this são evitados: o lexer do Lark dá
+# prioridade a LITERAL e quebra "truex" em dois tokens
+NAMES = ["a", "b", "x", "y", "n", "fib", "_tmp", "i2", "printer", "variavel", "f_or"]
+OPERATORS = ["+", "-", "*", "/", "<", "<=", ">", ">=", "==", "!="]
+
+
+class Generator:
+    """
+    Gera programas Lox aleatórios, sintaticamente válidos.
+    """
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+
+    def sep(self) -> str:
+        return self.random.choice([" ", " ", "\n", "  \n\t", " // comentário\n"])
+
+    def name(self) -> str:
+        return self.random.choice(NAMES)
+
+    def expr(self, depth: int = 0) -> str:
+        r = self.random
+        if depth > 3 or r.random() < 0.3:
+            return r.choice([
+                self.name(),
+                str(r.randint(0, 1000)),
+                f"{r.randint(0, 99)}.{r.randint(0, 99)}",
+                '"texto"',
+                '"várias\nlinhas"',
+                "'2025-11-27", "'2000-02-29",
+                "true", "false", "nil",
+            ])
+        kind = r.randrange(10)
+        if kind == 0:
+            return f"{self.expr(depth + 1)}{self.sep()}{r.choice(OPERATORS)} {self.expr(depth + 1)}"
+        if kind == 1:
+            return f"{r.choice(['!', '-'])}{self.expr(depth + 1)}"
+        if kind == 2:
+            return f"({self.expr(depth + 1)})"
+        if kind == 3:
+            return f"{self.expr(depth + 1)} {r.choice(['and', 'or'])}{self.sep()}{self.expr(depth + 1)}"
+        if kind == 4:
+            args = ", ".join(self.expr(depth + 1) for _ in range(r.randrange(3)))
+            return f"{self.name()}({args})"
+        if kind == 5:
+            assign = f"{self.name()} = {self.expr(depth + 1)}"
+            return assign if depth == 0 else f"({assign})"
+        if kind == 7:
+            items = ", ".join(self.expr(depth + 1) for _ in range(r.randrange(4)))
+            return f"[{items}]"
+        if kind == 8:
+            start, end = r.choice(["", self.expr(depth + 1)]), r.choice(["", self.expr(depth + 1)])
+            index = r.choice([self.expr(depth + 1), f"{start}:{end}"])
+            return f"{self.name()}[{index}]"
+        if kind == 9:
+            assign = f"{self.name()}[{self.expr(depth + 1)}] = {self.expr(depth + 1)}"
+            return assign if depth == 0 else f"({assign})"
+        return f"{self.name()}()()"
+
+    def decl(self, depth: int = 0) -> str:
+        r = self.random
+        sep = self.sep()
+        kind = r.randrange(4)
+        if kind == 0:
+            return f"var {self.name()}{r.choice(['', ' = ' + self.expr()])};{sep}"
+        if kind == 1 and depth < 3:
+            params = ", ".join(r.sample(NAMES, r.randrange(4)))
+            return f"fun {self.name()}({params}) {{{sep}{self.body(depth + 1)}}}{sep}"
+        return self.stmt(depth)
+
+    def stmt(self, depth: int = 0) -> str:
+        r = self.random
+        sep = self.sep()
+        kind = r.randrange(8 if depth < 3 else 3)
+        if kind == 0:
+            return f"print {self.expr()};{sep}"
+        if kind == 1:
+            return f"{self.expr()};{sep}"
+        if kind == 2:
+            return f"return{r.choice(['', ' ' + self.expr()])};{sep}"
+        if kind == 3:
+            return "{" + sep + self.body(depth + 1) + "}" + sep
+        if kind == 4:
+            else_ = f"else {self.stmt(depth + 1)}" if r.random() < 0.5 else ""
+            return f"if ({self.expr()}){sep}{self.stmt(depth + 1)}{else_}"
+        if kind == 5:
+            return f"while ({self.expr()}) {self.stmt(depth + 1)}"
+        if kind == 6:
+            init = r.choice([";", f"var i = {self.expr()};", f"{self.expr()};"])
+            cond = r.choice(["", self.expr()])
+            incr = r.choice(["", self.expr()])
+            return f"for ({init} {cond}; {incr}) {self.stmt(depth + 1)}"
+        return f"print {self.expr()};{sep}"
+
+    def body(self, depth: int = 0) -> str:
+        return "".join(self.decl(depth) for _ in range(self.random.randrange(5)))
+
+    def program(self) -> str:
+        return "".join(self.decl() for _ in range(self.random.randint(1, 10)))
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_frontends_produzem_mesma_ast(seed: int):
+    src = Generator(seed).program()
+    assert parse(src, frontend="native") == parse(src, frontend="lark")
+
+
+@pytest.mark.parametrize("path", sorted(ROOT.glob("*.lox")), ids=lambda p: p.name)
+def test_frontends_em_exemplos(path: Path):
+    src = path.read_text()
+    assert parse(src, frontend="native") == parse(src, frontend="lark")
+
+
+def test_linhas_dos_operadores():
+    src = '"a\nb" +\n\n1 // comentário\n* 2;'
+    assert parse(src, frontend="native") == parse(src, frontend="lark")
+    [stmt] = parse(src, frontend="native").body
+    assert [stmt.expr.operator.line, stmt.expr.right.operator.line] == [2, 5]
+
+
+def test_for_com_expressao_inicial():
+    src = "for (i = 0; i < 3; i = i + 1) print i;"
+    assert parse(src, frontend="native") == parse(src, frontend="lark")
+
+
+@pytest.mark.parametrize(
+    "src",
+    [
+        "print 1",
+        "(a) = 1;",
+        "-a = 1;",
+        "(a[0]) = 1;",
+        "a[0:1] = 1;",
+        "a[0]() = 1;",
+        "print [1,];",
+        "print a[];",
+        "print 1.;",
+        'print "abc',
+        "print @;",
+        "print '2025-1-1;",
+        "print '2025-02-30;",
+        "{ print 1;",
+        "fun (a) {}",
+    ],
+)
+def test_erros_de_sintaxe(src: str):
+    with pytest.raises(lark.LarkError):
+        parse(src, frontend="lark")
+    with pytest.raises(LoxSyntaxError):
+        parse(src, frontend="native")
+
+
+@pytest.mark.parametrize("src", ["class A {}", "print a.b;", "print this;", "print super.x;"])
+def test_recursos_nao_suportados(src: str):
+    with pytest.raises(LoxSyntaxError, match="não são suportados"):
+        parse(src, frontend="native")
+
+
+def test_frontend_invalido():
+    with pytest.raises(ValueError):
+        parse("print 1;", frontend="nope")
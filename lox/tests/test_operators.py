@@ -0,0 +1,63 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.ast import Binary, Literal
+from lox.lox import ENGINES, Lox
+from lox.operators import BINARY_OPS, invalid
+from lox.token import Token, TokenType
+
+# Mensagens produzidas antes dos caminhos rápidos de float/float
+ERRORS = [
+    ('1 - "a"', TypeError, "unsupported operand type(s) for -: 'float' and 'str'"),
+    ('"a" - 1', TypeError, "unsupported operand type(s) for -: 'str' and 'float'"),
+    ('"a" - "b"', RuntimeError, "operação inválida: -"),
+    ('"a" * nil', RuntimeError, "operação inválida: *"),
+    ("nil < nil", RuntimeError, "operação inválida: <"),
+    ('1 + "a"', RuntimeError, "operação inválida: 1.0 + a"),
+    ('"a" + nil', RuntimeError, "operação inválida: a + None"),
+    ("1 / 0", ZeroDivisionError, "float division by zero"),
+    ("true + true", RuntimeError, "operação inválida: True + True"),
+    ('"a" <= "b"', RuntimeError, "operação inválida: <="),
+    ('1 > "a"', TypeError, "'>' not supported between instances of 'float' and 'str'"),
+]
+
+
+def run(src: str, engine: str) -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        Lox(engine).run(src)
+    return f.getvalue()
+
+
+def test_binary_escolhe_o_operador_na_construcao():
+    for type_, op in BINARY_OPS.items():
+        expr = Binary(Literal(1.0), Token(type_, "", 1), Literal(2.0))
+        assert expr.apply is op
+    expr = Binary(Literal(1.0), Token(TokenType.DOT, ".", 1), Literal(2.0))
+    assert expr.apply is invalid
+    assert expr == Binary(Literal(1.0), Token(TokenType.DOT, ".", 1), Literal(2.0))
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("expr, error, message", ERRORS)
+def test_mensagens_de_erro(engine: str, expr: str, error: type, message: str):
+    # As variáveis impedem que o otimizador avalie a expressão antes
+    left, op, right = expr.split(" ")
+    src = f"var a = {left}; var b = {right}; print a {op} b;"
+    with pytest.raises(error) as info:
+        run(src, engine)
+    assert str(info.value) == message
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_operacoes_numericas(engine: str):
+    src = """
+        var a = 7; var b = 2;
+        print a + b; print a - b; print a * b; print a / b;
+        print a < b; print a <= b; print a > b; print a >= b;
+        print a == b; print a != b; print a == "7"; print "x" + "y";
+        print true >= 1;
+    """
+    expected = "9.0 5.0 14.0 3.5 False False True True False True False xy True"
+    assert run(src, engine).split() == expected.split()
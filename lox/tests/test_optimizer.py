@@ -0,0 +1,111 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.ast import Binary, Block, If, Literal, Print, Var, While
+from lox.lox import ENGINES, Lox
+from lox.optimizer import optimize
+from lox.parser import parse
+
+from test_engines import PROGRAMS
+
+
+def optimized(src: str) -> list:
+    return optimize(parse(src)).body
+
+
+def run(src: str, engine: str = "tree", optimize: bool = True) -> str:
+    lox = Lox(engine, optimize=optimize)
+    try:
+        with redirect_stdout(io.StringIO()) as f:
+            lox.run(src)
+    except Exception as e:
+        return f.getvalue() + f"{e.__class__.__name__}: {e}"
+    return f.getvalue()
+
+
+@pytest.mark.parametrize(
+    "src, value",
+    [
+        ("1 + 2 * 3", 7.0),
+        ("-(10 / 4)", -2.5),
+        ("!true", False),
+        ('"a" + "b" + "c"', "abc"),
+        ("1 < 2 == !nil", True),
+        ('1 == "1"', False),
+        ("nil or 2", 2.0),
+        ("false and 1", False),
+    ],
+)
+def test_dobra_constantes(src: str, value):
+    assert optimized(f"print {src};") == [Print(Literal(value))]
+
+
+@pytest.mark.parametrize("src", ['"a" - 1', '"a" + 1', "-nil", "1 / 0", "x + 1"])
+def test_operacoes_invalidas_nao_sao_dobradas(src: str):
+    [stmt] = optimized(f"print {src};")
+    assert stmt == parse(f"print {src};").body[0]
+
+
+def test_erro_acontece_no_mesmo_ponto():
+    src = 'print 1 + 1; print "a" - 1; print 3;'
+    assert run(src) == run(src, optimize=False)
+    assert run(src).startswith("2.0\n")
+
+
+def test_ramos_mortos():
+    assert optimized("if (1 > 2) print 1; else print 2;") == [Print(Literal(2.0))]
+    assert optimized("if (true) { print 1; print 2; }") == [Print(Literal(1.0)), Print(Literal(2.0))]
+    assert optimized("if (nil) print 1;") == []
+    assert optimized("while (false) print 1;") == []
+
+
+def test_blocos_sem_declaracoes_sao_achatados():
+    body = optimized("{ print 1; { print 2; { var x = 3; } } }")
+    assert body == [Print(Literal(1.0)), Print(Literal(2.0)), Block([Var("x", Literal(3.0))])]
+
+
+def test_if_com_bloco_de_um_comando():
+    [stmt] = optimized("if (x) { print 1; } else { var y; }")
+    assert stmt == If(stmt.cond, Print(Literal(1.0)), Block([Var("y", Literal(None))]))
+
+
+def test_for_sem_condicao():
+    [stmt] = optimized("for (;;) print 1 + 1;")
+    assert stmt == While(Literal(True), Print(Literal(2.0)))
+
+
+def test_ast_original_nao_e_alterada():
+    program = parse("{ print 1 + 2; if (false) print 3; }")
+    copy = parse("{ print 1 + 2; if (false) print 3; }")
+    optimize(program)
+    assert program == copy
+    assert isinstance(program.body[0].body[0].right, Binary)
+
+
+LOOPS = """
+fun primeiro(n) {
+    for (var i = 0;; i = i + 1) {
+        if (i * i > n) return i;
+    }
+}
+print primeiro(50);
+fun conta() {
+    var k = 0;
+    while (true) { k = k + 1; if (k == 3) return k; }
+}
+print conta();
+"""
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_laco_com_condicao_constante(engine: str):
+    assert run(LOOPS, engine) == "8.0\n3.0\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_otimizacao_preserva_saida(name: str, engine: str):
+    src = PROGRAMS[name]
+    assert run(src, engine) == run(src, engine, optimize=False)
@@ -0,0 +1,91 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.env import Env
+from lox.lox import ENGINES, Lox
+from lox.output import CallbackOutput, ListOutput, StreamOutput
+from lox.runtime import NativeFunction
+
+SRC = 'fun f(x) { print x; } f(1); print "a"; print [2, nil];'
+LINES = ["1.0", "a", "[2.0, None]"]
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_lista(engine):
+    output = ListOutput()
+    Lox(engine, output=output).run(SRC)
+    assert output.lines == LINES
+    assert output.getvalue() == "1.0\na\n[2.0, None]\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_callback_em_lotes(engine):
+    batches = []
+    Lox(engine, output=CallbackOutput(batches.append, batch=2)).run(SRC)
+    assert batches == [LINES[:2], LINES[2:]]
+
+
+def test_stream_escreve_em_lotes():
+    class Stream(io.StringIO):
+        writes = 0
+
+        def write(self, s):
+            self.writes += 1
+            return super().write(s)
+
+    stream = Stream()
+    Lox("vm", output=StreamOutput(stream, batch=1000)).run(
+        "for (var i = 0; i < 2500; i = i + 1) print i;"
+    )
+    assert stream.writes == 3
+    assert stream.getvalue().splitlines() == [f"{i}.0" for i in range(2500)]
+
+
+def test_padrao_escreve_cada_linha():
+    seen = []
+
+    class Stream(io.StringIO):
+        def write(self, s):
+            seen.append(s)
+            return super().write(s)
+
+    # Cada print chega ao stream antes de o programa continuar
+    lox = Lox("closure", stdout=Stream())
+    lox.ctx.define("escritas", NativeFunction(lambda: float(len(seen)), 0))
+    lox.run("print 1; print escritas(); print 2;")
+    assert seen == ["1.0\n", "1.0\n", "2.0\n"]
+
+
+def test_saida_entregue_antes_do_erro():
+    output = CallbackOutput(lambda lines: seen.extend(lines), batch=100)
+    seen = []
+    with pytest.raises(RuntimeError):
+        Lox("closure", output=output).run("print 1; print x;")
+    assert seen == ["1.0"]
+
+
+def test_padrao_usa_stdout_do_momento():
+    lox = Lox("tree")
+    with redirect_stdout(io.StringIO()) as f:
+        lox.run(SRC)
+    assert f.getvalue().splitlines() == LINES
+    with redirect_stdout(io.StringIO()) as g:
+        lox.run("print 3;")
+    assert g.getvalue() == "3.0\n"
+
+
+def test_instancias_nao_compartilham_saida():
+    a, b = ListOutput(), ListOutput()
+    Lox("vm", output=a).run("print 1;")
+    Lox("vm", output=b).run("print 2;")
+    assert (a.lines, b.lines) == (["1.0"], ["2.0"])
+
+
+def test_apenas_o_env_global_tem_output():
+    output = ListOutput()
+    lox = Lox("tree", output=output)
+    assert lox.ctx.output is output
+    assert lox.ctx.parent.output is None
+    assert Env().output is None
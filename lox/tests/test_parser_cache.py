@@ -0,0 +1,52 @@
+import lark
+import pytest
+
+from lox.parser import SOURCE, load_grammar
+
+
+def test_cache_e_criado_e_reaproveitado(tmp_path, monkeypatch):
+    grammar = load_grammar(cache_dir=tmp_path)
+    [path] = tmp_path.iterdir()
+
+    # Na segunda vez as tabelas vêm do arquivo, sem reconstruir a gramática
+    def fail(*args, **kwargs):
+        raise AssertionError("gramática reconstruída")
+
+    monkeypatch.setattr(lark.Lark, "__init__", fail)
+    cached = load_grammar(cache_dir=tmp_path)
+    src = "var x = 1 + 2; print x;"
+    assert cached.parse(src, start="program") == grammar.parse(src, start="program")
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_cache_invalidado_quando_a_gramatica_muda(tmp_path):
+    load_grammar(cache_dir=tmp_path)
+    changed = SOURCE.replace('"print"', '"imprima"')
+    grammar = load_grammar(changed, cache_dir=tmp_path)
+
+    assert len(list(tmp_path.iterdir())) == 2
+    grammar.parse("imprima 1;", start="program")
+    with pytest.raises(lark.LarkError):
+        grammar.parse("print 1;", start="program")
+
+
+def test_cache_corrompido_e_reconstruido(tmp_path):
+    load_grammar(cache_dir=tmp_path)
+    [path] = tmp_path.iterdir()
+    path.write_bytes(b"lixo")
+
+    grammar = load_grammar(cache_dir=tmp_path)
+    grammar.parse("print 1;", start="program")
+    assert path.read_bytes() != b"lixo"
+
+
+def test_cache_gravavel_por_outros_e_ignorado(tmp_path, monkeypatch):
+    load_grammar(cache_dir=tmp_path)
+    [path] = tmp_path.iterdir()
+    path.chmod(0o666)
+
+    loaded = []
+    monkeypatch.setattr(lark.Lark, "load", lambda f: loaded.append(f))
+    grammar = load_grammar(cache_dir=tmp_path)
+    grammar.parse("print 1;", start="program")
+    assert loaded == []
@@ -0,0 +1,130 @@
+import io
+import json
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox import interpreter
+from lox.lox import Lox, main
+from lox.output import ListOutput
+from lox.profiler import Profiler
+from lox.runtime import LoxFunction, NativeFunction
+
+SRC = """\
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+
+fun main() {
+    var t = clock();
+    for (var i = 0; i < 3; i = i + 1) {
+        print fib(5);
+    }
+}
+main();
+"""
+
+
+def profile(src: str) -> Profiler:
+    profiler = Profiler()
+    with redirect_stdout(io.StringIO()):
+        Lox("tree", profiler=profiler).run(src)
+    return profiler
+
+
+def test_chamadas_por_funcao():
+    profiler = profile(SRC)
+    stats = {(s.name, s.line): s for s in profiler.stats()}
+
+    assert stats["fib", 1].calls == 3 * 15
+    assert stats["main", 6].calls == 1
+    assert stats["<time>", 0].calls == 1
+
+    main_ = stats["main", 6]
+    assert main_.cumtime >= stats["fib", 1].cumtime
+    assert main_.tottime <= main_.cumtime
+    assert profiler.stats()[0] is main_
+
+
+def test_linhas_executadas():
+    profiler = profile(SRC)
+    # if em todas as chamadas, mais o `return n` nos casos base
+    assert profiler.lines[2] == 45 + 24
+    assert profiler.lines[3] == 21
+    assert profiler.lines[9] == 3
+    assert profiler.lines[12] == 1
+
+
+def test_ordenacao():
+    profiler = profile(SRC)
+    assert profiler.stats("calls")[0].name == "fib"
+    assert [s.name for s in profiler.stats("name")] == ["<time>", "fib", "main"]
+    assert [s.line for s in profiler.stats("line")] == [0, 1, 6]
+
+
+def test_nada_e_substituido():
+    registry = dict(interpreter.exec.registry)
+    calls = LoxFunction.call, NativeFunction.call
+
+    def check():
+        assert dict(interpreter.exec.registry) == registry
+        assert (LoxFunction.call, NativeFunction.call) == calls
+        return 0
+
+    lox = Lox("tree", profiler=Profiler(), output=ListOutput())
+    lox.ctx.define("check", NativeFunction(check, 0))
+    lox.run("fun f() { return check(); } f();")
+    with pytest.raises(RuntimeError):
+        lox.run("fun g() { return h(); } g();")
+    check()
+
+
+def test_outras_instancias_nao_sao_medidas():
+    plain = Lox("tree", output=ListOutput())
+    plain.run("fun g() { return 2; }")
+
+    def run_plain():
+        plain.run("print g();")
+        return 0
+
+    profiler = Profiler()
+    lox = Lox("tree", profiler=profiler, output=ListOutput())
+    lox.ctx.define("outra", NativeFunction(run_plain, 0))
+    lox.run("fun f() { return outra(); } f(); f();")
+    assert plain.output.lines == ["2.0", "2.0"]
+    assert {stats.name: stats.calls for stats in profiler.stats()} == {"f": 2, "<run_plain>": 2}
+
+
+def test_cli_json(tmp_path, capsys):
+    path = tmp_path / "fib.lox"
+    path.write_text(SRC)
+    out = tmp_path / "perfil.json"
+
+    main([str(path), "--profile", "--profile-json", str(out)])
+    assert capsys.readouterr().out == "5.0\n" * 3
+
+    data = json.loads(out.read_text())
+    assert [f["name"] for f in data["functions"]][0] == "main"
+    assert data["lines"]["12"] == 1
+
+
+def test_profiler_exige_engine_tree():
+    with pytest.raises(ValueError):
+        Lox("vm", profiler=Profiler())
+
+
+def test_chamadas_em_cauda():
+    profiler = profile(
+        """
+        fun loop(n) { if (n == 0) return 0; return loop(n - 1); }
+        fun g(x) { return x + 1; }
+        fun f(x) { return g(x); }
+        loop(10);
+        print f(1);
+        """
+    )
+    calls = {stats.name: stats.calls for stats in profiler.stats()}
+    assert calls == {"loop": 11, "f": 1, "g": 1}
+    cumtime = {stats.name: stats.cumtime for stats in profiler.stats()}
+    assert cumtime["f"] >= cumtime["g"]
@@ -0,0 +1,101 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.ast import Assign, ExprStmt, Function, Identifier, Return
+from lox.lox import ENGINES, Lox, parse
+from lox.resolver import resolve
+
+
+def run(src: str, engine: str) -> str:
+    lox = Lox(engine=engine)
+    try:
+        with redirect_stdout(io.StringIO()) as f:
+            lox.run(src)
+    except Exception as e:
+        return f.getvalue() + f"{e.__class__.__name__}: {e}"
+    return f.getvalue()
+
+
+def test_enderecos_lexicos():
+    program = resolve(
+        parse("""
+        var g = 1;
+        fun f(a) {
+            var b = a;
+            fun h() { return b + g; }
+            b = 2;
+            return h;
+        }
+        """)
+    )
+    f = program.body[1]
+    assert isinstance(f, Function)
+    assert f.slot == -1
+    assert f.scope is not None and f.scope.names == ["a", "b", "h"]
+
+    h = f.body[1]
+    assert isinstance(h, Function) and isinstance(h.body[0], Return)
+    b, g = h.body[0].value.left, h.body[0].value.right  # type: ignore
+    assert isinstance(b, Identifier) and (b.depth, b.slot) == (1, 1)
+    assert isinstance(g, Identifier) and g.depth == -1
+
+    assign = f.body[2]
+    assert isinstance(assign, ExprStmt) and isinstance(assign.expr, Assign)
+    assert (assign.expr.depth, assign.expr.slot) == (0, 1)
+
+
+def test_escopos_capturados():
+    program = resolve(
+        parse("""
+        fun f() { var x = 1; { var y = x; } { } }
+        fun g() { var x = 1; fun h() { return x; } }
+        """)
+    )
+    f, g = program.body
+    assert isinstance(f, Function) and isinstance(g, Function)
+    assert f.scope is not None and not f.scope.captures
+    assert f.body[1].scope is not None and not f.body[1].scope.captures  # type: ignore
+    assert f.body[2].scope is None  # type: ignore
+    assert g.scope is not None and g.scope.captures
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize(
+    "src, expect",
+    [
+        # Variável local lida antes da declaração usa o escopo externo
+        ('var a = "g"; { print a; var a = "l"; print a; }', "g\nl\n"),
+        # Inicializador enxerga a variável externa com o mesmo nome
+        ('var a = "g"; { var a = a + "!"; print a; }', "g!\n"),
+        # Função declarada antes da variável local que ela captura
+        ("{ fun f() { return x; } var x = 1; print f(); }", "1.0\n"),
+        # Atribuição antes da declaração local altera a variável externa
+        ('var a = "g"; { a = "x"; var a = "l"; } print a;', "x\n"),
+        # Cada iteração do laço tem um escopo novo
+        ("for (var i = 0; i < 2; i = i + 1) { var j = i; print j; }", "0.0\n1.0\n"),
+        # Frames reaproveitados não são compartilhados entre ativações
+        (
+            "fun f(n) { { var x = n; if (n > 0) f(n - 1); print x; } } f(2);",
+            "0.0\n1.0\n2.0\n",
+        ),
+        (
+            """
+            var a; var b;
+            for (var i = 0; i < 2; i = i + 1) {
+                var j = i;
+                fun g() { return j; }
+                if (i == 0) a = g; else b = g;
+            }
+            print a(); print b();
+            """,
+            "0.0\n1.0\n",
+        ),
+        ("fun f(a, a) {} f(1, 2);", "RuntimeError: redefinindo variável a."),
+        ("{ print y; var y; }", "RuntimeError: variável não existe: y"),
+    ],
+)
+def test_semantica_dos_escopos(src: str, expect: str, engine: str):
+    assert run(src, engine) == expect
+
@@ -0,0 +1,81 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.ast import Call, Identifier, Literal, LogicAnd, LogicOr, Print, Program
+from lox.lox import ENGINES, Lox
+from lox.optimizer import optimize
+
+
+def run(src: str, engine: str, optimize: bool = True) -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        Lox(engine, optimize=optimize).run(src)
+    return f.getvalue()
+
+
+PRELUDE = """
+    var chamadas = 0;
+    fun efeito(x) { chamadas = chamadas + 1; print "efeito"; return x; }
+"""
+
+
+@pytest.mark.parametrize("optimize", [True, False])
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_lado_direito_nao_e_avaliado(engine: str, optimize: bool):
+    src = PRELUDE + """
+        print false and efeito(1);
+        print nil and efeito(1);
+        print true or efeito(1);
+        print 0 or efeito(1);
+        var n = 0;
+        print n > 0 and efeito(n);
+        print chamadas;
+    """
+    assert run(src, engine, optimize).split() == ["False", "None", "True", "0.0", "False", "0.0"]
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_lado_direito_e_avaliado_quando_necessario(engine: str):
+    src = PRELUDE + """
+        print true and efeito("a");
+        print nil or efeito("b");
+        print efeito(false) or efeito(nil);
+        print chamadas;
+    """
+    expected = ["efeito", "a", "efeito", "b", "efeito", "efeito", "None", "4.0"]
+    assert run(src, engine).split() == expected
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_cadeias_e_atribuicoes(engine: str):
+    src = PRELUDE + """
+        var a = 1;
+        false and (a = 2);
+        true or (a = 3);
+        print a;
+        print efeito(1) and efeito(nil) and efeito(2);
+        print efeito(nil) or efeito(false) or efeito("fim") or efeito(3);
+        for (var i = 0; i < 3 and efeito(true); i = i + 1) {}
+        print chamadas;
+    """
+    out = run(src, engine).split()
+    assert [x for x in out if x != "efeito"] == ["1.0", "None", "fim", "8.0"]
+
+
+def test_otimizador_dobra_lado_esquerdo_constante():
+    f = Call(Identifier("f"), [])
+    program = optimize(Program([
+        Print(LogicAnd(Literal(False), f)),
+        Print(LogicAnd(Literal(1.0), f)),
+        Print(LogicOr(Literal(None), f)),
+        Print(LogicOr(Literal("x"), f)),
+        Print(LogicAnd(f, Literal(False))),
+    ]))
+    assert [stmt.right for stmt in program.body] == [
+        Literal(False),
+        f,
+        f,
+        Literal("x"),
+        LogicAnd(f, Literal(False)),
+    ]
@@ -0,0 +1,81 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.lox import ENGINES, Lox, main
+from lox.profiler import Profiler
+from lox.scanner import LoxSyntaxError, declarations
+
+SRC = """\
+// comentário
+var a = 1; var b = "duas
+linhas";
+fun soma(n) {
+    if (n < 1) return 0;
+    return n + soma(n - 1);
+}
+if (a > 0) print soma(3);
+else print "não";
+if (a < 0) { print 1; } else { print [a, b]; }
+for (var i = 0; i < 2; i = i + 1) print i;
+print '2024-01-02 - '2024-01-01; // fim
+"""
+
+
+def run_stream(src: str, engine: str, profiler: Profiler | None = None) -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        Lox(engine, profiler=profiler).run_stream(io.StringIO(src))
+    return f.getvalue()
+
+
+def test_divide_declaracoes():
+    decls = list(declarations(io.StringIO(SRC)))
+    assert [line for line, _ in decls] == [1, 2, 4, 8, 10, 11, 12]
+    assert decls[1][1] == 'var b = "duas\nlinhas";\n'
+    assert decls[3][1] == 'if (a > 0) print soma(3);\nelse print "não";\n'
+    assert "".join(src for _, src in decls) == SRC
+
+
+def test_declaracoes_lidas_sob_demanda():
+    read = []
+
+    def lines():
+        for line in ["print 1;\n", "print 2;\n", "print 3;\n"]:
+            read.append(line)
+            yield line
+
+    decls = declarations(lines())
+    assert next(decls) == (1, "print 1;\n")
+    assert len(read) == 2  # o próximo token decide se a declaração terminou
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_mesma_saida_que_run(engine):
+    with redirect_stdout(io.StringIO()) as f:
+        Lox(engine).run(SRC)
+    assert run_stream(SRC, engine) == f.getvalue()
+
+
+def test_executa_antes_de_ler_o_restante():
+    src = "print 1;\nprint 2;\nprint (;\n"
+    with redirect_stdout(io.StringIO()) as f, pytest.raises(LoxSyntaxError, match="linha 3"):
+        Lox("tree").run_stream(io.StringIO(src))
+    assert f.getvalue() == "1.0\n2.0\n"
+
+
+def test_linhas_no_profiler():
+    profiler = Profiler()
+    run_stream(SRC, "tree", profiler)
+    assert profiler.lines[5] == 4 + 1  # if em cada chamada, mais o `return 0`
+    assert profiler.lines[12] == 1
+    assert {s.line for s in profiler.stats() if s.name == "soma"} == {4}
+
+
+def test_opcao_stream(tmp_path, capsys):
+    path = tmp_path / "programa.lox"
+    path.write_text(SRC)
+    main([str(path), "--stream"])
+    stream = capsys.readouterr().out
+    main([str(path)])
+    assert stream == capsys.readouterr().out
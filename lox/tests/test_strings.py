@@ -0,0 +1,98 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.lox import ENGINES, Lox
+from lox.operators import ROPE_THRESHOLD, add
+from lox.runtime import LoxRope
+
+
+def run(src: str, engine: str) -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        Lox(engine).run(src)
+    return f.getvalue()
+
+
+def test_rope_compartilha_partes():
+    s = LoxRope(["a" * ROPE_THRESHOLD, "b"])
+    t = s.concat("c")
+    u = t.concat("d")
+    assert t.parts is s.parts is u.parts
+    assert len(u) == ROPE_THRESHOLD + 3
+    assert str(s) == "a" * ROPE_THRESHOLD + "b"
+    assert str(u) == "a" * ROPE_THRESHOLD + "bcd"
+
+
+def test_rope_derivada_nao_altera_a_original():
+    s = LoxRope(["x" * ROPE_THRESHOLD])
+    t = s.concat("1")
+    u = s.concat("2")  # mesmo prefixo de t: copia as partes
+    assert u.parts is not t.parts
+    assert str(t).endswith("1")
+    assert str(u).endswith("2")
+    assert str(s) == "x" * ROPE_THRESHOLD
+
+
+def test_add_produz_rope_so_para_strings_longas():
+    assert type(add("a", "b")) is str
+    rope = add("a" * ROPE_THRESHOLD, "b")
+    assert type(rope) is LoxRope
+    assert type(add(rope, "c")) is LoxRope
+    assert add(rope, "c") == "a" * ROPE_THRESHOLD + "bc"
+
+
+CONCAT = f"""
+var s = "";
+for (var i = 0; i < {ROPE_THRESHOLD}; i = i + 1) s = s + "ab";
+var t = "";
+for (var i = 0; i < {ROPE_THRESHOLD}; i = i + 1) t = t + "a" + "b";
+"""
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_concatenacao_repetida(engine):
+    expected = "ab" * ROPE_THRESHOLD
+    out = run(CONCAT + "print s; print len(s); print s == t; print s != t;", engine)
+    assert out == f"{expected}\n{2.0 * ROPE_THRESHOLD}\nTrue\nFalse\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_rope_igual_a_str(engine):
+    src = CONCAT + f"""
+    var u = "{"ab" * ROPE_THRESHOLD}";
+    print s == u;
+    print u == s;
+    print s == s + "";
+    print s == 1;
+    print s != nil;
+    """
+    assert run(src, engine) == "True\nTrue\nTrue\nFalse\nTrue\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_concatenacoes_independentes(engine):
+    src = CONCAT + """
+    var a = s + "1";
+    var b = s + "2";
+    print len(a) == len(s) + 1;
+    print a == b;
+    print a == s + "1";
+    """
+    assert run(src, engine) == "True\nFalse\nTrue\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize(
+    "expr, error, msg",
+    [
+        ("s < s", RuntimeError, "operação inválida: <"),
+        ("s - 1", TypeError, "unsupported operand type(s) for -: 'str' and 'float'"),
+        ("1 > s", TypeError, "'>' not supported between instances of 'float' and 'str'"),
+        ("s + nil", RuntimeError, "operação inválida: " + "ab" * ROPE_THRESHOLD + " + None"),
+    ],
+)
+def test_erros_iguais_aos_de_str(engine, expr, error, msg):
+    with pytest.raises(error) as info:
+        run(CONCAT + f"print {expr};", engine)
+    assert str(info.value) == msg
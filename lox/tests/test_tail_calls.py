@@ -0,0 +1,89 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.interpreter import LoxReturn
+from lox.lox import ENGINES, Lox
+from lox.parser import parse
+from lox.resolver import resolve
+
+
+def run(src: str, engine: str) -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        Lox(engine).run(src)
+    return f.getvalue()
+
+
+def test_resolvedor_marca_chamadas_de_cauda():
+    program = resolve(parse("""
+        fun f(n) {
+            if (n > 0) { var m = n - 1; return f(m); }
+            return 1 + f(0);
+        }
+        return f(1);
+    """))
+    function, top = program.body
+    [if_, last] = function.body
+    assert if_.then_body.body[1].tail
+    assert not last.tail
+    assert not top.tail
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_recursao_de_cauda_profunda(engine: str):
+    src = """
+        fun conta(n, acc) {
+            if (n == 0) return acc;
+            return conta(n - 1, acc + 1);
+        }
+        print conta(1000000, 0);
+    """
+    assert run(src, engine) == "1000000.0\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_recursao_mutua(engine: str):
+    src = """
+        fun par(n) { if (n == 0) return true; return impar(n - 1); }
+        fun impar(n) { if (n == 0) return false; return par(n - 1); }
+        print par(50001);
+    """
+    assert run(src, engine) == "False\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_closures_criadas_antes_da_chamada_de_cauda(engine: str):
+    src = """
+        fun guarda(n, f) {
+            if (n == 0) return f;
+            var x = n;
+            fun g() { return x + f(); }
+            return guarda(n - 1, g);
+        }
+        fun zero() { return 0; }
+        print guarda(100, zero)();
+    """
+    assert run(src, engine) == "5050.0\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_chamada_de_cauda_de_funcao_nativa(engine: str):
+    src = """
+        fun f() { { var a = 1; return clock(); } }
+        print f() > 0;
+    """
+    assert run(src, engine) == "True\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_erro_na_chamada_de_cauda(engine: str):
+    with pytest.raises(RuntimeError, match="número errado de argumentos"):
+        run("fun f(a) { return f(); } f(1);", engine)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_retorno_global_de_chamada(engine: str):
+    with pytest.raises(LoxReturn) as info:
+        run("fun f() { return 42; } return f();", engine)
+    assert info.value.value == 42
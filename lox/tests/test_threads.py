@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from lox import callsite
+from lox.lox import ENGINES, Lox
+from lox.output import ListOutput
+from lox.profiler import Profiler
+from lox.runtime import LoxFunction, NativeFunction
+
+# Todas as instâncias usam os mesmos nomes globais
+SRC = """
+var total = 0;
+fun soma(n) {{
+    if (n == 0) return 0;
+    return n + soma(n - 1);
+}}
+for (var i = 0; i < 200; i = i + 1) {{
+    total = total + {k};
+}}
+print total;
+print soma({k});
+var s = "";
+for (var i = 0; i < 300; i = i + 1) s = s + "{k}";
+print len(s);
+"""
+
+
+def expected(k: int) -> list[str]:
+    return [f"{200.0 * k}", f"{k * (k + 1) / 2}", f"{300.0 * len(str(k))}"]
+
+
+def run(engine: str, k: int) -> list[str]:
+    lines = []
+    for _ in range(3):
+        output = ListOutput()
+        Lox(engine, output=output).run(SRC.format(k=k))
+        lines.extend(output.lines)
+    return lines
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_instancias_isoladas(engine):
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(run, [engine] * 32, range(32)))
+    for k, lines in enumerate(results):
+        assert lines == expected(k) * 3
+
+
+def test_engines_misturadas():
+    engines = sorted(ENGINES) * 8
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(run, engines, range(len(engines))))
+    for k, lines in enumerate(results):
+        assert lines == expected(k) * 3
+
+
+def test_mesma_instancia_serializada():
+    output = ListOutput()
+    lox = Lox("closure", output=output)
+    lox.run("var n = 0;")
+    src = "for (var i = 0; i < 1000; i = i + 1) n = n + 1;"
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: lox.run(src), range(32)))
+    lox.run("print n;")
+    assert output.lines == ["32000.0"]
+
+
+def test_profilers_concorrentes():
+    call = LoxFunction.call
+    native_call = NativeFunction.call
+    barrier = threading.Barrier(4)
+
+    def profile(k: int) -> Profiler:
+        barrier.wait()
+        profiler = Profiler()
+        Lox("tree", profiler=profiler, output=ListOutput()).run(
+            f"fun f{k}() {{ return 1; }} for (var i = 0; i < {k + 1}; i = i + 1) f{k}();"
+        )
+        return profiler
+
+    def plain(k: int):
+        barrier.wait()
+        output = ListOutput()
+        Lox("tree", output=output).run("fun g() { return 2; } print g();")
+        return output.lines
+
+    with ThreadPoolExecutor(4) as executor:
+        profiled = [executor.submit(profile, k) for k in range(2)]
+        plains = [executor.submit(plain, k) for k in range(2)]
+        profilers = [future.result() for future in profiled]
+        assert [future.result() for future in plains] == [["2.0"], ["2.0"]]
+
+    for k, profiler in enumerate(profilers):
+        assert {stats.name: stats.calls for stats in profiler.stats()} == {f"f{k}": k + 1}
+    assert LoxFunction.call is call
+    assert NativeFunction.call is native_call
+
+
+def test_profilers_na_mesma_thread():
+    call = LoxFunction.call
+    first, second = Profiler(), Profiler()
+    a = Lox("tree", profiler=first, output=ListOutput())
+    b = Lox("tree", profiler=second, output=ListOutput())
+    a.run("fun a() {} a();")
+    b.run("fun b() {} b();")
+    Lox("tree", output=ListOutput()).run("fun c() {} c();")
+    a.run("fun d() {} d();")
+    assert [stats.name for stats in first.stats("name")] == ["a", "d"]
+    assert [stats.name for stats in second.stats()] == ["b"]
+    assert LoxFunction.call is call
+
+
+def test_cache_info_durante_compilacao():
+    stop = threading.Event()
+
+    def compile_many():
+        for k in range(200):
+            Lox("tree", output=ListOutput()).compile(f"fun f() {{}} f(); f(); print {k};")
+        stop.set()
+
+    thread = threading.Thread(target=compile_many)
+    thread.start()
+    while not stop.is_set():
+        callsite.cache_info()
+        callsite.reset_stats()
+    thread.join()
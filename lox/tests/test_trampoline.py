@@ -0,0 +1,88 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox import trampoline
+from lox.lox import ENGINES, Lox
+from lox.parser import parse
+
+
+def run(src: str, engine: str = "stack") -> str:
+    with redirect_stdout(io.StringIO()) as f:
+        Lox(engine).run(src)
+    return f.getvalue()
+
+
+@pytest.mark.parametrize("frontend", ["lark", "native"])
+def test_parse_de_expressao_longa(frontend: str):
+    program = parse("print " + " + ".join(["a"] * 10_000) + ";", frontend=frontend)
+    expr = program.body[0].right
+    depth = 0
+    while hasattr(expr, "left"):
+        expr = expr.left
+        depth += 1
+    assert depth == 9_999
+
+
+@pytest.mark.parametrize("engine", ["stack"])
+def test_expressao_longa(engine: str):
+    src = "var a = 1; print " + " + ".join(["a"] * 10_000) + ";"
+    assert run(src, engine) == "10000.0\n"
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_expressao_longa_constante(engine: str):
+    # O otimizador dobra a cadeia inteira sem recursão
+    src = "print " + " + ".join(["1"] * 10_000) + ";"
+    assert run(src, engine) == "10000.0\n"
+
+
+def test_recursao_profunda():
+    src = """
+        fun soma(n) {
+            if (n == 0) return 0;
+            return n + soma(n - 1);
+        }
+        print soma(50000);
+    """
+    assert run(src) == "1250025000.0\n"
+
+
+def test_profundidade_maxima(monkeypatch):
+    monkeypatch.setattr(trampoline, "MAX_DEPTH", 100)
+    src = """
+        fun f(n) { if (n == 0) return 0; return 1 + f(n - 1); }
+        print f(99);
+    """
+    assert run(src) == "99.0\n"
+    with pytest.raises(RuntimeError, match="profundidade máxima de chamadas"):
+        run("fun f(n) { return 1 + f(n); } f(1);")
+
+
+def test_profundidade_maxima_por_instancia():
+    src = "fun f(n) { if (n == 0) return 0; return 1 + f(n - 1); } print f(50);"
+    with pytest.raises(RuntimeError, match=r"excedida \(10\)"):
+        Lox("stack", max_depth=10).run(src)
+    with redirect_stdout(io.StringIO()) as f:
+        Lox("stack", max_depth=51).run(src)
+    assert f.getvalue() == "50.0\n"
+    with pytest.raises(ValueError, match="max_depth"):
+        Lox("tree", max_depth=10)
+    with pytest.raises(ValueError, match="max_depth"):
+        Lox("closure", max_depth=10)
+
+
+def test_retorno_de_dentro_de_blocos_e_lacos():
+    src = """
+        fun busca(n) {
+            for (var i = 0; i < 10; i = i + 1) {
+                { var j = i * 2; if (j == n) return i; }
+            }
+            return nil;
+        }
+        print busca(8);
+        print busca(7);
+        print busca(4) + busca(6);
+    """
+    assert run(src) == "4.0\nNone\n5.0\n"
@@ -0,0 +1,65 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from lox.bytecode import Op, compile
+from lox.lox import Lox, parse
+from lox.resolver import resolve
+from lox.runtime import NativeFunction
+
+
+def run(src: str, lox: Lox | None = None) -> str:
+    lox = lox or Lox(engine="vm")
+    with redirect_stdout(io.StringIO()) as f:
+        lox.run(src)
+    return f.getvalue()
+
+
+def test_bytecode_compacto():
+    code = compile(resolve(parse("var x = 1 + 2; print x;")))
+    assert isinstance(code.ops, bytes)
+    assert code.args.typecode == "H"
+    assert list(code.ops) == [
+        Op.CONST,
+        Op.CONST,
+        Op.ADD,
+        Op.DEFINE_GLOBAL,
+        Op.LOAD_GLOBAL,
+        Op.PRINT,
+        Op.CONST,
+        Op.RETURN,
+    ]
+    assert "DEFINE_GLOBAL" in code.dis()
+
+
+def test_recursao_nao_usa_pilha_do_python():
+    src = """
+    fun sum(n) {
+        if (n == 0) return 0;
+        return n + sum(n - 1);
+    }
+    print sum(5000);
+    """
+    assert run(src) == "12502500.0\n"
+
+
+def test_funcao_nativa_chama_funcao_lox():
+    lox = Lox(engine="vm")
+    lox.ctx.define("apply", NativeFunction(lambda f, x: f.call(None, [x]), 2))
+    src = """
+    fun double(x) { return x * 2; }
+    print apply(double, 21);
+    """
+    assert run(src, lox) == "42.0\n"
+
+
+def test_profundidade_maxima():
+    src = "fun f(n) { if (n == 0) return 0; return 1 + f(n - 1); } print f(50);"
+    with pytest.raises(RuntimeError, match=r"profundidade máxima de chamadas excedida \(10\)"):
+        run(src, Lox("vm", max_depth=10))
+    assert run(src, Lox("vm", max_depth=51)) == "50.0\n"
+
+    # Recursão infinita falha com um erro do Lox, sem esgotar a memória
+    with pytest.raises(RuntimeError, match="profundidade máxima de chamadas"):
+        run("fun f(n) { f(n + 1); } f(0);")